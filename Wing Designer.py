@@ -6,6 +6,10 @@ pycad_dir = os.path.realpath(pycam_dir + '/../../../PyCAD/trunk')
  
 sys.path.append(pycad_dir)
 
-from WingsApp import WingsApp
-app = WingsApp()
-app.MainLoop()
+if __name__ == '__main__':
+    # exports cut their pieces in a pool of processes, which on Windows import this file again, so mustn't open another window
+    import multiprocessing
+    multiprocessing.freeze_support()
+    from WingsApp import WingsApp
+    app = WingsApp()
+    app.MainLoop()
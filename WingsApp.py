@@ -29,8 +29,8 @@ class WingsApp(App):
     def ExportWing(self, object):
         config = HeeksConfig()
         default_directory = config.Read('WingsExportDirectory', self.GetDefaultDir())
-        wildcard_string = 'STL files (*.stl)|*.stl'
-        dialog = wx.FileDialog(self.frame, 'Export Wing STL File', default_directory, '', wildcard_string, wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
+        wildcard_string = 'STL files (*.stl)|*.stl|OBJ files (*.obj)|*.obj|PLY files (*.ply)|*.ply|3MF files (*.3mf)|*.3mf'
+        dialog = wx.FileDialog(self.frame, 'Export Wing File', default_directory, '', wildcard_string, wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
         dialog.CenterOnParent()
         
         if dialog.ShowModal() == wx.ID_OK:
@@ -0,0 +1,142 @@
+# exports every wing in saved documents to STL, OBJ, PLY or 3MF files, without opening a window
+# usage: python WingsExport.py [-o output_directory] [--format stl|obj|ply|3mf] [--jobs N] [--profile log.txt] document.heeks ...
+
+import os
+import sys
+import time
+import argparse
+import traceback
+import multiprocessing
+
+wings_dir = os.path.dirname(os.path.realpath(__file__))
+pycad_dir = os.path.realpath(wings_dir + '/../../PyCAD/trunk')
+sys.path.append(pycad_dir)
+
+cad = None
+wing = None
+
+def CreateWing(): return wing.Wing()
+
+def InitCad():
+    # called once in each process, before any document is opened
+    global cad
+    global wing
+    if cad != None:
+        return # already done in this process, or inherited from the parent
+    import cad as cad_module
+    import wing as wing_module
+    cad = cad_module
+    wing = wing_module
+    wing.type = cad.RegisterObjectType("Wing", CreateWing)
+
+def OpenDocument(doc_path):
+    cad.Reset()
+    if not cad.OpenFile(doc_path):
+        raise IOError('could not open ' + doc_path)
+
+def GetWings():
+    wings = []
+    for object in cad.GetObjects():
+        if object.GetType() == wing.type:
+            wings.append(object)
+    return wings
+
+def GetExportPath(doc_path, output_dir, index, num_wings, format):
+    name = os.path.splitext(os.path.basename(doc_path))[0]
+    if num_wings > 1:
+        name += ' wing' + str(index + 1)
+    return os.path.join(output_dir, name + '.' + format)
+
+def ExportDocument(job):
+    # opens the document once and exports each of its wings, returns a result for each wing
+    doc_path, output_dir, format = job
+    try:
+        OpenDocument(doc_path)
+        wings = GetWings()
+    except Exception:
+        return doc_path, [], traceback.format_exc()
+    results = []
+    for index, w in enumerate(wings):
+        results.append(ExportWing(w, GetExportPath(doc_path, output_dir, index, len(wings), format)))
+    return doc_path, results, None
+
+def ExportWing(w, path):
+    start = time.time()
+    try:
+        w.stats.title = path
+        num_bytes = 0
+        for writer in w.ExportFiles(path):
+            num_bytes += writer.num_bytes
+        return path, time.time() - start, num_bytes, w.GetExportReport(), None
+    except Exception:
+        return path, time.time() - start, 0, None, traceback.format_exc()
+
+def RunJobs(function, jobs, num_processes):
+    if num_processes > 1 and len(jobs) > 1:
+        pool = multiprocessing.Pool(min(num_processes, len(jobs)), InitCad)
+        try:
+            for result in pool.imap_unordered(function, jobs):
+                yield result
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for job in jobs:
+            yield function(job)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Export every wing in Wing Designer documents to mesh files')
+    parser.add_argument('documents', nargs = '+', help = 'saved documents to export')
+    parser.add_argument('-o', '--output', default = '.', help = 'directory to write the exported files to')
+    parser.add_argument('-f', '--format', default = 'stl', choices = ['stl', 'obj', 'ply', '3mf'], help = 'file format to export')
+    parser.add_argument('-j', '--jobs', type = int, default = multiprocessing.cpu_count(), help = 'number of processes to export with')
+    parser.add_argument('--no-cache', action = 'store_true', help = "don't use the cache of wing meshes on disk")
+    parser.add_argument('--profile', metavar = 'LOG', help = 'append the times and counts of making each wing to this file')
+    parser.add_argument('--cprofile', action = 'store_true', help = 'with --profile, also write cProfile statistics')
+    args = parser.parse_args(argv)
+
+    if args.no_cache:
+        os.environ['WINGS_CACHE'] = '0'
+    if args.profile:
+        # in the environment, so the processes exporting pick it up too
+        os.environ['WINGS_PROFILE'] = 'cprofile' if args.cprofile else '1'
+        os.environ['WINGS_PROFILE_LOG'] = os.path.abspath(args.profile)
+
+    if not os.path.isdir(args.output):
+        os.makedirs(args.output)
+
+    InitCad()
+    total_start = time.time()
+    failures = []
+
+    # one job for each document, which exports all of its wings
+    jobs = [(doc_path, args.output, args.format) for doc_path in args.documents]
+    exported = 0
+    num_wings = 0
+    for doc_path, results, error in RunJobs(ExportDocument, jobs, args.jobs):
+        if error:
+            failures.append((doc_path, error))
+            print(doc_path + ': FAILED to open')
+        elif len(results) == 0:
+            print(doc_path + ': no wings')
+        for path, seconds, num_bytes, report, error in results:
+            num_wings += 1
+            if error:
+                failures.append((path, error))
+                print('%s: FAILED after %.2fs' % (path, seconds))
+            else:
+                exported += 1
+                print('%s: %.2fs, %.1fMB' % (path, seconds, num_bytes / 1048576.0))
+                print(report)
+
+    print('exported %d of %d wings in %.2fs' % (exported, num_wings, time.time() - total_start))
+    if len(failures) > 0:
+        print(str(len(failures)) + ' failed:')
+        for path, error in failures:
+            print(path)
+            print(error)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
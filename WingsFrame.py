@@ -8,12 +8,20 @@ sys.path.append(pycad_dir)
 wings = []
 
 import cad
+import profiling
+import wing
 from wing import Wing
 from Frame import Frame # from CAD
 
 class WingsFrame(Frame):
     def __init__(self, parent, id=-1, pos=wx.DefaultPosition, size=wx.DefaultSize, style=wx.DEFAULT_FRAME_STYLE, name=wx.FrameNameStr):
         Frame.__init__(self, parent, id, pos, size, style, name)
+        profiling.listeners.append(self.OnWingRemade)
+        # remake wings on another thread after edits, showing the old wing until the new one is ready
+        wing.regenerate_in_background = True
+        wing.call_after = wx.CallAfter
+        wing.results_made = self.OnWingResultsMade
+        wing.message_box = wx.MessageBox
         
     def OnWing(self, e):
         o = Wing()
@@ -23,4 +31,27 @@ class WingsFrame(Frame):
     def AddExtraMenus(self):
         self.bitmap_path = wings_dir + '/icons'
         self.AddMenu('&Wings')
-        self.AddMenuItem('Add a Wing', self.OnWing, None, 'wing')        
+        self.AddMenuItem('Add a Wing', self.OnWing, None, 'wing')
+        self.AddMenuItem('Wing Stats', self.OnWingStats)
+
+    def OnWingRemade(self, stats):
+        # called by profiling, maybe from another thread
+        wx.CallAfter(self.SetWingStatus, stats.GetSummary())
+
+    def OnWingResultsMade(self):
+        # the wing's properties said 'calculating...', so are shown again with the results
+        self.properties.RefreshByRemovingAndAddingAll()
+
+    def SetWingStatus(self, text):
+        if self.GetStatusBar():
+            self.SetStatusText(text)
+
+    def OnWingStats(self, e):
+        if not profiling.enabled:
+            if wx.MessageBox('Profiling is off. Turn it on, to time the next change to a wing?', 'Wing Stats', wx.YES_NO) == wx.YES:
+                profiling.Enable()
+            return
+        if profiling.latest == None:
+            wx.MessageBox('No wing has been remade since profiling was turned on.', 'Wing Stats')
+            return
+        wx.MessageBox(profiling.latest.GetReport(), 'Wing Stats')        
@@ -0,0 +1,30 @@
+# chooses the cad, geom and Object modules for wing.py
+# PyCAD's, if they can be found, or the NumPy stand-ins in npcad.py and npgeom.py,
+# set WINGS_BACKEND=numpy to always use the stand-ins
+
+import os
+import sys
+
+wings_dir = os.path.dirname(os.path.realpath(__file__))
+pycad_dir = os.path.realpath(wings_dir + '/../../PyCAD/trunk')
+if pycad_dir not in sys.path:
+    sys.path.append(pycad_dir)
+
+name = None
+
+if os.environ.get('WINGS_BACKEND', 'pycad') != 'numpy':
+    try:
+        import cad
+        import geom
+        from Object import Object
+        from Object import PyProperty
+        name = 'pycad'
+    except ImportError:
+        pass
+
+if name == None:
+    import npcad as cad
+    import npgeom as geom
+    from npcad import Object
+    from npcad import PyProperty
+    name = 'numpy'
@@ -0,0 +1,231 @@
+# times making synthetic wings, phase by phase, with the NumPy backend
+# usage: python benchmark.py [--points 50,400,2000] [--spans 5,50,500] [-o results.json] [--baseline baseline.json]
+
+import os
+os.environ['WINGS_BACKEND'] = 'numpy' # the wings are made from in-memory sketches
+os.environ['WINGS_CACHE'] = '0' # time making the stages, not loading them
+
+import sys
+import math
+import time
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+
+import backend
+import wing
+from backend import geom
+
+PHASES = ['curves', 'stations', 'wing_mesh', 'solid', 'outline', 'pattern_area', 'pattern_mesh', 'export']
+
+def NacaProfile(digits, num_points, chord):
+    # returns the points of a NACA 4-digit aerofoil, from the trailing edge under the bottom to the leading edge and back over the top,
+    # the way round which makes the wing's triangles face outwards
+    # the trailing edge is closed to one point, so cambered and symmetric profiles start and end at the same x, and go the same way round
+    m = int(digits[0]) * 0.01
+    p = int(digits[1]) * 0.1
+    t = int(digits[2:4]) * 0.01
+    n = max(2, (num_points + 1) // 2)
+    x = 0.5 * (1.0 - np.cos(np.linspace(0.0, math.pi, n)))
+    yt = 5.0 * t * (0.2969 * np.sqrt(x) - 0.1260 * x - 0.3516 * x**2 + 0.2843 * x**3 - 0.1015 * x**4)
+    if m > 0.0 and p > 0.0:
+        front = x < p
+        yc = np.where(front, m / p**2 * (2.0 * p * x - x**2), m / (1.0 - p)**2 * ((1.0 - 2.0 * p) + 2.0 * p * x - x**2))
+        dyc = np.where(front, 2.0 * m / p**2 * (p - x), 2.0 * m / (1.0 - p)**2 * (p - x))
+    else:
+        yc = np.zeros(n)
+        dyc = np.zeros(n)
+    theta = np.arctan(dyc)
+    upper = np.stack((x - yt * np.sin(theta), yc + yt * np.cos(theta)), axis = 1)
+    lower = np.stack((x + yt * np.sin(theta), yc - yt * np.cos(theta)), axis = 1)
+    upper[-1] = lower[-1] = (upper[-1] + lower[-1]) * 0.5
+    pts = np.concatenate((lower[::-1], upper[1:]))
+    return pts * chord
+
+def MakeWing(num_points, num_spans, span = 1000.0, root_chord = 250.0, tip_chord = 120.0, sweep = 80.0, washout = 3.0):
+    # a tapered, swept wing with washout, its trailing edge has num_spans spans
+    x = np.linspace(0.0, span, num_spans + 1)
+    leading_edge = np.stack((x, -sweep * x / span), axis = 1)
+    chord = root_chord + (tip_chord - root_chord) * x / span
+    trailing_edge = np.stack((x, leading_edge[:,1] - chord), axis = 1)
+    angle_x = np.linspace(0.0, 100.0, 21)
+    angle_graph = np.stack((angle_x, washout * (angle_x / 100.0)**2), axis = 1)
+    w = wing.NewWingFromPoints(leading_edge[[0, -1]], trailing_edge, NacaProfile('2412', num_points, root_chord), NacaProfile('0010', num_points, tip_chord), angle_graph)
+    w.centre_straight = False
+    w.render_pattern = True
+    w.pattern_border = 5.0
+    w.pattern_x_step = 20.0
+    w.pattern_y_step = 30.0
+    w.pattern_wall = 1.5
+    w.split_into_pieces = 4
+    w.split_wall_width = 2.0
+    return w
+
+def ProbeLeadingEdgePoint(w, fraction):
+    # as the old GetLeadingEdgePoint
+    curve = w.curves[0]
+    p = curve.PerimToPoint(curve.Perim() * fraction)
+    return p.x, p.y
+
+def ProbeTrailingEdgePoint(w, le):
+    # as the old GetTrailingEdgePoint, the first crossing going back from the leading edge, or None
+    backward_curve = geom.Curve()
+    backward_curve.Append(geom.Point(le[0], le[1]))
+    backward_curve.Append(geom.Point(le[0], le[1] - 1000.0))
+    pts = backward_curve.Intersections(w.curves[1])
+    if len(pts) == 0:
+        return None
+    return pts[0].y
+
+def ProbeAngle(w, fraction):
+    # as the old GetAngle, the first crossing going up the angle graph, from its lowest point
+    box = w.curves[4].GetBox()
+    x = box.MinX() + box.Width() * fraction
+    curve = geom.Curve()
+    curve.Append(geom.Point(x, box.MinY() - 1.0))
+    curve.Append(geom.Point(x, box.MaxY() + 1.0))
+    pts = curve.Intersections(w.curves[4])
+    if len(pts) == 0:
+        return 0.0
+    return pts[0].y - box.MinY()
+
+def CheckLookupParity(w):
+    # returns the largest difference between the indexed lookups and probe curve intersections
+    fractions = np.linspace(0.0, 1.0, 51)
+    le_pts = w.GetLeadingEdgePoints(fractions)
+    te_pts = w.GetTrailingEdgePoints(le_pts)
+    angles = w.GetAngles(fractions)
+    worst = 0.0
+    for le, te, fraction, angle in zip(le_pts, te_pts, fractions, angles):
+        x, y = ProbeLeadingEdgePoint(w, fraction)
+        worst = max(worst, math.fabs(x - le[0]), math.fabs(y - le[1]))
+        y = ProbeTrailingEdgePoint(w, le)
+        if y != None:
+            worst = max(worst, math.fabs(y - te[1]))
+        worst = max(worst, math.fabs(ProbeAngle(w, fraction) - angle))
+    return worst
+
+def RunPhases(w, pattern, export, phases):
+    # makes the wing a stage at a time, putting the seconds each took in phases, returns its mesh and number of pattern cells
+    def Time(phase, function):
+        start = time.perf_counter()
+        result = function()
+        phases[phase] = time.perf_counter() - start
+        return result
+
+    Time('curves', w.CheckCurves)
+    Time('stations', lambda: w.CalculateStations(w.GetStationFractions()))
+    mesh = Time('wing_mesh', lambda: w.GetStage('wing_mesh'))
+    Time('solid', lambda: w.GetStage('solid'))
+    pattern_cells = 0
+    if pattern:
+        Time('outline', lambda: w.GetStage('outline'))
+        pattern_area = Time('pattern_area', lambda: w.GetStage('pattern_area'))
+        if pattern_area != None:
+            pattern_cells = pattern_area.NumCurves()
+        Time('pattern_mesh', lambda: w.GetStage('pattern_mesh'))
+    if export:
+        directory = tempfile.mkdtemp()
+        try:
+            Time('export', lambda: w.ExportFiles(os.path.join(directory, 'wing.stl')))
+        finally:
+            shutil.rmtree(directory)
+    return mesh, pattern_cells
+
+def RunCase(num_points, num_spans, pattern, export):
+    w = MakeWing(num_points, num_spans)
+    phases = {}
+    mesh, pattern_cells = RunPhases(w, pattern, export, phases)
+
+    # the peak memory is measured making the wing again, as tracing the allocations slows down the timed phases
+    tracemalloc.start()
+    RunPhases(MakeWing(num_points, num_spans), pattern, export, {})
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    triangles = mesh.NumTriangles()
+    tessellation_time = phases['stations'] + phases['wing_mesh']
+    return {
+        'name': 'p' + str(num_points) + '_s' + str(num_spans),
+        'points': num_points,
+        'spans': num_spans,
+        'phases': phases,
+        'triangles': triangles,
+        'triangles_per_second': triangles / tessellation_time if tessellation_time > 0.0 else 0.0,
+        'pattern_cells': pattern_cells,
+        'peak_memory_mb': peak / 1048576.0,
+        'lookup_parity': CheckLookupParity(w),
+        }
+
+def Compare(results, baseline, tolerance):
+    # prints the ratio of each phase's time to the baseline's, returns the number of phases slower than the tolerance
+    base_cases = {}
+    for case in baseline['cases']:
+        base_cases[case['name']] = case
+    regressions = 0
+    for case in results['cases']:
+        base = base_cases.get(case['name'])
+        if base == None:
+            continue
+        for phase in PHASES:
+            if phase not in case['phases'] or phase not in base['phases'] or base['phases'][phase] <= 0.0:
+                continue
+            ratio = case['phases'][phase] / base['phases'][phase]
+            flag = ''
+            if ratio > tolerance and case['phases'][phase] > 0.001:
+                flag = ' SLOWER'
+                regressions += 1
+            print('%-12s %-13s %8.4fs -> %8.4fs  x%.2f%s' % (case['name'], phase, base['phases'][phase], case['phases'][phase], ratio, flag))
+    return regressions
+
+def ParseSizes(text):
+    return [int(s) for s in text.split(',') if s.strip() != '']
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Time making synthetic NACA wings, phase by phase')
+    parser.add_argument('--points', default = '50,400,2000', help = 'profile point counts, comma separated')
+    parser.add_argument('--spans', default = '5,50,500', help = 'trailing edge span counts, comma separated')
+    parser.add_argument('--no-pattern', action = 'store_true', help = "don't time the pattern phases")
+    parser.add_argument('--no-export', action = 'store_true', help = "don't time exporting")
+    parser.add_argument('-o', '--output', help = 'JSON file to save the results to')
+    parser.add_argument('--baseline', help = 'JSON file of earlier results to compare with')
+    parser.add_argument('--tolerance', type = float, default = 1.2, help = 'slowdown ratio reported as a regression')
+    args = parser.parse_args(argv)
+
+    results = {
+        'backend': backend.name,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'cases': [],
+        }
+
+    for num_points in ParseSizes(args.points):
+        for num_spans in ParseSizes(args.spans):
+            case = RunCase(num_points, num_spans, not args.no_pattern, not args.no_export)
+            results['cases'].append(case)
+            times = '  '.join(['%s %.4f' % (phase, case['phases'][phase]) for phase in PHASES if phase in case['phases']])
+            print('%-12s %9d triangles %12.0f tri/s %8.1fMB  %s' % (case['name'], case['triangles'], case['triangles_per_second'], case['peak_memory_mb'], times))
+            if case['lookup_parity'] > 0.0001:
+                print('%-12s lookups differ from curve intersections by %g' % (case['name'], case['lookup_parity']))
+
+    if args.output:
+        f = open(args.output, 'w')
+        json.dump(results, f, indent = 1)
+        f.close()
+
+    if args.baseline:
+        f = open(args.baseline)
+        baseline = json.load(f)
+        f.close()
+        if Compare(results, baseline, args.tolerance) > 0:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
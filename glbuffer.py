@@ -0,0 +1,68 @@
+# draws a wing's triangles from one OpenGL vertex buffer, uploaded from an array in one go,
+# instead of compiling a display list with a call to cad.DrawTriangle for each triangle
+# needs PyOpenGL, and OpenGL 1.5 or later, set WINGS_GL=lists to always use display lists
+
+import os
+import numpy as np
+import stlwriter
+
+try:
+    from OpenGL import GL
+except ImportError:
+    GL = None
+
+enabled = os.environ.get('WINGS_GL', 'buffers') != 'lists'
+available = None # whether vertex buffers work, found out the first time one is made
+buffers_to_delete = [] # deleted the next time one is drawn, when the GL context is current
+
+def Available():
+    # only call this while the GL context is current
+    global available
+    if available == None:
+        available = GL != None and bool(GL.glGenBuffers) and bool(GL.glInterleavedArrays)
+    return enabled and available
+
+class VertexBuffer:
+    def __init__(self, triangles):
+        # triangles is an array of shape (n, 3, 3), each point is given its triangle's normal
+        triangles = np.asarray(triangles, dtype = float).reshape(-1, 3, 3)
+        self.count = len(triangles) * 3
+        data = np.empty((len(triangles), 3, 2, 3), dtype = np.float32) # the normal, then the point, in GL_N3F_V3F order
+        data[:,:,0] = stlwriter.GetNormals(triangles)[:,None]
+        data[:,:,1] = triangles
+        self.buffer = GL.glGenBuffers(1)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.buffer)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, data.nbytes, data, GL.GL_STATIC_DRAW)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    def Draw(self):
+        DeleteOldBuffers()
+        if self.buffer == None or self.count == 0:
+            return
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.buffer)
+        GL.glInterleavedArrays(GL.GL_N3F_V3F, 0, None)
+        GL.glDrawArrays(GL.GL_TRIANGLES, 0, self.count)
+        GL.glDisableClientState(GL.GL_NORMAL_ARRAY)
+        GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+    def Delete(self):
+        # can be called from anywhere, the buffer is deleted later, while the GL context is current
+        if self.buffer != None:
+            buffers_to_delete.append(self.buffer)
+            self.buffer = None
+
+def MakeVertexBuffer(triangles):
+    # returns a VertexBuffer, or None if they can't be used, so display lists should be used instead
+    global available
+    if not Available():
+        return None
+    try:
+        return VertexBuffer(triangles)
+    except Exception:
+        available = False # GL errors are raised by PyOpenGL, don't try again
+        return None
+
+def DeleteOldBuffers():
+    while len(buffers_to_delete) > 0:
+        GL.glDeleteBuffers(1, [buffers_to_delete.pop()])
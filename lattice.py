@@ -0,0 +1,122 @@
+# the triangles of the pattern lattice, made and sorted as arrays
+# so only the triangles near the edge of the pattern need polygon booleans
+
+import math
+import numpy as np
+
+MAX_BINS = 4000000 # the most bins used to find which triangles are near the outline
+
+def MakeTriangles(minx, miny, maxx, maxy, x_step, y_step, tx, ty):
+    # returns the four triangles of each cell of the pattern, in a box, as an array of shape (n, 3, 2)
+    # all of them are anti-clockwise
+    xs = np.arange(minx, maxx, x_step)
+    ys = np.arange(miny, maxy, y_step)
+    x, y = np.meshgrid(xs, ys, indexing = 'ij')
+    x = x.ravel()
+    y = y.ravel()
+    hx = x_step * 0.5
+    hy = y_step * 0.5
+    corners = [
+        ((x - tx*0.5, y), (x + tx*0.5, y), (x, y + ty)),
+        ((x + hx, y), (x + hx + tx*0.5, y + ty), (x + hx - tx*0.5, y + ty)),
+        ((x + hx - tx*0.5, y + hy), (x + hx + tx*0.5, y + hy), (x + hx, y + hy + ty)),
+        ((x, y + hy), (x + tx*0.5, y + hy + ty), (x - tx*0.5, y + hy + ty)),
+        ]
+    triangles = np.empty((len(x), 4, 3, 2))
+    for t in range(0, 4):
+        for i in range(0, 3):
+            triangles[:, t, i, 0] = corners[t][i][0]
+            triangles[:, t, i, 1] = corners[t][i][1]
+    return triangles.reshape(-1, 3, 2)
+
+def ClassifyTriangles(triangles, rings, bands, bin_size):
+    # rings is a list of arrays of points of closed polygons, bands is a list of (minx, maxx) strips
+    # returns two arrays of bools, which triangles are fully inside the rings and away from the bands,
+    # and which are near the edge of a ring or touch a band, so need clipping
+    # the rest are fully outside the rings
+    n = len(triangles)
+    if n == 0:
+        return np.zeros(0, dtype = bool), np.zeros(0, dtype = bool)
+    mins = triangles.min(axis = 1)
+    maxs = triangles.max(axis = 1)
+
+    # a grid of bins over the triangles, with a spare bin all round
+    origin = mins.min(axis = 0) - bin_size
+    size = maxs.max(axis = 0) + bin_size - origin
+    bin_size = max(bin_size, math.sqrt(size[0] * size[1] / MAX_BINS))
+    shape = (int(size[0] / bin_size) + 2, int(size[1] / bin_size) + 2)
+
+    # mark the bins which the rings pass through
+    closed_rings = []
+    for ring in rings:
+        ring = np.asarray(ring, dtype = float).reshape(-1, 2)
+        if len(ring) < 2:
+            continue
+        if np.any(ring[0] != ring[-1]):
+            ring = np.concatenate((ring, ring[:1]))
+        closed_rings.append(ring)
+    edge_bins = np.zeros(shape, dtype = bool)
+    for ring in closed_rings:
+        pts = DensifyPolyline(ring, bin_size * 0.5)
+        ij = np.floor((pts - origin) / bin_size).astype(int)
+        keep = (ij[:,0] >= 0) & (ij[:,0] < shape[0]) & (ij[:,1] >= 0) & (ij[:,1] < shape[1])
+        edge_bins[ij[keep,0], ij[keep,1]] = True
+
+    # grow them by one bin, for points on the bins' edges
+    grown = edge_bins.copy()
+    grown[1:] |= edge_bins[:-1]
+    grown[:-1] |= edge_bins[1:]
+    edge_bins = grown.copy()
+    edge_bins[:,1:] |= grown[:,:-1]
+    edge_bins[:,:-1] |= grown[:,1:]
+
+    # count the marked bins under each triangle's box with a summed area table
+    table = np.zeros((shape[0] + 1, shape[1] + 1), dtype = np.int64)
+    table[1:,1:] = edge_bins.cumsum(axis = 0).cumsum(axis = 1)
+    i0, j0 = np.floor((mins - origin) / bin_size).astype(int).T
+    i1, j1 = np.floor((maxs - origin) / bin_size).astype(int).T + 1
+    count = table[i1, j1] - table[i0, j1] - table[i1, j0] + table[i0, j0]
+    boundary = count > 0
+
+    for x0, x1 in bands:
+        boundary |= (maxs[:,0] >= x0) & (mins[:,0] <= x1)
+
+    # any other triangle is on one side of the rings, the same side as the bin its first point is in
+    inside_bins = GetBinsInside(closed_rings, origin, bin_size, shape)
+    i, j = np.floor((triangles[:,0] - origin) / bin_size).astype(int).T
+    inside = (~boundary) & inside_bins[i, j]
+    return inside, boundary
+
+def DensifyPolyline(pts, spacing):
+    # returns points along a polyline, no further apart than spacing
+    starts = pts[:-1]
+    vectors = pts[1:] - pts[:-1]
+    lengths = np.hypot(vectors[:,0], vectors[:,1])
+    counts = np.maximum(1, np.ceil(lengths / spacing).astype(int))
+    span_index = np.repeat(np.arange(len(starts)), counts)
+    first_of_span = np.repeat(np.cumsum(counts) - counts, counts)
+    t = (np.arange(len(span_index)) - first_of_span) / counts[span_index]
+    dense = starts[span_index] + vectors[span_index] * t[:,None]
+    return np.concatenate((dense, pts[-1:]))
+
+def GetBinsInside(rings, origin, bin_size, shape):
+    # returns an array of bools, whether the centre of each bin is inside the rings, using the even-odd rule
+    inside = np.zeros(shape, dtype = bool)
+    if len(rings) == 0:
+        return inside
+    a = np.concatenate([ring[:-1] for ring in rings])
+    b = np.concatenate([ring[1:] for ring in rings])
+    xs = origin[0] + (np.arange(shape[0]) + 0.5) * bin_size
+    ys = origin[1] + (np.arange(shape[1]) + 0.5) * bin_size
+
+    # do the rows of bins in groups, to keep the arrays of edges by rows small
+    rows_per_group = max(1, 1000000 // len(a))
+    for first in range(0, shape[1], rows_per_group):
+        y = ys[first:first + rows_per_group][:,None]
+        crosses = (a[:,1] <= y) != (b[:,1] <= y)
+        dy = np.where(a[:,1] == b[:,1], 1.0, b[:,1] - a[:,1])
+        x_cross = a[:,0] + (y - a[:,1]) * (b[:,0] - a[:,0]) / dy
+        for row in range(0, len(y)):
+            crossings = np.sort(x_cross[row][crosses[row]])
+            inside[:, first + row] = (np.searchsorted(crossings, xs) % 2) == 1
+    return inside
@@ -0,0 +1,172 @@
+# works out the volume, surface area, centroid and inertia of closed triangle meshes, from arrays of triangles
+# each triangle makes a tetrahedron with a reference point, their signed volumes and moments add up to those of the solid
+# the triangles are taken a chunk at a time, so only one chunk's working arrays are in memory at once
+
+import numpy as np
+import stlwriter
+import polygons
+
+CHUNK_SIZE = stlwriter.BLOCK_SIZE
+DENSITY = 1.24 # grams per cubic centimetre, of PLA, for the mass
+
+class MassProperties:
+    def __init__(self):
+        self.num_triangles = 0
+        self.volume = 0.0 # cubic mm
+        self.area = 0.0 # square mm
+        self.origin = None # the reference point, the first point, keeps the sums small for wings far from 0, 0, 0
+        self.first_moment = np.zeros(3) # the integral of the position over the volume, relative to the origin
+        self.second_moment = np.zeros((3, 3)) # the integral of the position times its transpose
+
+    def AddTriangles(self, triangles):
+        # triangles is an array of shape (n, 3, 3), of any size
+        triangles = np.asarray(triangles, dtype = float).reshape(-1, 3, 3)
+        if len(triangles) == 0:
+            return
+        if self.origin is None:
+            self.origin = triangles[0, 0].copy()
+        for i in range(0, len(triangles), CHUNK_SIZE):
+            self.AddChunk(triangles[i:i + CHUNK_SIZE] - self.origin)
+
+    def AddChunk(self, t):
+        a = t[:,0]
+        b = t[:,1]
+        c = t[:,2]
+        n = np.cross(b - a, c - a)
+        self.num_triangles += len(t)
+        self.area += 0.5 * np.sqrt(np.einsum('ij,ij->i', n, n)).sum()
+        v = np.einsum('ij,ij->i', a, np.cross(b, c)) / 6.0 # the signed volumes of the tetrahedrons
+        self.volume += v.sum()
+        s = a + b + c
+        self.first_moment += (v[:,None] * s).sum(axis = 0) / 4.0
+        # for a tetrahedron with one corner at the origin, the integral of x x^T is v / 20 * (a a^T + b b^T + c c^T + s s^T)
+        self.second_moment += np.einsum('i,ij,ik->jk', v, s, s) / 20.0
+        for p in (a, b, c):
+            self.second_moment += np.einsum('i,ij,ik->jk', v, p, p) / 20.0
+
+    def Subtract(self, other):
+        # returns the properties of this solid less another inside it, measured from the same origin
+        # the surface area of what's left isn't known
+        result = MassProperties()
+        result.num_triangles = self.num_triangles
+        result.area = None
+        result.origin = self.origin
+        result.volume = self.volume - other.volume
+        result.first_moment = self.first_moment - other.first_moment
+        result.second_moment = self.second_moment - other.second_moment
+        return result
+
+    def TurnOutwards(self):
+        # a mesh whose triangles all face inwards adds up to minus its integrals, so they're turned back, to not report a negative mass
+        if self.volume < 0.0:
+            self.volume = -self.volume
+            self.first_moment = -self.first_moment
+            self.second_moment = -self.second_moment
+
+    def GetMass(self, density = DENSITY):
+        # grams, for a density in grams per cubic centimetre
+        return self.volume * density / 1000.0
+
+    def GetCentroid(self):
+        if self.origin is None or self.volume == 0.0:
+            return np.zeros(3)
+        return self.origin + self.first_moment / self.volume
+
+    def GetInertia(self, density = DENSITY):
+        # the inertia tensor about the centroid, in grams times square mm
+        if self.volume == 0.0:
+            return np.zeros((3, 3))
+        offset = self.first_moment / self.volume
+        covariance = self.second_moment - self.volume * np.outer(offset, offset)
+        inertia = np.trace(covariance) * np.identity(3) - covariance
+        return inertia * density / 1000.0
+
+    def GetReport(self, title, density = DENSITY):
+        # several lines, for the export log
+        # rounded first, and 0.0 added, so values which are only rounding from 0 don't print as -0.0
+        centroid = np.round(self.GetCentroid(), 3) + 0.0
+        inertia = np.round(self.GetInertia(density), 1) + 0.0
+        area = '' if self.area == None else ', surface area %.1f square mm' % self.area
+        return '\n'.join([
+            '%s: %d triangles' % (title, self.num_triangles),
+            '  volume %.1f cubic mm%s, mass %.2fg at %.2fg/cc' % (self.volume, area, self.GetMass(density), density),
+            '  centroid %.3f, %.3f, %.3f' % tuple(centroid),
+            '  inertia about centroid, g mm^2 %.1f, %.1f, %.1f / %.1f, %.1f, %.1f / %.1f, %.1f, %.1f' % tuple(inertia.reshape(-1)),
+            ])
+
+def GetMassProperties(blocks, origin = None):
+    # returns the MassProperties of the triangles in an iterable of arrays, such as Mesh.GetChunks()
+    # the tetrahedrons are made from the origin, if given, else from the first point
+    properties = MassProperties()
+    if origin is not None:
+        properties.origin = np.array(origin, dtype = float)
+    for triangles in blocks:
+        properties.AddTriangles(triangles)
+    properties.TurnOutwards()
+    return properties
+
+def GetCellMassProperties(blocks, cells, origin):
+    # returns the MassProperties of the part of a closed, outward facing mesh inside the upright prisms of the cells,
+    # which are arrays of x, y points, not crossing each other
+    # each triangle, seen from above, is cut to each cell, and makes a column down to a flat base, with upright walls,
+    # those under triangles facing down are inside out, so the columns add up to just the solid inside the cells
+    properties = MassProperties()
+    properties.origin = np.array(origin, dtype = float)
+    triangles = np.concatenate([np.asarray(t, dtype = float).reshape(-1, 3, 3) for t in blocks] + [np.zeros((0, 3, 3))])
+    normals = np.cross(triangles[:,1] - triangles[:,0], triangles[:,2] - triangles[:,0])
+    upright = normals[:,2] == 0.0 # these add nothing
+    triangles = triangles[~upright]
+    normals = normals[~upright]
+    # sorted by their lowest x, so only those near each cell need be looked at
+    order = np.argsort(triangles[:,:,0].min(axis = 1))
+    triangles = triangles[order]
+    normals = normals[order]
+    mins = triangles[:,:,:2].min(axis = 1)
+    maxs = triangles[:,:,:2].max(axis = 1)
+    width = (maxs[:,0] - mins[:,0]).max() if len(triangles) > 0 else 0.0
+    # the cells split into triangles, each paired with the mesh's triangles near it, then all the pairs are clipped at once
+    clips = []
+    for cell in cells:
+        cell = polygons.RemoveZeroLengthEdges(np.asarray(cell, dtype = float))
+        if len(cell) == 3:
+            clips.append(cell[None]) # most cells of a pattern are triangles already
+        else:
+            clips.append(cell[polygons.Triangulate(cell)])
+    clips = np.concatenate(clips + [np.zeros((0, 3, 2))])
+    clockwise = polygons.Cross(clips[:,0].T, clips[:,1].T, clips[:,2]) < 0.0
+    clips[clockwise] = clips[clockwise, ::-1]
+    lows = clips.min(axis = 1)
+    highs = clips.max(axis = 1)
+    starts = np.searchsorted(mins[:,0], lows[:,0] - width)
+    ends = np.searchsorted(mins[:,0], highs[:,0], side = 'right')
+    pairs = [np.zeros((0, 2), dtype = int)]
+    for i, (low, high, start, end) in enumerate(zip(lows, highs, starts, ends)):
+        near = np.all(maxs[start:end] >= low, axis = 1) & np.all(mins[start:end] <= high, axis = 1)
+        near = np.nonzero(near)[0] + start
+        pairs.append(np.stack((np.full(len(near), i), near), axis = 1))
+    pairs = np.concatenate(pairs)
+    for i in range(0, len(pairs), CHUNK_SIZE):
+        clip, near = pairs[i:i + CHUNK_SIZE].T
+        polys, counts = polygons.ClipConvex(triangles[near,:,:2], np.full(len(near), 3), clips[clip])
+        properties.AddTriangles(GetColumns(polys, counts, triangles[near], normals[near], properties.origin[2]))
+    return properties
+
+def GetColumns(polys, counts, triangles, normals, base):
+    # returns the triangles of closed columns from the triangles, cut to the polygons, down to z = base
+    # the polygons are split into fans, whose points are lifted back up onto the triangles they were cut from
+    tops = []
+    for i in range(1, polys.shape[1] - 1):
+        which = counts > i + 1
+        fan = np.stack((polys[which,0], polys[which,i], polys[which,i + 1]), axis = 1)
+        t = triangles[which]
+        n = normals[which]
+        z = t[:,0,2,None] - ((fan[:,:,0] - t[:,0,0,None]) * n[:,0,None] + (fan[:,:,1] - t[:,0,1,None]) * n[:,1,None]) / n[:,2,None]
+        tops.append(np.concatenate((fan, z[:,:,None]), axis = 2))
+    top = np.concatenate(tops)
+    bottom = top.copy()
+    bottom[:,:,2] = base
+    columns = [top, bottom[:, ::-1]]
+    for a, b in ((0, 1), (1, 2), (2, 0)):
+        columns.append(np.stack((bottom[:,a], bottom[:,b], top[:,b]), axis = 1))
+        columns.append(np.stack((bottom[:,a], top[:,b], top[:,a]), axis = 1))
+    return np.concatenate(columns)
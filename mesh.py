@@ -0,0 +1,126 @@
+from backend import geom
+import numpy as np
+
+class Mesh:
+    # triangles are added a strip or fan at a time and kept in contiguous arrays,
+    # they are only turned into a geom.Stl, or drawn, once the mesh is complete
+    def __init__(self):
+        self.chunks = []
+        self.mirror_chunks = [] # chunks which also get a copy mirrored in x
+        self.triangles = None
+
+    def AddTriangles(self, triangles, mirror = False):
+        # triangles is an array of shape (n, 3, 3), n triangles of 3 points of x, y, z
+        triangles = np.asarray(triangles, dtype = float).reshape(-1, 3, 3)
+        if len(triangles) == 0:
+            return
+        if mirror:
+            self.mirror_chunks.append(triangles)
+        else:
+            self.chunks.append(triangles)
+        self.triangles = None
+
+    def AddStrip(self, pts0, pts1, mirror = False):
+        # adds two triangles between each pair of neighbouring points of two rows of points
+        pts0 = np.asarray(pts0, dtype = float)
+        pts1 = np.asarray(pts1, dtype = float)
+        n = min(len(pts0), len(pts1))
+        if n < 2:
+            return
+        triangles = np.empty((n - 1, 2, 3, 3))
+        triangles[:,0,0] = pts1[1:n]
+        triangles[:,0,1] = pts0[:n - 1]
+        triangles[:,0,2] = pts0[1:n]
+        triangles[:,1,0] = pts1[:n - 1]
+        triangles[:,1,1] = pts0[:n - 1]
+        triangles[:,1,2] = pts1[1:n]
+        self.AddTriangles(triangles, mirror)
+
+    def AddIndexedTriangles(self, pts, indices, mirror = False):
+        # adds triangles of points picked from pts, indices is an array of shape (n, 3)
+        pts = np.asarray(pts, dtype = float)
+        self.AddTriangles(pts[np.asarray(indices, dtype = int)], mirror)
+
+    def AddFan(self, pts, z, mirror = False):
+        # adds triangles filling a 2D polygon, as a fan from its first point, at height z
+        pts = np.asarray(pts, dtype = float)
+        n = len(pts)
+        if n < 3:
+            return
+        i = np.arange(2, n)
+        pts3d = np.empty((n, 3))
+        pts3d[:,:2] = pts[:,:2]
+        pts3d[:,2] = z
+        self.AddIndexedTriangles(pts3d, np.stack((np.zeros_like(i), i, i - 1), axis = 1), mirror)
+
+    def AddMesh(self, mesh):
+        self.chunks.extend(mesh.chunks)
+        self.mirror_chunks.extend(mesh.mirror_chunks)
+        self.triangles = None
+
+    def GetTriangles(self):
+        # returns all the triangles, with the mirrored copies added and degenerate triangles removed
+        if self.triangles is None:
+            chunks = list(self.chunks)
+            for triangles in self.mirror_chunks:
+                chunks.append(triangles)
+                chunks.append(MirrorTriangles(triangles))
+            if len(chunks) == 0:
+                self.triangles = np.zeros((0, 3, 3))
+            else:
+                self.triangles = RemoveDegenerateTriangles(np.concatenate(chunks))
+        return self.triangles
+
+    def GetChunks(self):
+        # yields each array of triangles in turn, in the same order as GetTriangles gives them,
+        # so they can be written out without joining them all into one array
+        if self.triangles is not None:
+            yield self.triangles
+            return
+        for triangles in self.chunks:
+            yield RemoveDegenerateTriangles(triangles)
+        for triangles in self.mirror_chunks:
+            yield RemoveDegenerateTriangles(triangles)
+            yield RemoveDegenerateTriangles(MirrorTriangles(triangles))
+
+    def NumTriangles(self):
+        return len(self.GetTriangles())
+
+    def GetBox(self):
+        triangles = self.GetTriangles()
+        box = geom.Box3D()
+        if len(triangles) > 0:
+            pts = triangles.reshape(-1, 3)
+            minp = pts.min(axis = 0)
+            maxp = pts.max(axis = 0)
+            box.InsertBox(geom.Box3D(minp[0], minp[1], minp[2], maxp[0], maxp[1], maxp[2]))
+        return box
+
+    def AddToStl(self, stl):
+        if hasattr(stl, 'AddTriangles'):
+            # the NumPy backend's Stl takes the array as it is
+            stl.AddTriangles(self.GetTriangles())
+            return
+        for t in self.GetTriangles().reshape(-1, 9).tolist():
+            stl.Add(geom.Point3D(t[0], t[1], t[2]), geom.Point3D(t[3], t[4], t[5]), geom.Point3D(t[6], t[7], t[8]))
+
+    def ToStl(self):
+        stl = geom.Stl()
+        self.AddToStl(stl)
+        return stl
+
+def MirrorTriangles(triangles):
+    # mirror in x, swapping the first two points to keep the triangles facing outwards
+    mirrored = triangles[:, [1, 0, 2]].copy()
+    mirrored[:,:,0] *= -1.0
+    return mirrored
+
+def RemoveDegenerateTriangles(triangles):
+    # removes triangles with any two points the same
+    p0 = triangles[:,0]
+    p1 = triangles[:,1]
+    p2 = triangles[:,2]
+    degenerate = np.all(p0 == p1, axis = 1) | np.all(p1 == p2, axis = 1) | np.all(p2 == p0, axis = 1)
+    if np.any(degenerate):
+        return triangles[~degenerate]
+    return triangles
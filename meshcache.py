@@ -0,0 +1,164 @@
+# a cache on disk of the slow stages of making wings, so reopened documents and batch exports of unchanged wings
+# don't have to make them again
+# each entry is a .npz file named by a hash of everything the stage is made from, the least recently used
+# entries are deleted when the files add up to more than the maximum size
+# the sizes are added up as entries are saved, the directory is only looked through again to delete entries,
+# or after a number of saves, to count those other processes have saved
+# set WINGS_CACHE=0 to turn it off, WINGS_CACHE_DIR to move it and WINGS_CACHE_MB to change its maximum size
+
+import os
+import hashlib
+import tempfile
+import numpy as np
+from backend import geom
+from mesh import Mesh
+
+CACHE_VERSION = b'3' # change this when a change to the code makes the stages differently
+
+enabled = os.environ.get('WINGS_CACHE', '1') != '0'
+directory = os.environ.get('WINGS_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.wingdesigner', 'cache')
+max_bytes = int(float(os.environ.get('WINGS_CACHE_MB', '500')) * 1048576)
+RECOUNT_SAVES = 100 # saves between looking through the directory, when nothing needs deleting
+
+num_bytes = None # the size of the entries, when the directory was last looked through, plus those saved since
+saves_since_count = 0
+
+def GetKey(parts):
+    # returns a hex hash of a list of bytes and strings
+    h = hashlib.sha1(CACHE_VERSION)
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        h.update(str(len(part)).encode('ascii') + b':')
+        h.update(part)
+    return h.hexdigest()
+
+def GetPath(key):
+    return os.path.join(directory, key + '.npz')
+
+def Load(key):
+    # returns a dictionary of the arrays saved with the key, or None if there isn't an entry
+    if not enabled:
+        return None
+    path = GetPath(key)
+    try:
+        with np.load(path) as data:
+            arrays = dict(data)
+        os.utime(path) # it's now the most recently used
+        return arrays
+    except (IOError, OSError, ValueError):
+        return None # not there, deleted by another process, or only partly written
+
+def Save(key, arrays):
+    # saves a dictionary of arrays with the key, then deletes the oldest entries if the cache is too big
+    if not enabled:
+        return
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        # written to a temporary file first, so other processes never see a partly written entry
+        handle, temp_path = tempfile.mkstemp(suffix = '.tmp', dir = directory)
+        with os.fdopen(handle, 'wb') as f:
+            np.savez(f, **arrays)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, GetPath(key))
+        AddSaved(size)
+    except (IOError, OSError):
+        pass # the cache is only for speed, so carry on without it
+
+def AddSaved(size):
+    # counts an entry just saved, deleting the oldest entries if the cache has grown too big
+    global num_bytes
+    global saves_since_count
+    saves_since_count += 1
+    if num_bytes == None or saves_since_count >= RECOUNT_SAVES:
+        Evict()
+        return
+    num_bytes += size
+    if num_bytes > max_bytes:
+        Evict()
+
+def Evict():
+    # looks through the directory, deleting the least recently used entries until they fit
+    global num_bytes
+    global saves_since_count
+    entries = []
+    total = 0
+    for name in os.listdir(directory):
+        if not name.endswith('.npz'):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+    entries.sort()
+    for mtime, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+    num_bytes = total
+    saves_since_count = 0
+
+def Clear():
+    global num_bytes
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith('.npz'):
+                os.remove(os.path.join(directory, name))
+    num_bytes = None
+
+def JoinArrays(arrays, shape):
+    # returns the arrays joined into one, and their lengths
+    if len(arrays) == 0:
+        return np.zeros((0,) + shape), np.zeros(0, dtype = int)
+    return np.concatenate(arrays), np.array([len(a) for a in arrays], dtype = int)
+
+def SplitArray(array, lengths):
+    return np.split(array, np.cumsum(lengths)[:-1]) if len(lengths) > 0 else []
+
+def MeshToArrays(mesh, stations):
+    # a mesh, and the stations it was made from, keyed by (fraction, number of samples)
+    chunks = JoinArrays(mesh.chunks, (3, 3))[0]
+    mirror_chunks = JoinArrays(mesh.mirror_chunks, (3, 3))[0]
+    keys = list(stations.keys())
+    station_pts, station_lengths = JoinArrays([stations[key] for key in keys], (3,))
+    return {
+        'chunks': chunks,
+        'mirror_chunks': mirror_chunks,
+        'station_fractions': np.array([key[0] for key in keys], dtype = float),
+        'station_samples': np.array([key[1] for key in keys], dtype = int),
+        'station_pts': station_pts,
+        'station_lengths': station_lengths,
+        }
+
+def ArraysToMesh(arrays, stations):
+    # returns the mesh, and adds the stations to the stations dictionary
+    mesh = Mesh()
+    mesh.AddTriangles(arrays['chunks'])
+    mesh.AddTriangles(arrays['mirror_chunks'], True)
+    pts_list = SplitArray(arrays['station_pts'], arrays['station_lengths'])
+    for fraction, samples, pts in zip(arrays['station_fractions'].tolist(), arrays['station_samples'].tolist(), pts_list):
+        if (fraction, samples) not in stations:
+            stations[(fraction, samples)] = pts
+    return mesh
+
+def AreaToArrays(area, curve_points):
+    # an area of straight lines, curve_points returns a curve's points as an array
+    pts, lengths = JoinArrays([curve_points(curve) for curve in area.GetCurves()], (2,))
+    return {'pts': pts, 'lengths': lengths}
+
+def ArraysToArea(arrays):
+    area = geom.Area()
+    for pts in SplitArray(arrays['pts'], arrays['lengths']):
+        curve = geom.Curve()
+        for p in pts.tolist():
+            curve.Append(geom.Point(p[0], p[1]))
+        area.Append(curve)
+    return area
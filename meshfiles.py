@@ -0,0 +1,120 @@
+# writes triangles to mesh files, chosen by the file's extension
+# STL files are streamed by stlwriter, OBJ, PLY and 3MF files are written with each point once, and triangles of indices
+
+import os
+import time
+import zipfile
+import numpy as np
+import stlwriter
+
+FORMATS = ['stl', 'obj', 'ply', '3mf']
+
+class WrittenFile:
+    # what was written to a file, with the same counts as stlwriter.StlWriter
+    def __init__(self, path, num_triangles, seconds):
+        self.path = path
+        self.num_triangles = num_triangles
+        self.num_bytes = os.path.getsize(path)
+        self.seconds = seconds
+
+def GetFormat(path):
+    # returns one of FORMATS, STL for an unknown extension
+    extension = os.path.splitext(path)[1].lower()[1:]
+    if extension in FORMATS:
+        return extension
+    return 'stl'
+
+def WriteTriangles(path, blocks):
+    # writes arrays of triangles, of shape (n, 3, 3), to a file, returns a WrittenFile or StlWriter
+    if GetFormat(path) == 'stl':
+        with stlwriter.StlWriter(path) as writer:
+            for triangles in blocks:
+                writer.AddTriangles(triangles)
+        return writer
+    vertices, faces = WeldBlocks(blocks)
+    return WriteIndexed(path, vertices, faces)
+
+def WriteIndexed(path, vertices, faces):
+    start = time.perf_counter()
+    format = GetFormat(path)
+    if format == 'obj':
+        WriteObj(path, vertices, faces)
+    elif format == 'ply':
+        WritePly(path, vertices, faces)
+    elif format == '3mf':
+        Write3mf(path, vertices, faces)
+    else:
+        stlwriter.WriteStl(path, vertices[faces])
+    return WrittenFile(path, len(faces), time.perf_counter() - start)
+
+def WeldTriangles(triangles):
+    # returns an array of the different points, of shape (n, 3), and the triangles as indices into it, of shape (m, 3)
+    # only points which are exactly the same are joined, like those of neighbouring stations
+    pts = np.asarray(triangles, dtype = float).reshape(-1, 3) + 0.0 # turns -0.0 into 0.0, so mirrored points on x = 0 match
+    vertices, indices = np.unique(pts, axis = 0, return_inverse = True)
+    return vertices, indices.reshape(-1, 3)
+
+def WeldBlocks(blocks):
+    # welds each block on its own, to keep the arrays small, then welds the blocks' points together
+    all_vertices = []
+    all_faces = []
+    num_vertices = 0
+    for triangles in blocks:
+        if len(triangles) == 0:
+            continue
+        vertices, faces = WeldTriangles(triangles)
+        all_vertices.append(vertices)
+        all_faces.append(faces + num_vertices)
+        num_vertices += len(vertices)
+    if len(all_vertices) == 0:
+        return np.zeros((0, 3)), np.zeros((0, 3), dtype = int)
+    if len(all_vertices) == 1:
+        return all_vertices[0], all_faces[0]
+    vertices, indices = np.unique(np.concatenate(all_vertices), axis = 0, return_inverse = True)
+    return vertices, indices.reshape(-1)[np.concatenate(all_faces)]
+
+def WriteObj(path, vertices, faces):
+    f = open(path, 'w')
+    f.write('# Wing Designer\n')
+    np.savetxt(f, vertices, fmt = 'v %.6f %.6f %.6f')
+    np.savetxt(f, faces + 1, fmt = 'f %d %d %d')
+    f.close()
+
+def WritePly(path, vertices, faces):
+    records = np.empty(len(faces), dtype = [('count', 'u1'), ('indices', '<u4', 3)])
+    records['count'] = 3
+    records['indices'] = faces
+    f = open(path, 'wb')
+    f.write(('ply\nformat binary_little_endian 1.0\ncomment Wing Designer\n'
+        'element vertex %d\nproperty float x\nproperty float y\nproperty float z\n'
+        'element face %d\nproperty list uchar uint vertex_indices\nend_header\n' % (len(vertices), len(faces))).encode('ascii'))
+    f.write(vertices.astype('<f4').tobytes())
+    f.write(records.tobytes())
+    f.close()
+
+CONTENT_TYPES_3MF = '''<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>
+</Types>
+'''
+
+RELS_3MF = '''<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>
+</Relationships>
+'''
+
+def Write3mf(path, vertices, faces):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+        '<model unit="millimeter" xml:lang="en-US" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">',
+        '<resources>', '<object id="1" type="model">', '<mesh>', '<vertices>']
+    lines.extend(['<vertex x="%.6f" y="%.6f" z="%.6f"/>' % tuple(v) for v in vertices.tolist()])
+    lines.extend(['</vertices>', '<triangles>'])
+    lines.extend(['<triangle v1="%d" v2="%d" v3="%d"/>' % tuple(t) for t in faces.tolist()])
+    lines.extend(['</triangles>', '</mesh>', '</object>', '</resources>', '<build>', '<item objectid="1"/>', '</build>', '</model>', ''])
+    z = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+    z.writestr('[Content_Types].xml', CONTENT_TYPES_3MF)
+    z.writestr('_rels/.rels', RELS_3MF)
+    z.writestr('3D/3dmodel.model', '\n'.join(lines))
+    z.close()
@@ -0,0 +1,180 @@
+# a stand-in for the parts of PyCAD's cad and Object modules which Wing uses
+# sketches are kept here in memory, made from arrays of points, and drawing does nothing
+
+import npgeom
+
+PROPERTY_TYPE_INVALID = 0
+PROPERTY_TYPE_STRING = 1
+PROPERTY_TYPE_DOUBLE = 2
+PROPERTY_TYPE_LENGTH = 3
+PROPERTY_TYPE_INT = 4
+PROPERTY_TYPE_CHOICE = 5
+PROPERTY_TYPE_COLOR = 6
+PROPERTY_TYPE_CHECK = 7
+
+OBJECT_TYPE_SKETCH = 1
+
+object_types = {} # type: create function
+objects = {} # (type, id): object
+next_id = 1
+xml_values = {} # name: value, written by SetXmlValue and read by the GetXml functions
+
+class Color:
+    def __init__(self, r = 0, g = None, b = None):
+        if g == None:
+            self.r = r & 0xff
+            self.g = (r >> 8) & 0xff
+            self.b = (r >> 16) & 0xff
+        else:
+            self.r = r
+            self.g = g
+            self.b = b
+
+    def ref(self):
+        return self.r | (self.g << 8) | (self.b << 16)
+
+class Material:
+    def __init__(self, color):
+        self.color = color
+
+    def glMaterial(self, opacity):
+        pass
+
+class Property:
+    def __init__(self, type = PROPERTY_TYPE_INVALID, title = '', object = None):
+        self.type = type
+        self.title = title
+        self.object = object
+
+    def GetType(self):
+        return self.type
+
+    def GetTitle(self):
+        return self.title
+
+class Sketch:
+    def __init__(self, pts):
+        self.id = 0
+        self.stamp = 0 # changed whenever the area is, see GetStamp
+        self.area = npgeom.Area()
+        curve = npgeom.Curve()
+        for p in pts:
+            curve.Append(npgeom.Point(p[0], p[1]))
+        self.area.Append(curve)
+
+    def GetType(self):
+        return OBJECT_TYPE_SKETCH
+
+    def GetID(self):
+        return self.id
+
+    def GetArea(self):
+        return npgeom.Area(self.area)
+
+    def SetArea(self, area):
+        self.area = npgeom.Area(area)
+        self.stamp += 1
+
+    def GetStamp(self):
+        # a stand-in extra, tells the wing whether the sketch has changed without reading its area
+        return self.stamp
+
+def NewSketch(pts):
+    # a stand-in extra, adds a sketch of lines through the points, returns its id
+    global next_id
+    sketch = Sketch(pts)
+    sketch.id = next_id
+    next_id += 1
+    objects[(OBJECT_TYPE_SKETCH, sketch.id)] = sketch
+    return sketch.id
+
+def NewSketchFromArea(area):
+    # returns a new sketch of the area's curves
+    global next_id
+    sketch = Sketch([])
+    sketch.SetArea(area)
+    sketch.id = next_id
+    next_id += 1
+    objects[(OBJECT_TYPE_SKETCH, sketch.id)] = sketch
+    return sketch
+
+def GetObjectFromId(type, id):
+    return objects.get((type, id))
+
+def RegisterObjectType(name, create_function):
+    type = 100 + len(object_types)
+    object_types[type] = create_function
+    return type
+
+def AddUndoably(object, owner = None, prev_object = None):
+    pass
+
+
+def SetXmlValue(name, value):
+    xml_values[name] = value
+
+def GetXmlValue(name, default = ''):
+    return str(xml_values.get(name, default))
+
+def GetXmlInt(name, default = 0):
+    return int(xml_values.get(name, default))
+
+def GetXmlFloat(name, default = 0.0):
+    return float(xml_values.get(name, default))
+
+def GetXmlBool(name, default = False):
+    return bool(xml_values.get(name, default))
+
+def DrawTriangle(x0, y0, z0, x1, y1, z1, x2, y2, z2):
+    pass
+
+def DrawNewList():
+    return 1
+
+def DrawEndList():
+    pass
+
+def DrawCallList(draw_list):
+    pass
+
+def DrawDeleteList(draw_list):
+    pass
+
+def DrawEnableLighting():
+    pass
+
+def DrawDisableLighting():
+    pass
+
+def EndLinesOrTriangles():
+    pass
+
+def Repaint():
+    pass
+
+class Object:
+    def __init__(self, id_group_type = 0):
+        self.triangles = [] # from AddTriangle
+
+    def AddTriangle(self, x0, y0, z0, x1, y1, z1, x2, y2, z2):
+        self.triangles.append((x0, y0, z0, x1, y1, z1, x2, y2, z2))
+
+    def AddTool(self, title, method):
+        pass
+
+    def ReadXml(self):
+        pass
+
+class PyProperty(Property):
+    def __init__(self, title, name, object, recalculate = None):
+        Property.__init__(self, PROPERTY_TYPE_INVALID, title, object)
+        self.name = name
+        self.recalculate = recalculate
+
+    def GetValue(self):
+        return getattr(self.object, self.name)
+
+    def SetValue(self, value):
+        setattr(self.object, self.name, value)
+        if self.recalculate:
+            self.recalculate()
@@ -0,0 +1,516 @@
+# a NumPy stand-in for the subset of PyCAD's geom module which Wing uses
+# so wings can be made, timed and tested without PyCAD, wx or OpenGL
+# curves are made only of lines, arcs are treated as lines to their end points,
+# and the area booleans only work on simple polygons, those which aren't convex are split into triangles
+
+import math
+import struct
+import numpy as np
+import polygons
+
+TOLERANCE = 0.000001
+
+class Point:
+    def __init__(self, x = 0.0, y = 0.0):
+        self.x = float(x)
+        self.y = float(y)
+
+    def __add__(self, p):
+        return Point(self.x + p.x, self.y + p.y)
+
+    def __sub__(self, p):
+        return Point(self.x - p.x, self.y - p.y)
+
+    def __mul__(self, value):
+        return Point(self.x * value, self.y * value)
+
+    def __invert__(self):
+        # the point turned 90 degrees anti-clockwise
+        return Point(-self.y, self.x)
+
+    def __eq__(self, p):
+        return isinstance(p, Point) and math.fabs(self.x - p.x) < TOLERANCE and math.fabs(self.y - p.y) < TOLERANCE
+
+    def __ne__(self, p):
+        return not self.__eq__(p)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Point(' + str(self.x) + ', ' + str(self.y) + ')'
+
+    def Dist(self, p):
+        return math.hypot(self.x - p.x, self.y - p.y)
+
+    def Length(self):
+        return math.hypot(self.x, self.y)
+
+    def Normalize(self):
+        length = self.Length()
+        if length > 0.0:
+            self.x /= length
+            self.y /= length
+
+    def Rotate(self, angle):
+        c = math.cos(angle)
+        s = math.sin(angle)
+        self.x, self.y = self.x * c - self.y * s, self.x * s + self.y * c
+
+    def Transform(self, matrix):
+        x, y, z = matrix.TransformPoint(self.x, self.y, 0.0)
+        self.x = x
+        self.y = y
+
+class Point3D:
+    def __init__(self, x = 0.0, y = 0.0, z = 0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    def __eq__(self, p):
+        return isinstance(p, Point3D) and math.fabs(self.x - p.x) < TOLERANCE and math.fabs(self.y - p.y) < TOLERANCE and math.fabs(self.z - p.z) < TOLERANCE
+
+    def __ne__(self, p):
+        return not self.__eq__(p)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Point3D(' + str(self.x) + ', ' + str(self.y) + ', ' + str(self.z) + ')'
+
+class Vertex:
+    def __init__(self, p, type = 0, c = None):
+        self.type = type
+        self.p = Point(p.x, p.y)
+        self.c = Point(0.0, 0.0) if c == None else Point(c.x, c.y)
+
+class Span:
+    def __init__(self, p, v, start_span = False):
+        self.p = p
+        self.v = v
+        self.start_span = start_span
+
+    def Length(self):
+        return self.p.Dist(self.v.p)
+
+    def MidPerim(self, d):
+        length = self.Length()
+        if length <= 0.0:
+            return Point(self.p.x, self.p.y)
+        return self.p + (self.v.p - self.p) * (d / length)
+
+class Box:
+    def __init__(self, minxy = None, maxxy = None):
+        self.minxy = Point(minxy.x, minxy.y) if minxy != None else Point(0.0, 0.0)
+        self.maxxy = Point(maxxy.x, maxxy.y) if maxxy != None else Point(0.0, 0.0)
+
+    def MinX(self): return self.minxy.x
+    def MinY(self): return self.minxy.y
+    def MaxX(self): return self.maxxy.x
+    def MaxY(self): return self.maxxy.y
+    def Width(self): return self.maxxy.x - self.minxy.x
+    def Height(self): return self.maxxy.y - self.minxy.y
+
+class Box3D:
+    def __init__(self, minx = None, miny = 0.0, minz = 0.0, maxx = 0.0, maxy = 0.0, maxz = 0.0):
+        if minx == None:
+            self.valid = False
+            self.min = [0.0, 0.0, 0.0]
+            self.max = [0.0, 0.0, 0.0]
+        else:
+            self.valid = True
+            self.min = [float(minx), float(miny), float(minz)]
+            self.max = [float(maxx), float(maxy), float(maxz)]
+
+    def InsertPoint(self, x, y, z):
+        if self.valid:
+            self.min = [min(self.min[0], x), min(self.min[1], y), min(self.min[2], z)]
+            self.max = [max(self.max[0], x), max(self.max[1], y), max(self.max[2], z)]
+        else:
+            self.valid = True
+            self.min = [float(x), float(y), float(z)]
+            self.max = [float(x), float(y), float(z)]
+
+    def InsertBox(self, box):
+        if box.valid:
+            self.InsertPoint(box.min[0], box.min[1], box.min[2])
+            self.InsertPoint(box.max[0], box.max[1], box.max[2])
+
+    def MinX(self): return self.min[0]
+    def MinY(self): return self.min[1]
+    def MinZ(self): return self.min[2]
+    def MaxX(self): return self.max[0]
+    def MaxY(self): return self.max[1]
+    def MaxZ(self): return self.max[2]
+    def Width(self): return self.max[0] - self.min[0]
+    def Height(self): return self.max[1] - self.min[1]
+    def Depth(self): return self.max[2] - self.min[2]
+
+class Matrix:
+    def __init__(self, o = None, vx = None, vy = None):
+        self.m = np.identity(4)
+        if o != None:
+            vz = np.cross((vx.x, vx.y, vx.z), (vy.x, vy.y, vy.z))
+            self.m[:3,0] = (vx.x, vx.y, vx.z)
+            self.m[:3,1] = (vy.x, vy.y, vy.z)
+            self.m[:3,2] = vz
+            self.m[:3,3] = (o.x, o.y, o.z)
+
+    def Inverse(self):
+        inverse = Matrix()
+        inverse.m = np.linalg.inv(self.m)
+        return inverse
+
+    def TransformPoint(self, x, y, z):
+        p = self.m @ (x, y, z, 1.0)
+        return p[0], p[1], p[2]
+
+class Curve:
+    def __init__(self, curve = None):
+        self.vertices = []
+        if curve != None:
+            for v in curve.vertices:
+                self.vertices.append(Vertex(v.p, v.type, v.c))
+
+    def Append(self, p):
+        if isinstance(p, Vertex):
+            self.vertices.append(Vertex(p.p, p.type, p.c))
+        else:
+            self.vertices.append(Vertex(p))
+
+    def GetVertices(self):
+        return list(self.vertices)
+
+    def NumVertices(self):
+        return len(self.vertices)
+
+    def FirstVertex(self):
+        return self.vertices[0]
+
+    def LastVertex(self):
+        return self.vertices[-1]
+
+    def GetSpans(self):
+        spans = []
+        for i in range(1, len(self.vertices)):
+            spans.append(Span(self.vertices[i - 1].p, self.vertices[i], i == 1))
+        return spans
+
+    def Reverse(self):
+        self.vertices.reverse()
+
+    def GetPoints(self):
+        # returns an array of the curve's points
+        return np.array([(v.p.x, v.p.y) for v in self.vertices], dtype = float).reshape(-1, 2)
+
+    def GetArea(self):
+        # anti-clockwise curves have a positive area
+        return PolygonArea(self.GetPoints())
+
+    def Perim(self):
+        pts = self.GetPoints()
+        return float(np.hypot(*np.diff(pts, axis = 0).T).sum()) if len(pts) > 1 else 0.0
+
+    def PerimToPoint(self, perim):
+        pts = self.GetPoints()
+        d = 0.0
+        for i in range(1, len(pts)):
+            length = math.hypot(*(pts[i] - pts[i - 1]))
+            if d + length >= perim and length > 0.0:
+                p = pts[i - 1] + (pts[i] - pts[i - 1]) * ((perim - d) / length)
+                return Point(p[0], p[1])
+            d += length
+        return Point(pts[-1][0], pts[-1][1])
+
+    def GetBox(self):
+        pts = self.GetPoints()
+        minp = pts.min(axis = 0)
+        maxp = pts.max(axis = 0)
+        return Box(Point(minp[0], minp[1]), Point(maxp[0], maxp[1]))
+
+    def Intersections(self, curve):
+        # returns a list of the points where the curves cross, in order along this curve
+        a = self.GetPoints()
+        b = curve.GetPoints()
+        if len(a) < 2 or len(b) < 2:
+            return []
+        p = a[:-1][:,None]
+        r = (a[1:] - a[:-1])[:,None]
+        q = b[:-1][None,:]
+        s = (b[1:] - b[:-1])[None,:]
+        denominator = r[...,0] * s[...,1] - r[...,1] * s[...,0]
+        qp = q - p
+        parallel = np.fabs(denominator) < 1e-15
+        denominator = np.where(parallel, 1.0, denominator)
+        t = (qp[...,0] * s[...,1] - qp[...,1] * s[...,0]) / denominator
+        u = (qp[...,0] * r[...,1] - qp[...,1] * r[...,0]) / denominator
+        hit = (~parallel) & (t >= -1e-12) & (t <= 1.0 + 1e-12) & (u >= -1e-12) & (u <= 1.0 + 1e-12)
+        i, j = np.nonzero(hit)
+        order = np.lexsort((t[i, j], i))
+        pts = []
+        for k in order:
+            x, y = (p[i[k], 0] + r[i[k], 0] * t[i[k], j[k]])
+            point = Point(x, y)
+            if len(pts) == 0 or pts[-1] != point:
+                pts.append(point)
+        return pts
+
+class Area:
+    def __init__(self, area = None):
+        self.curves = []
+        if area != None:
+            for curve in area.curves:
+                self.curves.append(Curve(curve))
+
+    def Append(self, curve):
+        self.curves.append(Curve(curve))
+
+    def GetCurves(self):
+        return list(self.curves)
+
+    def NumCurves(self):
+        return len(self.curves)
+
+    def GetArea(self):
+        total = 0.0
+        for curve in self.curves:
+            total += curve.GetArea()
+        return total
+
+    def GetBox(self):
+        box = None
+        for curve in self.curves:
+            curve_box = curve.GetBox()
+            if box == None:
+                box = curve_box
+            else:
+                box = Box(Point(min(box.MinX(), curve_box.MinX()), min(box.MinY(), curve_box.MinY())), Point(max(box.MaxX(), curve_box.MaxX()), max(box.MaxY(), curve_box.MaxY())))
+        return box
+
+    def Intersect(self, area):
+        result = []
+        for c in self.curves:
+            cp = OpenPolygon(c.GetPoints())
+            for d in area.curves:
+                dp = OpenPolygon(d.GetPoints())
+                if IsConvex(dp):
+                    pieces = [ClipPolygon(cp, dp)]
+                elif IsConvex(cp):
+                    pieces = [ClipPolygon(dp, cp)]
+                else:
+                    pieces = [ClipPolygon(cp, convex) for convex in ConvexPieces(dp)]
+                for clipped in pieces:
+                    if len(clipped) > 2 and math.fabs(PolygonArea(clipped)) > TOLERANCE:
+                        result.append(clipped)
+        self.curves = [CurveFromPolygon(pts) for pts in result]
+
+    def Subtract(self, area):
+        result = []
+        for c in self.curves:
+            pieces = [OpenPolygon(c.GetPoints())]
+            for d in area.curves:
+                for convex in ConvexPieces(OpenPolygon(d.GetPoints())):
+                    new_pieces = []
+                    for piece in pieces:
+                        new_pieces += SubtractConvexPolygon(piece, convex)
+                    pieces = new_pieces
+            result += pieces
+        self.curves = [CurveFromPolygon(pts) for pts in result]
+
+    def Offset(self, inwards_value):
+        # moves each curve's edges inwards, or outwards for a negative value, with mitred corners
+        curves = []
+        for curve in self.curves:
+            pts = OffsetPolygon(OpenPolygon(curve.GetPoints()), inwards_value)
+            if len(pts) > 2:
+                curves.append(CurveFromPolygon(pts))
+        self.curves = curves
+
+    def WriteDxf(self, filepath):
+        f = open(filepath, 'w')
+        f.write('0\nSECTION\n2\nENTITIES\n')
+        for curve in self.curves:
+            pts = curve.GetPoints()
+            for i in range(1, len(pts)):
+                f.write('0\nLINE\n8\n0\n10\n%f\n20\n%f\n30\n0.0\n11\n%f\n21\n%f\n31\n0.0\n' % (pts[i - 1][0], pts[i - 1][1], pts[i][0], pts[i][1]))
+        f.write('0\nENDSEC\n0\nEOF\n')
+        f.close()
+
+class Stl:
+    def __init__(self):
+        self.chunks = []
+        self.triangles = []
+
+    def Add(self, p0, p1, p2):
+        self.triangles.append((p0.x, p0.y, p0.z, p1.x, p1.y, p1.z, p2.x, p2.y, p2.z))
+
+    def AddTriangles(self, triangles):
+        # a stand-in extra, adds an array of shape (n, 3, 3)
+        self.chunks.append(np.asarray(triangles, dtype = float).reshape(-1, 3, 3))
+
+    def GetTriangles(self):
+        # a stand-in extra, returns all the triangles as an array of shape (n, 3, 3)
+        if len(self.triangles) > 0:
+            self.chunks.append(np.array(self.triangles, dtype = float).reshape(-1, 3, 3))
+            self.triangles = []
+        if len(self.chunks) == 0:
+            return np.zeros((0, 3, 3))
+        if len(self.chunks) > 1:
+            self.chunks = [np.concatenate(self.chunks)]
+        return self.chunks[0]
+
+    def NumTriangles(self):
+        return len(self.GetTriangles())
+
+    def GetBox(self):
+        box = Box3D()
+        triangles = self.GetTriangles()
+        if len(triangles) > 0:
+            pts = triangles.reshape(-1, 3)
+            minp = pts.min(axis = 0)
+            maxp = pts.max(axis = 0)
+            box.InsertBox(Box3D(minp[0], minp[1], minp[2], maxp[0], maxp[1], maxp[2]))
+        return box
+
+    def Shadow(self, matrix, unused = True):
+        # the outline of the solid seen from above
+        # made from the lowest and highest y of the points at each x, so it is only right for solids,
+        # like wings, which are convex across y and have all their points in lines across y
+        area = Area()
+        pts = self.GetTriangles().reshape(-1, 3)
+        if len(pts) == 0:
+            return area
+        xs = np.round(pts[:,0] / TOLERANCE) * TOLERANCE
+        order = np.argsort(xs, kind = 'stable')
+        xs = xs[order]
+        ys = pts[order, 1]
+        starts = np.concatenate(([0], np.nonzero(np.diff(xs) > 0.0)[0] + 1))
+        column_x = xs[starts]
+        miny = np.minimum.reduceat(ys, starts)
+        maxy = np.maximum.reduceat(ys, starts)
+        outline = np.concatenate((np.stack((column_x, miny), axis = 1), np.stack((column_x, maxy), axis = 1)[::-1]))
+        area.curves.append(CurveFromPolygon(RemoveRepeatedPoints(outline)))
+        return area
+
+    def WriteStl(self, filepath):
+        triangles = self.GetTriangles().astype(np.float32)
+        normals = np.cross(triangles[:,1] - triangles[:,0], triangles[:,2] - triangles[:,0])
+        lengths = np.linalg.norm(normals, axis = 1)
+        normals = np.divide(normals, lengths[:,None], out = np.zeros_like(normals), where = lengths[:,None] > 0.0)
+        records = np.zeros(len(triangles), dtype = [('normal', '<f4', 3), ('points', '<f4', (3, 3)), ('attribute', '<u2')])
+        records['normal'] = normals
+        records['points'] = triangles
+        f = open(filepath, 'wb')
+        f.write(b'binary STL from npgeom'.ljust(80, b' '))
+        f.write(struct.pack('<I', len(triangles)))
+        f.write(records.tobytes())
+        f.close()
+
+def PolygonArea(pts):
+    if len(pts) < 3:
+        return 0.0
+    x = pts[:,0]
+    y = pts[:,1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+def OpenPolygon(pts):
+    # returns the points without the closing point
+    if len(pts) > 1 and np.allclose(pts[0], pts[-1], atol = TOLERANCE):
+        return pts[:-1]
+    return pts
+
+def CurveFromPolygon(pts):
+    curve = Curve()
+    for p in pts:
+        curve.Append(Point(p[0], p[1]))
+    if len(pts) > 0:
+        curve.Append(Point(pts[0][0], pts[0][1]))
+    return curve
+
+def RemoveRepeatedPoints(pts):
+    if len(pts) < 2:
+        return pts
+    keep = np.concatenate(([True], np.any(np.fabs(np.diff(pts, axis = 0)) > TOLERANCE, axis = 1)))
+    return pts[keep]
+
+def IsConvex(pts):
+    if len(pts) < 4:
+        return True
+    d0 = np.roll(pts, -1, axis = 0) - pts
+    d1 = np.roll(d0, -1, axis = 0)
+    cross = d0[:,0] * d1[:,1] - d0[:,1] * d1[:,0]
+    return bool(np.all(cross >= -TOLERANCE) or np.all(cross <= TOLERANCE))
+
+def ConvexPieces(pts):
+    # returns a list of convex polygons making up the polygon, itself if it's convex, else its triangles
+    if IsConvex(pts):
+        return [pts]
+    pieces = []
+    for triangle in polygons.Triangulate(pts):
+        if math.fabs(PolygonArea(pts[triangle])) > TOLERANCE:
+            pieces.append(pts[triangle])
+    return pieces
+
+def ClipToHalfPlane(pts, a, b, keep_left):
+    # Sutherland-Hodgman clip of a polygon to one side of the line through a and b
+    if len(pts) == 0:
+        return pts
+    side = (b[0] - a[0]) * (pts[:,1] - a[1]) - (b[1] - a[1]) * (pts[:,0] - a[0])
+    if not keep_left:
+        side = -side
+    inside = side >= 0.0
+    if np.all(inside):
+        return pts
+    if not np.any(inside):
+        return pts[:0]
+    result = []
+    n = len(pts)
+    for i in range(0, n):
+        j = (i + 1) % n
+        if inside[i]:
+            result.append(pts[i])
+        if inside[i] != inside[j]:
+            t = side[i] / (side[i] - side[j])
+            result.append(pts[i] + (pts[j] - pts[i]) * t)
+    return np.array(result).reshape(-1, 2)
+
+def ClipPolygon(pts, convex):
+    # returns the part of a polygon inside a convex polygon
+    left = PolygonArea(convex) > 0.0
+    n = len(convex)
+    for i in range(0, n):
+        pts = ClipToHalfPlane(pts, convex[i], convex[(i + 1) % n], left)
+    return pts
+
+def SubtractConvexPolygon(pts, convex):
+    # returns a list of the pieces of a polygon outside a convex polygon
+    left = PolygonArea(convex) > 0.0
+    pieces = []
+    remaining = pts
+    n = len(convex)
+    for i in range(0, n):
+        a = convex[i]
+        b = convex[(i + 1) % n]
+        outside = ClipToHalfPlane(remaining, a, b, not left)
+        if len(outside) > 2 and math.fabs(PolygonArea(outside)) > TOLERANCE:
+            pieces.append(outside)
+        remaining = ClipToHalfPlane(remaining, a, b, left)
+        if len(remaining) < 3:
+            break
+    return pieces
+
+def OffsetPolygon(pts, inwards_value):
+    n = len(pts)
+    if n < 3:
+        return pts
+    if PolygonArea(pts) < 0.0:
+        inwards_value = -inwards_value
+    d = np.roll(pts, -1, axis = 0) - pts
+    lengths = np.hypot(d[:,0], d[:,1])
+    lengths[lengths == 0.0] = 1.0
+    normals = np.stack((-d[:,1], d[:,0]), axis = 1) / lengths[:,None] # left of each edge, inwards for anti-clockwise
+    prev_normals = np.roll(normals, 1, axis = 0)
+    bisectors = normals + prev_normals
+    dots = np.sum(bisectors * normals, axis = 1)
+    dots = np.maximum(dots, 0.5) # limit the length of the mitres
+    return pts + bisectors * (inwards_value / dots)[:,None]
@@ -0,0 +1,154 @@
+# triangulates polygons, for filling the cuts of pieces, holes in meshes and the end faces of wings,
+# and splitting polygons into convex pieces, and clips many convex polygons at once to a convex polygon,
+# only NumPy is used, so the geometry stand-ins can use it too
+
+import numpy as np
+
+def Triangulate(pts):
+    # ear clipping, returns an array of indices into pts of shape (n, 3), going the same way round as the polygon
+    # no triangle has zero area, points on straight edges are kept as corners of the triangles either side of them,
+    # so the triangles' edges match the polygon's edges one for one, and spikes, going out and back along the same line, are left out
+    pts = np.asarray(pts, dtype = float)
+    remaining = RemoveSpikes(pts)
+    if len(remaining) < 3:
+        return np.zeros((0, 3), dtype = int)
+    x = pts[remaining,0]
+    y = pts[remaining,1]
+    sign = 1.0 if np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)) >= 0.0 else -1.0
+    triangles = []
+    i = 0
+    failures = 0
+    while len(remaining) > 3:
+        m = len(remaining)
+        a = remaining[(i - 1) % m]
+        b = remaining[i % m]
+        c = remaining[(i + 1) % m]
+        if IsEar(pts, remaining, a, b, c, sign):
+            triangles.append((a, b, c))
+            remaining.pop(i % m)
+            failures = 0
+            continue
+        i += 1
+        failures += 1
+        if failures >= m:
+            # no ears, as points only rounding apart make the polygon cross itself, so the least reflex corner is cut off
+            i = GetLeastReflexCorner(pts, remaining, sign)
+            if i == None:
+                break
+            triangles.append((remaining[i - 1], remaining[i], remaining[(i + 1) % m]))
+            remaining.pop(i)
+            failures = 0
+    if len(remaining) == 3 and TriangleCross(pts[remaining[0]], pts[remaining[1]], pts[remaining[2]]) != 0.0:
+        triangles.append(tuple(remaining))
+    return StartAtLongestEdge(pts, np.array(triangles, dtype = int).reshape(-1, 3))
+
+def StartAtLongestEdge(pts, triangles):
+    # turns each triangle round, keeping its direction, to start at the corner opposite its longest edge,
+    # so normals worked out from the first corner, as slicers do, don't round a thin triangle's to nothing
+    if len(triangles) == 0:
+        return triangles
+    t = pts[triangles]
+    lengths = np.stack([((t[:,(i + 2) % 3] - t[:,(i + 1) % 3])**2).sum(axis = 1) for i in range(0, 3)], axis = 1)
+    first = np.argmax(lengths, axis = 1)
+    return np.take_along_axis(triangles, (first[:,None] + np.arange(3)) % 3, axis = 1)
+
+def RemoveZeroLengthEdges(pts):
+    keep = np.any(pts != np.roll(pts, 1, axis = 0), axis = 1)
+    return pts[keep]
+
+def RemoveSpikes(pts):
+    # returns a list of the indices of the points, without repeated points, nor the tips of spikes,
+    # whose two edges are the same edge both ways round, so need no triangles to join them up
+    keys = [tuple(p) for p in pts.tolist()]
+    remaining = []
+    for i in range(0, len(keys)):
+        if len(remaining) > 0 and keys[remaining[-1]] == keys[i]:
+            continue
+        if len(remaining) > 1 and keys[remaining[-2]] == keys[i]:
+            remaining.pop() # back to where the spike started
+            continue
+        remaining.append(i)
+    # and the same where the loop joins up
+    changed = True
+    while changed and len(remaining) > 2:
+        changed = False
+        if keys[remaining[0]] == keys[remaining[-1]]:
+            remaining.pop()
+            changed = True
+        elif keys[remaining[-2]] == keys[remaining[0]]:
+            remaining.pop()
+            remaining.pop()
+            changed = True
+        elif keys[remaining[-1]] == keys[remaining[1]]:
+            remaining.pop(0)
+            remaining.pop(0)
+            changed = True
+    return remaining if len(remaining) > 2 else []
+
+def GetLeastReflexCorner(pts, remaining, sign):
+    # returns the index into remaining of the corner turning most the polygon's way, which isn't straight, or None
+    p = pts[remaining]
+    cross = np.array([TriangleCross(a, b, c) for a, b, c in zip(np.roll(p, 1, axis = 0), p, np.roll(p, -1, axis = 0))]) * sign
+    cross[cross == 0.0] = -np.inf
+    i = int(np.argmax(cross))
+    return None if cross[i] == -np.inf else i
+
+def IsEar(pts, remaining, a, b, c, sign):
+    pa = pts[a]
+    pb = pts[b]
+    pc = pts[c]
+    if TriangleCross(pa, pb, pc) * sign <= 0.0:
+        return False # a reflex corner, or a straight one, whose triangle would have no area
+    others = pts[[r for r in remaining if r != a and r != b and r != c]]
+    others = others[np.any(others != pa, axis = 1) & np.any(others != pb, axis = 1) & np.any(others != pc, axis = 1)]
+    if len(others) == 0:
+        return True
+    # no other corner inside the triangle, nor on its edges, such as on a straight edge the new edge from a to c would cut short
+    d0 = Cross(pa, pb, others) * sign
+    d1 = Cross(pb, pc, others) * sign
+    d2 = Cross(pc, pa, others) * sign
+    return not np.any((d0 >= 0.0) & (d1 >= 0.0) & (d2 >= 0.0))
+
+def TriangleCross(a, b, c):
+    # Cross of the triangle's three points, worked out from the corner opposite its longest edge,
+    # which doesn't lose a thin triangle's area to rounding, as points only rounding apart make
+    la = np.dot(c - b, c - b)
+    lb = np.dot(a - c, a - c)
+    lc = np.dot(b - a, b - a)
+    if la >= lb and la >= lc:
+        return Cross(a, b, c)
+    if lb >= lc:
+        return Cross(b, c, a)
+    return Cross(c, a, b)
+
+def ClipConvex(polys, counts, clips):
+    # clips convex polygons, an array of shape (n, m, 2), of which the first counts[i] points of each are used,
+    # each to its own convex polygon, of an array of shape (n, k, 2), going anticlockwise,
+    # returns the clipped polygons and their counts the same way
+    for a, b in zip(np.moveaxis(clips, 1, 0), np.moveaxis(np.roll(clips, -1, axis = 1), 1, 0)):
+        polys, counts = ClipHalfPlane(polys, counts, a, b)
+    return polys, counts
+
+def ClipHalfPlane(polys, counts, a, b):
+    # keeps the parts of the polygons to the left of the lines from a to b, arrays of shape (n, 2),
+    # each edge crossing its line adds a point, so a convex polygon gets at most one more point
+    n, m = polys.shape[:2]
+    i = np.arange(m)
+    used = i < counts[:,None]
+    following = np.where(i + 1 < counts[:,None], i + 1, 0)
+    d = Cross(a.T[:,:,None], b.T[:,:,None], polys)
+    d_following = np.take_along_axis(d, following, axis = 1)
+    inside = d >= 0.0
+    crossing = used & (inside != (d_following >= 0.0))
+    t = d / np.where(crossing, d - d_following, 1.0)
+    cut = polys + (np.take_along_axis(polys, following[:,:,None], axis = 1) - polys) * t[:,:,None]
+    # each point, if it's kept, then where the edge after it crosses the line, if it does
+    pts = np.stack((polys, cut), axis = 2).reshape(n, m * 2, 2)
+    keep = np.stack((used & inside, crossing), axis = 2).reshape(n, m * 2)
+    order = np.argsort(~keep, axis = 1, kind = 'stable')[:, :m + 1]
+    return np.take_along_axis(pts, order[:,:,None], axis = 1), keep.sum(axis = 1)
+
+def Cross(a, b, c):
+    # the z of the cross product of b - a and c - a, c can be an array of points
+    c = np.asarray(c)
+    return (b[0] - a[0]) * (c[...,1] - a[1]) - (b[1] - a[1]) * (c[...,0] - a[0])
@@ -0,0 +1,154 @@
+# opt-in timers and counters for finding where the time goes when a wing is remade
+# set WINGS_PROFILE=1 to turn them on, WINGS_PROFILE=cprofile to also capture cProfile statistics,
+# and WINGS_PROFILE_LOG to a file path to have each report appended to it
+
+import os
+import io
+import time
+import threading
+import cProfile
+import pstats
+
+setting = os.environ.get('WINGS_PROFILE', '')
+enabled = setting != '' and setting != '0'
+use_cprofile = setting == 'cprofile'
+log_path = os.environ.get('WINGS_PROFILE_LOG') or None
+listeners = [] # functions called with a Stats when a wing has been remade, for the status bar
+latest = None # the Stats last passed to Finished
+
+CPROFILE_LINES = 25 # how many functions of the cProfile statistics are reported
+
+def Enable(cprofile = False, log = None):
+    global enabled
+    global use_cprofile
+    global log_path
+    enabled = True
+    use_cprofile = cprofile
+    if log != None:
+        log_path = log
+
+def Disable():
+    global enabled
+    enabled = False
+
+class NullTimer:
+    # used when profiling is off, so timing costs next to nothing
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        return False
+
+null_timer = NullTimer()
+
+class Timer:
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+        self.profile = None
+
+    def __enter__(self):
+        local = self.stats.local
+        depth = getattr(local, 'depth', 0)
+        local.depth = depth + 1
+        if depth == 0 and use_cprofile:
+            # only the outermost timer of each thread profiles, cProfile can't be nested
+            self.profile = cProfile.Profile()
+            try:
+                self.profile.enable()
+            except ValueError:
+                self.profile = None # another profiler is running
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        seconds = time.perf_counter() - self.start
+        self.stats.local.depth -= 1
+        if self.profile != None:
+            self.profile.disable()
+            self.stats.AddProfile(self.name, self.profile)
+        self.stats.AddTime(self.name, seconds)
+        return False
+
+class Stats:
+    # the times and counts of the phases of making one wing
+    # times of nested phases are included in the times of the phases they are in
+    def __init__(self, title = ''):
+        self.title = title
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.Reset()
+
+    def Reset(self):
+        with self.lock:
+            self.times = {} # name: [total seconds, number of times]
+            self.order = [] # names in the order they were first timed
+            self.counts = {} # name: latest count
+            self.profiles = [] # (name, pstats text)
+
+    def Timer(self, name):
+        # returns a context manager which adds the time taken in it to the named phase
+        if not enabled:
+            return null_timer
+        return Timer(self, name)
+
+    def AddTime(self, name, seconds):
+        with self.lock:
+            if name not in self.times:
+                self.times[name] = [0.0, 0]
+                self.order.append(name)
+            self.times[name][0] += seconds
+            self.times[name][1] += 1
+
+    def Count(self, name, value):
+        # records a count, such as the number of stations, replacing any earlier count of the same name
+        if not enabled:
+            return
+        with self.lock:
+            self.counts[name] = value
+
+    def AddProfile(self, name, profile):
+        s = io.StringIO()
+        pstats.Stats(profile, stream = s).sort_stats('cumulative').print_stats(CPROFILE_LINES)
+        with self.lock:
+            self.profiles.append((name, s.getvalue()))
+
+    def GetSummary(self):
+        # one line, for a status bar
+        with self.lock:
+            items = []
+            for name in self.order:
+                items.append('%s %.3fs' % (name, self.times[name][0]))
+            for name in sorted(self.counts):
+                items.append('%s %d' % (name, self.counts[name]))
+        return ', '.join(items)
+
+    def GetReport(self):
+        # several lines, for the Wing stats dialog and the log
+        with self.lock:
+            lines = []
+            if self.title:
+                lines.append(self.title)
+            for name in self.order:
+                total, number = self.times[name]
+                lines.append('%-26s %9.4fs %6d times' % (name, total, number))
+            for name in sorted(self.counts):
+                lines.append('%-26s %10d' % (name, self.counts[name]))
+            for name, text in self.profiles:
+                lines.append('cProfile of ' + name + ':')
+                lines.append(text)
+        return '\n'.join(lines)
+
+def Finished(stats):
+    # called when a wing has been remade, tells the listeners and writes the report to the log
+    global latest
+    if not enabled:
+        return
+    latest = stats
+    for listener in listeners:
+        listener(stats)
+    if log_path != None:
+        f = open(log_path, 'a')
+        # one write, so reports from several processes don't get mixed up
+        f.write(time.strftime('%Y-%m-%d %H:%M:%S') + '\n' + stats.GetReport() + '\n\n')
+        f.close()
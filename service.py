@@ -0,0 +1,306 @@
+# a long running local process which makes wing meshes for scripts and several open windows,
+# so the same wing is only made once, and kept in memory while it's being used
+# clients send a wing's definition, see Wing.GetDefinition, and the name of a stage, and get back the stage's arrays,
+# see disk_stages in wing.py, in a block of shared memory, which holds the stations as well as the mesh
+# requests are served at the same time by asyncio, the stages are made by a pool of processes,
+# and the most recently used results are kept, up to a maximum number
+# start it with: python service.py [--socket path] [--entries N] [--jobs N]
+# then set WINGS_SERVICE=1, or to the socket's path, for wings to be made by it
+# only the user who started it can connect, as the messages are pickled
+# it needs Python 3.8 or later, for shared memory, and Unix sockets, so not Windows before 10, or Python 3.6
+
+import os
+import sys
+import time
+import pickle
+import socket
+import struct
+import asyncio
+import argparse
+import collections
+import multiprocessing
+import concurrent.futures
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None # before Python 3.8
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.wingdesigner', 'service.sock')
+TIMEOUT = 600.0 # seconds a client waits for a stage to be made
+HEADER = struct.Struct('<Q') # the length of each message, before it
+ALIGNMENT = 64 # bytes, each array in shared memory starts on a multiple of this
+
+available = shared_memory != None and hasattr(socket, 'AF_UNIX')
+setting = os.environ.get('WINGS_SERVICE', '')
+enabled = available and setting not in ('', '0')
+path = DEFAULT_PATH if setting in ('', '0', '1') else setting
+
+def EncodeMessage(message):
+    data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+    return HEADER.pack(len(data)) + data
+
+def ReceiveExactly(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 1048576))
+        if len(chunk) == 0:
+            raise ConnectionError('the wing service closed the connection')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def SendRequest(message, socket_path = None):
+    # sends a message to the service and returns its reply, raises OSError if it isn't running
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(TIMEOUT)
+    try:
+        sock.connect(socket_path or path)
+        sock.sendall(EncodeMessage(message))
+        size = HEADER.unpack(ReceiveExactly(sock, HEADER.size))[0]
+        return pickle.loads(ReceiveExactly(sock, size))
+    finally:
+        sock.close()
+
+def IsRunning(socket_path):
+    # whether a service is listening on the socket, one left by a service which didn't stop cleanly refuses connections
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(5.0)
+    try:
+        sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+def AttachSharedMemory(name):
+    # attaches to a block made by the service, without this process deleting it at exit
+    try:
+        return shared_memory.SharedMemory(name, track = False)
+    except TypeError:
+        # before Python 3.13, the block is also registered to be deleted, so take it off again
+        block = shared_memory.SharedMemory(name)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(block._name, 'shared_memory')
+        return block
+
+def ReadArrays(name, layout):
+    # returns a dictionary of copies of the arrays in the shared memory block
+    block = AttachSharedMemory(name)
+    try:
+        arrays = {}
+        for array_name, dtype, shape, offset in layout:
+            view = np.ndarray(shape, dtype = dtype, buffer = block.buf, offset = offset)
+            arrays[array_name] = view.copy()
+            del view
+        return arrays
+    finally:
+        block.close()
+
+def Request(definition, stage, socket_path = None):
+    # returns the arrays of the stage of the wing, made by the service, or None if the service can't be used
+    try:
+        reply = SendRequest(('make', definition, stage), socket_path)
+    except (OSError, ConnectionError, EOFError, pickle.UnpicklingError):
+        return None
+    if reply.get('error') != None or reply.get('name') == None:
+        return None
+    try:
+        return ReadArrays(reply['name'], reply['layout'])
+    except FileNotFoundError:
+        return None # thrown away by the service before it could be read
+
+def GetStageKey(definition, stage):
+    import wing
+    w = wing.Wing()
+    w.SetDefinition(definition)
+    return w.GetStageKey(stage)
+
+def MakeArrays(definition, stage):
+    # run in the pool, returns the stage's arrays
+    import wing
+    w = wing.Wing()
+    w.SetDefinition(definition)
+    result = w.GetStage(stage)
+    if result == None:
+        return None
+    to_arrays, from_arrays = wing.disk_stages[stage]
+    return to_arrays(w, result)
+
+def InitWorker():
+    # the workers make the stages themselves
+    os.environ['WINGS_SERVICE'] = '0'
+    import service
+    service.enabled = False
+
+class AlreadyRunning(Exception):
+    pass
+
+class SharedResult:
+    # the arrays of one stage, in one block of shared memory
+    def __init__(self, arrays):
+        self.layout = []
+        offset = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            self.layout.append((name, array.dtype.str, array.shape, offset))
+            offset += (array.nbytes + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        self.size = offset
+        self.block = shared_memory.SharedMemory(create = True, size = max(offset, 1))
+        for (name, dtype, shape, offset), array in zip(self.layout, arrays.values()):
+            np.ndarray(shape, dtype = dtype, buffer = self.block.buf, offset = offset)[...] = array
+
+    def GetReply(self):
+        return {'name': self.block.name, 'layout': self.layout}
+
+    def Delete(self):
+        self.block.close()
+        self.block.unlink()
+
+class Server:
+    def __init__(self, socket_path = None, max_entries = 32, processes = None):
+        self.path = socket_path or path
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict() # key: SharedResult, the most recently used last
+        self.pending = {} # key: future, for stages being made, so the same one isn't made twice at once
+        self.executor = concurrent.futures.ProcessPoolExecutor(processes or multiprocessing.cpu_count(), initializer = InitWorker)
+        self.hits = 0
+        self.misses = 0
+        self.start_time = time.time()
+        self.stopped = None
+
+    async def Make(self, definition, stage):
+        key = GetStageKey(definition, stage)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key].GetReply()
+        if key in self.pending:
+            self.hits += 1
+            entry = await asyncio.shield(self.pending[key])
+            return {'name': None} if entry == None else entry.GetReply()
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+        try:
+            arrays = await asyncio.get_running_loop().run_in_executor(self.executor, MakeArrays, definition, stage)
+            entry = None if arrays == None else SharedResult(arrays)
+            future.set_result(entry)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception() # marks it as seen, in case no other request is waiting for it
+            raise
+        finally:
+            del self.pending[key]
+        if entry == None:
+            return {'name': None}
+        self.entries[key] = entry
+        self.Evict()
+        return entry.GetReply()
+
+    def Evict(self):
+        while len(self.entries) > self.max_entries:
+            key, entry = self.entries.popitem(last = False)
+            entry.Delete()
+
+    def GetStats(self):
+        return {'entries': len(self.entries), 'bytes': sum([entry.size for entry in self.entries.values()]),
+            'hits': self.hits, 'misses': self.misses, 'pending': len(self.pending), 'seconds': time.time() - self.start_time}
+
+    async def Respond(self, message):
+        command = message[0]
+        try:
+            if command == 'make':
+                return await self.Make(message[1], message[2])
+            if command == 'stats':
+                return self.GetStats()
+            if command == 'stop':
+                self.stopped.set()
+                return {}
+            return {'error': 'unknown command: ' + str(command)}
+        except Exception as e:
+            return {'error': repr(e)}
+
+    async def Handle(self, reader, writer):
+        # one connection, which can send several messages
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break
+                message = pickle.loads(await reader.readexactly(HEADER.unpack(header)[0]))
+                writer.write(EncodeMessage(await self.Respond(message)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass # the service is stopping, while the client was still connected
+        finally:
+            writer.close()
+
+    async def Serve(self):
+        self.stopped = asyncio.Event()
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        if os.path.exists(self.path):
+            if IsRunning(self.path):
+                raise AlreadyRunning('a wing service is already running at ' + self.path)
+            os.remove(self.path) # left by a service which didn't stop cleanly
+        old_umask = os.umask(0o177) # only this user can connect
+        try:
+            server = await asyncio.start_unix_server(self.Handle, self.path)
+        finally:
+            os.umask(old_umask)
+        try:
+            await self.stopped.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            self.Close()
+
+    def Close(self):
+        for entry in self.entries.values():
+            entry.Delete()
+        self.entries.clear()
+        self.executor.shutdown()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Make wing meshes for several programs, keeping the recent ones in memory')
+    parser.add_argument('--socket', default = path, help = 'the path of the Unix socket to listen on')
+    parser.add_argument('--entries', type = int, default = 32, help = 'the most results to keep')
+    parser.add_argument('-j', '--jobs', type = int, default = multiprocessing.cpu_count(), help = 'number of processes making stages')
+    parser.add_argument('--stats', action = 'store_true', help = 'print the running service\'s counts, then exit')
+    parser.add_argument('--stop', action = 'store_true', help = 'stop the running service')
+    args = parser.parse_args(argv)
+
+    if not available:
+        print('the wing service needs Python 3.8 or later, with Unix sockets')
+        return 1
+    if args.stats or args.stop:
+        try:
+            reply = SendRequest(('stop',) if args.stop else ('stats',), args.socket)
+        except OSError as e:
+            print('the wing service is not running at ' + args.socket + ': ' + str(e))
+            return 1
+        for name in sorted(reply):
+            print('%s: %s' % (name, reply[name]))
+        return 0
+
+    os.environ['WINGS_SERVICE'] = '0' # this process, and its pool, don't ask themselves
+    print('wing service listening on ' + args.socket)
+    try:
+        asyncio.run(Server(args.socket, args.entries, args.jobs).Serve())
+    except AlreadyRunning as e:
+        print(str(e))
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
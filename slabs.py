@@ -0,0 +1,168 @@
+# cuts a closed triangle mesh into pieces across x, filling in the cut faces, so each piece is a closed solid ready to print
+# the pieces are independent, so are cut and written by a pool of processes
+
+import time
+import multiprocessing
+import numpy as np
+import meshfiles
+import watertight
+from mesh import RemoveDegenerateTriangles
+from polygons import Triangulate
+
+def GetSlabs(minx, maxx, num):
+    # returns (x0, x1) for each of num equal pieces, the first and last are open ended
+    slabs = []
+    for i in range(0, num):
+        x0 = minx + (maxx - minx) * i / num
+        x1 = minx + (maxx - minx) * (i + 1) / num
+        if i == 0:
+            x0 = -np.inf
+        if i == num - 1:
+            x1 = np.inf
+        slabs.append((x0, x1))
+    return slabs
+
+def ClipTriangles(triangles, x, keep_above):
+    # returns the parts of the triangles on one side of the plane at x, and the edges of the cut,
+    # as an array of shape (n, 2, 3), each going the same way round as the triangle it came from
+    d = triangles[:,:,0] - x
+    if not keep_above:
+        d = -d
+    inside = d >= 0.0
+    num_inside = inside.sum(axis = 1)
+    keep = [triangles[num_inside == 3]]
+    cuts = []
+    rows = np.arange(3)
+
+    for num, special_is_inside in ((1, True), (2, False)):
+        which = num_inside == num
+        if not np.any(which):
+            continue
+        t = triangles[which]
+        dt = d[which]
+        # turn the triangles round, keeping their direction, so the odd one out is first
+        first = np.argmax(inside[which] == special_is_inside, axis = 1)
+        order = (first[:,None] + rows) % 3
+        t = np.take_along_axis(t, order[:,:,None], axis = 1)
+        dt = np.take_along_axis(dt, order, axis = 1)
+        p01 = EdgeCut(t[:,0], t[:,1], dt[:,0], dt[:,1])
+        p02 = EdgeCut(t[:,0], t[:,2], dt[:,0], dt[:,2])
+        if special_is_inside:
+            keep.append(np.stack((t[:,0], p01, p02), axis = 1))
+            cuts.append(np.stack((p01, p02), axis = 1))
+        else:
+            keep.append(np.stack((p01, t[:,1], t[:,2]), axis = 1))
+            keep.append(np.stack((p01, t[:,2], p02), axis = 1))
+            cuts.append(np.stack((p02, p01), axis = 1))
+
+    # points on the plane make triangles with no area and cut edges with no length, which would break the loops
+    kept = RemoveDegenerateTriangles(np.concatenate(keep))
+    if len(cuts) > 0:
+        cuts = np.concatenate(cuts)
+        cuts = cuts[np.any(cuts[:,0] != cuts[:,1], axis = 1)]
+    else:
+        cuts = np.zeros((0, 2, 3))
+    return kept, cuts
+
+def EdgeCut(a, b, da, db):
+    # where the edges from a to b cross the plane, always worked out from the outside end,
+    # so the two triangles sharing an edge get exactly the same point
+    a_outside = (da < 0.0)[:,None]
+    out_p = np.where(a_outside, a, b)
+    in_p = np.where(a_outside, b, a)
+    d_out = np.where(a_outside[:,0], da, db)
+    d_in = np.where(a_outside[:,0], db, da)
+    t = d_out / (d_out - d_in)
+    return out_p + (in_p - out_p) * t[:,None]
+
+def CapCut(cuts):
+    # returns triangles filling the loops made by the cut edges, facing out of the piece
+    # the caps go the opposite way round to the cut edges, so they join the cut triangles properly
+    # cut edges which don't make closed loops are left open, loops inside loops aren't made into holes
+    caps = []
+    for loop in JoinCuts(cuts[:, ::-1]):
+        if len(loop) < 3:
+            continue
+        indices = Triangulate(loop[:,1:3])
+        if len(indices) > 0:
+            caps.append(loop[indices])
+    if len(caps) == 0:
+        return np.zeros((0, 3, 3))
+    return np.concatenate(caps)
+
+def JoinCuts(cuts):
+    # returns a list of arrays of points, one for each closed loop of edges
+    next_edge = {}
+    for i, p in enumerate(cuts[:,0].tolist()):
+        next_edge[tuple(p)] = i
+    used = np.zeros(len(cuts), dtype = bool)
+    ends = [tuple(p) for p in cuts[:,1].tolist()]
+    loops = []
+    for start in range(0, len(cuts)):
+        if used[start]:
+            continue
+        loop = []
+        i = start
+        while i != None and not used[i]:
+            used[i] = True
+            loop.append(i)
+            i = next_edge.get(ends[i])
+        if i == start:
+            loops.append(cuts[loop, 0])
+    return loops
+
+def CutSlab(triangles, x0, x1):
+    # returns the closed piece of the mesh between x0 and x1
+    caps = []
+    if x0 > -np.inf:
+        triangles, cuts = ClipTriangles(triangles, x0, True)
+        caps.append(CapCut(cuts))
+    if x1 < np.inf:
+        triangles, cuts = ClipTriangles(triangles, x1, False)
+        caps.append(CapCut(cuts))
+    return np.concatenate([triangles] + caps)
+
+def CutAndWrite(job):
+    # run in the pool, returns what was written, with the check of the piece before it was repaired
+    triangles, x0, x1, path = job
+    start = time.perf_counter()
+    piece = CutSlab(triangles, x0, x1)
+    check = watertight.CheckTriangles(piece)
+    if not check.IsWatertight():
+        piece = watertight.Repair(piece)
+    writer = meshfiles.WriteTriangles(path, [piece])
+    writer.seconds = time.perf_counter() - start
+    writer.check = check
+    return writer
+
+def WritePieces(triangles, slabs, paths, processes = None):
+    # cuts the triangles into the slabs and writes each piece to its path, returns what was written, in order
+    triangles = np.asarray(triangles, dtype = float).reshape(-1, 3, 3)
+    minx = triangles[:,:,0].min(axis = 1)
+    maxx = triangles[:,:,0].max(axis = 1)
+    jobs = []
+    for (x0, x1), path in zip(slabs, paths):
+        # only the triangles which reach into the slab are sent to be cut
+        near = (maxx >= x0) & (minx <= x1)
+        jobs.append((triangles[near], x0, x1, path))
+    return WritePieceJobs(jobs, len(jobs), processes)
+
+def WritePieceJobs(jobs, num_jobs, processes = None):
+    # cuts and writes the pieces of an iterable of (triangles, x0, x1, path), returns what was written, in order
+    # jobs can be a generator, only as many jobs as there are processes are taken from it at once,
+    # so only that many pieces' triangles are in memory
+    if processes == None:
+        processes = multiprocessing.cpu_count()
+    if processes > 1 and num_jobs > 1 and not multiprocessing.current_process().daemon:
+        pool = multiprocessing.Pool(min(processes, num_jobs))
+        try:
+            results = []
+            for job in jobs:
+                if len(results) >= processes:
+                    results[len(results) - processes].wait()
+                results.append(pool.apply_async(CutAndWrite, (job,)))
+            return [result.get() for result in results]
+        finally:
+            pool.close()
+            pool.join()
+    return [CutAndWrite(job) for job in jobs]
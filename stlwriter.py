@@ -0,0 +1,64 @@
+# writes binary STL files a block of triangles at a time, so a whole solid never has to be held in memory
+# the number of triangles in the header is filled in when the file is closed
+
+import time
+import struct
+import numpy as np
+
+HEADER = b'binary STL from Wing Designer'
+RECORD_TYPE = np.dtype([('normal', '<f4', 3), ('points', '<f4', (3, 3)), ('attribute', '<u2')]) # 50 bytes
+BLOCK_SIZE = 65536 # triangles written at a time from larger arrays
+
+class StlWriter:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.ljust(80, b' '))
+        self.file.write(struct.pack('<I', 0))
+        self.num_triangles = 0
+        self.num_bytes = 84
+        self.seconds = 0.0 # time spent writing
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.Close()
+        return False
+
+    def AddTriangles(self, triangles):
+        # writes an array of shape (n, 3, 3)
+        start = time.perf_counter()
+        triangles = np.asarray(triangles, dtype = float).reshape(-1, 3, 3)
+        for first in range(0, len(triangles), BLOCK_SIZE):
+            block = triangles[first:first + BLOCK_SIZE]
+            records = np.zeros(len(block), dtype = RECORD_TYPE)
+            records['normal'] = GetNormals(block)
+            records['points'] = block
+            self.file.write(records.tobytes())
+            self.num_triangles += len(block)
+            self.num_bytes += records.nbytes
+        self.seconds += time.perf_counter() - start
+
+    def Close(self):
+        if self.file == None:
+            return
+        start = time.perf_counter()
+        self.file.seek(80)
+        self.file.write(struct.pack('<I', self.num_triangles))
+        self.file.close()
+        self.file = None
+        self.seconds += time.perf_counter() - start
+
+def GetNormals(triangles):
+    # returns the unit normals of an array of triangles, zero for degenerate ones
+    normals = np.cross(triangles[:,1] - triangles[:,0], triangles[:,2] - triangles[:,0])
+    lengths = np.linalg.norm(normals, axis = 1)
+    return np.divide(normals, lengths[:,None], out = np.zeros_like(normals), where = lengths[:,None] > 0.0)
+
+def WriteStl(path, triangles):
+    # writes an array of triangles to a new file, returns the StlWriter, for its counts
+    writer = StlWriter(path)
+    with writer:
+        writer.AddTriangles(triangles)
+    return writer
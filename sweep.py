@@ -0,0 +1,212 @@
+# makes many variants of one wing, each with some of its properties changed, and exports each to its own directory
+# the stages which the variants have in common are made once for each group of variants which share them,
+# then the rest is done for each variant, in a pool of processes
+# usage: python sweep.py document.heeks [--wing N] [--set name=value,value ...] [--washout degrees,degrees] [-o output_directory]
+
+import os
+import sys
+import csv
+import time
+import argparse
+import itertools
+import traceback
+import multiprocessing
+
+import wing
+
+METRICS = ['triangles', 'pattern_cells', 'pattern_area', 'files', 'bytes', 'shared_seconds', 'pattern_seconds', 'export_seconds', 'seconds', 'error']
+
+def MakeAngleGraph(washout):
+    # an angle graph for a straight twist, from 0 degrees at the root to washout degrees at the tip
+    # the angles are measured from the graph's lowest point, so a negative washout would twist the root instead
+    if float(washout) < 0.0:
+        raise ValueError('washout can\'t be negative: ' + str(washout))
+    return wing.MakeCurveIndex(wing.CurveFromPoints([(0.0, 0.0), (100.0, float(washout))]))
+
+def GetVariants(grid):
+    # returns a list of dictionaries of overrides, one for every combination of the values in the grid
+    names = sorted(grid.keys())
+    variants = []
+    for values in itertools.product(*[grid[name] for name in names]):
+        variants.append(dict(zip(names, values)))
+    return variants
+
+def ApplyOverrides(definition, overrides):
+    # returns a copy of the wing definition with the overrides, 'washout' replaces the angle graph
+    properties = dict(definition['properties'])
+    indices = list(definition['indices'])
+    for name, value in overrides.items():
+        if name == 'washout':
+            indices[4] = MakeAngleGraph(value)
+        elif name in properties:
+            properties[name] = ParseValue(properties[name], value)
+        else:
+            raise ValueError('unknown wing property: ' + name)
+    return {'indices': indices, 'properties': properties}
+
+def ParseValue(old_value, value):
+    # returns the value, from --set, as the same type as the property's old value
+    # bool('False') is True, so the words for true and false are read here
+    if isinstance(old_value, bool) and isinstance(value, str):
+        text = value.strip().lower()
+        if text in ('1', 'true', 'yes'):
+            return True
+        if text in ('0', 'false', 'no'):
+            return False
+        raise ValueError('not true or false: ' + value)
+    return type(old_value)(value)
+
+def MakeWing(definition):
+    w = wing.Wing()
+    w.SetDefinition(definition)
+    return w
+
+def GetSharedKey(definition):
+    # variants with the same key have the same wing mesh and outline, so can share them
+    return MakeWing(definition).GetStageKey('outline')
+
+def MakeShared(definition):
+    # run in the pool, makes the stages shared by a group of variants, returned as arrays
+    start = time.perf_counter()
+    w = MakeWing(definition)
+    export_mesh = wing.SaveMesh(w, w.GetStage('export_mesh'))
+    outline = wing.SaveArea(w, w.GetStage('outline'))
+    return {'export_mesh': export_mesh, 'outline': outline, 'seconds': time.perf_counter() - start}
+
+def RunVariant(job):
+    # run in the pool, makes the rest of one variant from the shared stages and exports it, returns its metrics
+    name, definition, shared, path = job
+    start = time.perf_counter()
+    metrics = {'shared_seconds': shared['seconds']}
+    try:
+        w = MakeWing(definition)
+        w.stages['export_mesh'] = wing.LoadMesh(w, shared['export_mesh'])
+        w.stages['outline'] = wing.LoadArea(w, shared['outline'])
+
+        pattern_start = time.perf_counter()
+        pattern = w.GetStage('pattern_area')
+        metrics['pattern_seconds'] = time.perf_counter() - pattern_start
+        if pattern != None:
+            metrics['pattern_cells'] = pattern.NumCurves()
+            area = 0.0
+            for curve in pattern.GetCurves():
+                area += abs(curve.GetArea())
+            metrics['pattern_area'] = area
+
+        export_start = time.perf_counter()
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        writers = w.ExportFiles(path)
+        metrics['export_seconds'] = time.perf_counter() - export_start
+        metrics['triangles'] = w.GetStage('checked_mesh').NumTriangles()
+        metrics['files'] = len(writers)
+        metrics['bytes'] = sum([writer.num_bytes for writer in writers])
+    except Exception:
+        metrics['error'] = traceback.format_exc().strip().split('\n')[-1]
+    metrics['seconds'] = time.perf_counter() - start
+    return name, metrics
+
+def Map(function, jobs, processes):
+    # returns the results of the function for each job, in order
+    if processes > 1 and len(jobs) > 1:
+        pool = multiprocessing.Pool(min(processes, len(jobs)))
+        try:
+            return pool.map(function, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    return [function(job) for job in jobs]
+
+def RunSweep(base_wing, grid, output_dir, processes = None, format = 'stl'):
+    # makes and exports every combination of the grid's values, a dictionary of property name: list of values,
+    # 'washout' can be used for the angle graph, the files go in a directory for each variant,
+    # and a CSV of the overrides, metrics and timings goes in output_dir, returns the rows of the CSV
+    if processes == None:
+        processes = multiprocessing.cpu_count()
+    definition = base_wing.GetDefinition() # the sketches are only read here, once
+    variants = GetVariants(grid)
+    names = ['v%03d' % i for i in range(0, len(variants))]
+    definitions = [ApplyOverrides(definition, overrides) for overrides in variants]
+
+    # make the shared stages once for each group of variants
+    keys = [GetSharedKey(d) for d in definitions]
+    unique_keys = []
+    for key in keys:
+        if key not in unique_keys:
+            unique_keys.append(key)
+    shared_list = Map(MakeShared, [definitions[keys.index(key)] for key in unique_keys], processes)
+    shared = dict(zip(unique_keys, shared_list))
+
+    # then the rest of each variant
+    jobs = []
+    for name, d, key in zip(names, definitions, keys):
+        jobs.append((name, d, shared[key], os.path.join(output_dir, name, 'wing.' + format)))
+    results = dict(Map(RunVariant, jobs, processes))
+
+    rows = []
+    grid_names = sorted(grid.keys())
+    for name, overrides, key in zip(names, variants, keys):
+        row = {'variant': name, 'group': unique_keys.index(key)}
+        row.update(overrides)
+        row.update(results[name])
+        rows.append(row)
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    f = open(os.path.join(output_dir, 'sweep.csv'), 'w', newline = '')
+    writer = csv.DictWriter(f, ['variant', 'group'] + grid_names + METRICS)
+    writer.writeheader()
+    writer.writerows(rows)
+    f.close()
+    return rows
+
+def ParseGrid(settings, washouts):
+    grid = {}
+    for setting in settings:
+        name, values = setting.split('=', 1)
+        grid[name.strip()] = [v.strip() for v in values.split(',') if v.strip() != '']
+    if washouts:
+        grid['washout'] = [float(v) for v in washouts.split(',') if v.strip() != '']
+        for washout in grid['washout']:
+            MakeAngleGraph(washout) # to stop before anything is made, if one can't be used
+    return grid
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Export variants of a wing with some of its properties changed')
+    parser.add_argument('document', help = 'saved document with the wing')
+    parser.add_argument('--wing', type = int, default = 1, help = 'which wing in the document, from 1')
+    parser.add_argument('--set', action = 'append', default = [], metavar = 'NAME=VALUES', help = 'a property and its values, comma separated, can be repeated')
+    parser.add_argument('--washout', help = 'twists at the tip, in degrees, 0 or more, comma separated, replacing the angle graph')
+    parser.add_argument('-o', '--output', default = 'sweep', help = 'directory to write the variants and sweep.csv to')
+    parser.add_argument('-f', '--format', default = 'stl', choices = ['stl', 'obj', 'ply', '3mf'], help = 'file format to export')
+    parser.add_argument('-j', '--jobs', type = int, default = multiprocessing.cpu_count(), help = 'number of processes')
+    args = parser.parse_args(argv)
+
+    for setting in args.set:
+        if '=' not in setting or setting.split('=', 1)[0].strip() not in wing.property_names:
+            parser.error('--set needs a wing property name and values, like pattern_wall=1.5,2: ' + setting)
+    try:
+        grid = ParseGrid(args.set, args.washout)
+    except ValueError as e:
+        parser.error(str(e))
+
+    import WingsExport
+    WingsExport.InitCad()
+    WingsExport.OpenDocument(args.document)
+    wings = WingsExport.GetWings()
+    if args.wing < 1 or args.wing > len(wings):
+        parser.error('the document has %d wings' % len(wings))
+
+    start = time.time()
+    rows = RunSweep(wings[args.wing - 1], grid, args.output, args.jobs, args.format)
+    failed = 0
+    for row in rows:
+        if row.get('error'):
+            failed += 1
+            print('%s: FAILED %s' % (row['variant'], row['error']))
+        else:
+            print('%s: %.2fs' % (row['variant'], row['seconds']))
+    print('%d variants in %.2fs, see %s' % (len(rows), time.time() - start, os.path.join(args.output, 'sweep.csv')))
+    return 1 if failed > 0 else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
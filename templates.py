@@ -0,0 +1,135 @@
+# flattens the strips of a wing's surface between neighbouring stations into flat templates for cutting skins
+# each strip is unrolled triangle by triangle, keeping the lengths of the triangles' edges, so the templates bend back to the wing
+# each strip is a few array operations, so they're all flattened here, starting processes would take longer
+
+import math
+import numpy as np
+from backend import geom
+
+MARGIN = 2.0 # mm added round each template, as the old single section template had
+GAP = 5.0 # mm between nested templates
+SHEET_WIDTH = 600.0 # mm, the templates are laid out in rows this wide
+
+def Angles(u, v):
+    # the angles between each pair of vectors, of shape (n, 3)
+    return np.arctan2(np.linalg.norm(np.cross(u, v), axis = 1), np.einsum('ij,ij->i', u, v))
+
+def FlattenStrip(pts0, pts1):
+    # returns the flattened points of the two stations, as arrays of shape (n, 2)
+    # the strip is the triangles (a[i], b[i], b[i + 1]) and (a[i], b[i + 1], a[i + 1]), as Mesh.AddStrip makes them
+    # each triangle's angles are found in 3D, then the direction of each rung from a[i] to b[i] is the sum of the turns before it
+    a = np.asarray(pts0, dtype = float)
+    b = np.asarray(pts1, dtype = float)
+    n = min(len(a), len(b))
+    a = a[:n]
+    b = b[:n]
+    if n < 2:
+        return np.zeros((n, 2)), np.zeros((n, 2))
+    rung = b - a
+    diagonal = b[1:] - a[:-1]
+    along = a[1:] - a[:-1]
+    alpha1 = Angles(rung[:-1], diagonal) # at a[i] in the first triangle
+    alpha2 = Angles(diagonal, along) # at a[i] in the second triangle
+    gamma = Angles(-along, rung[1:]) # at a[i + 1] in the second triangle
+    theta = math.pi * 0.5 + np.concatenate(([0.0], np.cumsum(math.pi - alpha1 - alpha2 - gamma)))
+    phi = theta[:-1] - alpha1 - alpha2
+    steps = np.linalg.norm(along, axis = 1)[:,None] * np.stack((np.cos(phi), np.sin(phi)), axis = 1)
+    a2 = np.concatenate((np.zeros((1, 2)), np.cumsum(steps, axis = 0)))
+    b2 = a2 + np.linalg.norm(rung, axis = 1)[:,None] * np.stack((np.cos(theta), np.sin(theta)), axis = 1)
+    return a2, b2
+
+def Straighten(a2, b2):
+    # turns the template so the line from its first to its last point is along x, and moves its corner to 0, 0
+    pts = np.concatenate((a2, b2))
+    d = a2[-1] - a2[0]
+    angle = math.atan2(d[1], d[0])
+    c = math.cos(-angle)
+    s = math.sin(-angle)
+    rotation = np.array(((c, s), (-s, c)))
+    a2 = a2 @ rotation
+    b2 = b2 @ rotation
+    minp = np.concatenate((a2, b2)).min(axis = 0)
+    return a2 - minp, b2 - minp
+
+def FlattenStrips(strips):
+    # returns a list of (a2, b2) for each (pts0, pts1) strip
+    return [Straighten(*FlattenStrip(pts0, pts1)) for pts0, pts1 in strips]
+
+def Nest(sizes):
+    # returns the position of the corner of each box, of the given width and height, laid out in rows
+    positions = []
+    x = 0.0
+    y = 0.0
+    row_height = 0.0
+    for width, height in sizes:
+        if x > 0.0 and x + width > SHEET_WIDTH:
+            x = 0.0
+            y -= row_height + GAP
+            row_height = 0.0
+        positions.append((x, y - height))
+        x += width + GAP
+        row_height = max(row_height, height)
+    return positions
+
+def MakeTemplateArea(a2, b2):
+    # the outline of the template, with the margin added, and a line across it at each station, to line it up with the wing
+    area = geom.Area()
+    area.Append(MakeCurve(np.concatenate((a2, b2[::-1], a2[:1]))))
+    area.Offset(-MARGIN)
+    for p0, p1 in zip(a2.tolist(), b2.tolist()):
+        area.Append(MakeCurve((p0, p1)))
+    return area
+
+def MakeCurve(pts):
+    curve = geom.Curve()
+    for p in pts:
+        curve.Append(geom.Point(p[0], p[1]))
+    return curve
+
+def MakeTemplates(strips):
+    # returns a geom.Area for each strip, flattened and laid out so they don't overlap
+    flattened = FlattenStrips(strips)
+    sizes = []
+    for a2, b2 in flattened:
+        maxp = np.concatenate((a2, b2)).max(axis = 0) + MARGIN * 2
+        sizes.append((maxp[0], maxp[1]))
+    areas = []
+    for (a2, b2), position in zip(flattened, Nest(sizes)):
+        offset = np.array(position) + MARGIN
+        areas.append(MakeTemplateArea(a2 + offset, b2 + offset))
+    return areas
+
+def ParseSections(text, num_sections):
+    # returns the indexes, from 0, of the sections in text like '1-4, 9', numbered from 1, or all of them for empty text
+    # raises ValueError, with a message for the user, for anything else, or sections the wing doesn't have
+    if text.strip() == '':
+        return list(range(0, num_sections))
+    indexes = []
+    for part in text.split(','):
+        part = part.strip()
+        if part == '':
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            first = ParseSectionNumber(first, part)
+            last = ParseSectionNumber(last, part)
+            if last < first:
+                raise ValueError('the sections go backwards in "%s", write it as %d-%d' % (part, last, first))
+            numbers = range(first, last + 1)
+        else:
+            numbers = [ParseSectionNumber(part, part)]
+        for number in numbers:
+            if number > num_sections:
+                raise ValueError('there is no section %d in "%s", the wing has sections 1 to %d' % (number, part, num_sections))
+            if number - 1 not in indexes:
+                indexes.append(number - 1)
+    return sorted(indexes)
+
+def ParseSectionNumber(text, part):
+    try:
+        number = int(text.strip())
+    except ValueError:
+        raise ValueError('"%s" isn\'t a section number nor a range like 1-4' % part)
+    if number < 1:
+        raise ValueError('the sections are numbered from 1, not %d, in "%s"' % (number, part))
+    return number
@@ -0,0 +1,40 @@
+# checks the adaptive stations use the view's tolerance in the view and the export's tolerance in exported files,
+# and only the stations which are used are kept
+
+import os
+import sys
+import unittest
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import benchmark
+
+class AdaptiveTest(unittest.TestCase):
+    def setUp(self):
+        self.w = benchmark.MakeWing(100, 20)
+        self.w.adaptive_stations = True
+        self.w.view_stations = 4
+        self.w.export_stations = 4
+        self.w.view_tolerance = 0.5
+        self.w.adaptive_tolerance = 0.01
+        self.w.CheckCurves()
+
+    def test_only_used_stations_are_kept(self):
+        fractions = self.w.GetStationFractions(4, 0, self.w.adaptive_tolerance)
+        self.assertGreater(len(fractions), 4)
+        self.assertEqual(sorted(self.w.stations), sorted([(fraction, 0) for fraction in fractions]))
+
+    def test_view_and_export_tolerances(self):
+        view = self.w.GetStationFractions(4, 0, self.w.view_tolerance)
+        export = self.w.GetStationFractions(4, 0, self.w.adaptive_tolerance)
+        self.assertLess(len(view), len(export))
+        self.assertLess(self.w.GetStage('wing_mesh').NumTriangles(), self.w.GetStage('export_mesh').NumTriangles())
+
+    def test_same_tolerances_share_the_mesh(self):
+        self.w.view_tolerance = self.w.adaptive_tolerance
+        self.assertIs(self.w.GetStage('wing_mesh'), self.w.GetStage('export_mesh'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# checks the stages made on other threads, as they are when the wing is remade in the background after an edit:
+# a stage wanted by two threads is only made once, a mesh the background thread fails to make is made on the UI thread,
+# and the results in the properties are made in the background
+
+import os
+import sys
+import time
+import threading
+import unittest
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import wing
+import benchmark
+
+class BackgroundTest(unittest.TestCase):
+    def setUp(self):
+        self.saved = (wing.regenerate_in_background, wing.call_after, wing.results_made, dict(wing.stage_makers))
+        self.wing = benchmark.MakeWing(40, 4)
+        self.wing.render_pattern = False
+
+    def tearDown(self):
+        wing.regenerate_in_background, wing.call_after, wing.results_made, stage_makers = self.saved
+        wing.stage_makers.update(stage_makers)
+
+    def test_stage_made_once(self):
+        calls = []
+        make = wing.stage_makers['mesh_check']
+        def SlowMeshCheck(w):
+            calls.append(threading.current_thread())
+            time.sleep(0.2)
+            return make(w)
+        wing.stage_makers['mesh_check'] = SlowMeshCheck
+        self.wing.GetStage('export_mesh')
+        results = []
+        threads = [threading.Thread(target = lambda: results.append(self.wing.GetStage('mesh_check'))) for i in range(0, 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertIs(results[0], results[1])
+
+    def test_failed_regenerate_made_on_ui_thread(self):
+        wing.regenerate_in_background = True
+        make = wing.stage_makers['wing_mesh']
+        def FailInBackground(w):
+            if getattr(wing.background, 'generation', None) != None:
+                raise ValueError('failed in the background')
+            return make(w)
+        wing.stage_makers['wing_mesh'] = FailInBackground
+        self.wing.CheckCurves() # as GetMeshToDraw does before starting the thread
+        generation = self.wing.generation
+        self.wing.Regenerate(generation, True, False) # here, not on a thread, to wait for it
+        self.assertEqual(self.wing.failed_generation, generation)
+        self.assertEqual(self.wing.finished_mesh, None)
+        drawn_generation, mesh = self.wing.GetMeshToDraw()
+        self.assertEqual(drawn_generation, generation)
+        self.assertGreater(mesh.NumTriangles(), 0)
+
+    def test_result_made_in_background(self):
+        wing.regenerate_in_background = True
+        made = threading.Event()
+        wing.call_after = lambda function: function()
+        wing.results_made = made.set
+        p = wing.PropertyResult(self.wing, 'mesh check', 'mesh_check', lambda c: c.GetSummary())
+        self.assertEqual(p.GetString(), 'not made yet')
+        self.wing.GetStage('export_mesh')
+        self.assertEqual(p.GetString(), 'calculating...')
+        self.assertTrue(made.wait(60.0))
+        self.assertTrue(p.GetString().startswith('watertight'))
+
+if __name__ == '__main__':
+    unittest.main()
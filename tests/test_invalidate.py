@@ -0,0 +1,49 @@
+# checks a property edit only throws away the stages made from it, and that a sketch edited before it is still noticed
+
+import os
+import sys
+import unittest
+import numpy as np
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import wing
+import benchmark
+from backend import cad
+from backend import geom
+
+class InvalidateTest(unittest.TestCase):
+    def setUp(self):
+        self.wing = benchmark.MakeWing(30, 3)
+        self.wing.split_into_pieces = 0
+
+    def test_only_dependent_stages(self):
+        w = self.wing
+        mesh = w.GetStage('wing_mesh')
+        outline = w.GetStage('outline')
+        pattern = w.GetStage('pattern_area')
+        w.pattern_wall = 2.0
+        w.Invalidate('pattern_wall')
+        self.assertIs(w.GetStage('wing_mesh'), mesh)
+        self.assertIs(w.GetStage('outline'), outline)
+        self.assertIsNot(w.GetStage('pattern_area'), pattern)
+
+    def test_sketch_edited_then_property(self):
+        # the sketch is moved without telling the wing, then an unrelated property is changed
+        w = self.wing
+        before = w.GetStage('wing_mesh').GetBox().MinY()
+        sketch = cad.GetObjectFromId(cad.OBJECT_TYPE_SKETCH, w.sketch_ids[1])
+        curve = geom.Curve()
+        for p in wing.GetCurvePoints(sketch.GetArea().GetCurves()[0])[0].tolist():
+            curve.Append(geom.Point(p[0], p[1] - 10.0))
+        area = geom.Area()
+        area.Append(curve)
+        sketch.SetArea(area)
+        w.pattern_wall = 2.0
+        w.Invalidate('pattern_wall')
+        self.assertLess(w.GetStage('wing_mesh').GetBox().MinY(), before - 5.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# checks the pattern's triangles are sorted into inside, outside and near the edge the same as testing their corners one by one,
+# for an outline which isn't convex, and with walls across it
+
+import os
+import sys
+import unittest
+import numpy as np
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import lattice
+
+def IsInside(ring, p):
+    # the even-odd rule, one edge at a time
+    inside = False
+    for (x0, y0), (x1, y1) in zip(ring[:-1], ring[1:]):
+        if (y0 <= p[1]) != (y1 <= p[1]) and p[0] < x0 + (p[1] - y0) * (x1 - x0) / (y1 - y0):
+            inside = not inside
+    return inside
+
+def CrossesRing(ring, p, q):
+    # whether the line from p to q crosses any edge of the ring
+    a = ring[:-1]
+    b = ring[1:]
+    def Side(a, b, c):
+        return np.sign((b[...,0] - a[...,0]) * (c[...,1] - a[...,1]) - (b[...,1] - a[...,1]) * (c[...,0] - a[...,0]))
+    return bool(np.any((Side(p, q, a) * Side(p, q, b) < 0) & (Side(a, b, p) * Side(a, b, q) < 0)))
+
+class LatticeTest(unittest.TestCase):
+    def test_triangles(self):
+        triangles = lattice.MakeTriangles(0.0, 0.0, 100.0, 60.0, 20.0, 30.0, 16.0, 13.0)
+        self.assertEqual(triangles.shape, (5 * 2 * 4, 3, 2))
+        a, b, c = triangles[:,0], triangles[:,1], triangles[:,2]
+        cross = (b[:,0] - a[:,0]) * (c[:,1] - a[:,1]) - (b[:,1] - a[:,1]) * (c[:,0] - a[:,0])
+        self.assertTrue(np.all(cross > 0.0))
+        np.testing.assert_allclose(cross * 0.5, 16.0 * 13.0 * 0.5)
+
+    def test_classify(self):
+        # an L shape, so some triangles are in the box round it but outside it
+        ring = np.array([(3, 2), (97, 2), (97, 31), (41, 31), (41, 77), (3, 77), (3, 2)], dtype = float)
+        triangles = lattice.MakeTriangles(-10.0, -10.0, 110.0, 90.0, 10.0, 12.0, 7.0, 5.0)
+        bands = [(60.0, 62.0)]
+        bin_size = 2.5
+        inside, boundary = lattice.ClassifyTriangles(triangles, [ring], bands, bin_size)
+        self.assertFalse(np.any(inside & boundary))
+        self.assertTrue(np.any(inside))
+        self.assertTrue(np.any(~inside & ~boundary))
+        for t, is_inside, is_boundary in zip(triangles, inside, boundary):
+            corners = [IsInside(ring, p) for p in t]
+            in_band = any(t[:,0].max() >= x0 and t[:,0].min() <= x1 for x0, x1 in bands)
+            if is_inside:
+                self.assertTrue(all(corners))
+                self.assertFalse(in_band)
+            elif not is_boundary:
+                self.assertFalse(any(corners))
+                self.assertFalse(in_band)
+            if in_band:
+                self.assertTrue(is_boundary)
+            if any(corners) and not all(corners):
+                self.assertTrue(is_boundary) # crosses the outline
+            if not is_boundary:
+                for p, q in zip(t, np.roll(t, -1, axis = 0)):
+                    self.assertFalse(CrossesRing(ring, p, q))
+
+    def test_no_rings(self):
+        triangles = lattice.MakeTriangles(0.0, 0.0, 40.0, 40.0, 20.0, 20.0, 10.0, 5.0)
+        inside, boundary = lattice.ClassifyTriangles(triangles, [], [], 5.0)
+        self.assertFalse(np.any(inside))
+        self.assertFalse(np.any(boundary))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# checks the indexed leading edge, trailing edge and angle lookups give the same points as the probe curves they replaced,
+# which were a new line from each leading edge point, or across the angle graph, intersected with the whole curve, see benchmark.py
+# each is also checked against crossings worked out span by span here, so the test doesn't only trust the backend's Intersections
+# run with: python -m unittest discover tests, or pytest
+
+import os
+import sys
+import unittest
+import numpy as np
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy') # only the NumPy backend can make sketches from points
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import wing
+from benchmark import ProbeLeadingEdgePoint, ProbeTrailingEdgePoint, ProbeAngle
+
+TOLERANCE = 1e-6 # mm, or degrees
+FRACTIONS = np.linspace(0.0, 1.0, 201)
+
+def GetCrossings(pts, x):
+    # the y of every point where the vertical line at x crosses the polyline, one span at a time
+    ys = []
+    for (x0, y0), (x1, y1) in zip(pts[:-1], pts[1:]):
+        if x0 == x1:
+            if x == x0:
+                ys += [y0, y1]
+        elif min(x0, x1) <= x <= max(x0, x1):
+            ys.append(y0 + (y1 - y0) * (x - x0) / (x1 - x0))
+    return ys
+
+class LookupParityTest(unittest.TestCase):
+    def MakeWing(self, leading_edge, trailing_edge, angle_graph):
+        profile = np.array([(0.0, 0.0), (0.3, 0.06), (1.0, 0.0), (0.3, -0.02), (0.0, 0.0)]) * 200.0
+        return wing.NewWingFromPoints(leading_edge, trailing_edge, profile, profile, angle_graph)
+
+    def CheckWing(self, w):
+        w.CheckCurves()
+        le_pts = w.GetLeadingEdgePoints(FRACTIONS)
+        te_pts = w.GetTrailingEdgePoints(le_pts)
+        angles = w.GetAngles(FRACTIONS)
+        te_pts_list = wing.GetCurvePoints(w.curves[1])[0].tolist()
+        angle_pts_list = wing.GetCurvePoints(w.curves[4])[0].tolist()
+        min_angle_y = min([p[1] for p in angle_pts_list])
+        for fraction, le, te, angle in zip(FRACTIONS, le_pts, te_pts, angles):
+            np.testing.assert_allclose(le, ProbeLeadingEdgePoint(w, fraction), atol = TOLERANCE)
+
+            expected = ProbeTrailingEdgePoint(w, le)
+            behind = [y for y in GetCrossings(te_pts_list, le[0]) if le[1] - 1000.0 <= y <= le[1]]
+            if expected == None:
+                self.assertTrue(np.isnan(te[1]), 'no trailing edge at %g, found %g' % (le[0], te[1]))
+                self.assertEqual(behind, [])
+            else:
+                self.assertAlmostEqual(te[1], expected, delta = TOLERANCE)
+                self.assertAlmostEqual(te[1], max(behind), delta = TOLERANCE) # the nearest one behind
+
+            box = w.curves[4].GetBox()
+            x = box.MinX() + box.Width() * fraction
+            self.assertAlmostEqual(angle, ProbeAngle(w, fraction), delta = TOLERANCE)
+            self.assertAlmostEqual(angle, min(GetCrossings(angle_pts_list, x)) - min_angle_y, delta = TOLERANCE) # the lowest one
+
+    def test_straight_edges(self):
+        le = [(0.0, 0.0), (1000.0, -80.0)]
+        te = [(0.0, -250.0), (500.0, -220.0), (1000.0, -200.0)]
+        angle = [(0.0, 0.0), (50.0, 1.0), (100.0, 3.0)]
+        self.CheckWing(self.MakeWing(le, te, angle))
+
+    def test_trailing_edge_going_back_on_itself(self):
+        # the trailing edge's x goes back, so lines behind some of the leading edge cross it three times
+        le = [(0.0, 0.0), (300.0, -10.0), (1000.0, -60.0)]
+        te = [(0.0, -250.0), (450.0, -240.0), (350.0, -200.0), (650.0, -190.0), (600.0, -150.0), (1000.0, -140.0)]
+        angle = [(0.0, 0.0), (100.0, 3.0)]
+        self.CheckWing(self.MakeWing(le, te, angle))
+
+    def test_trailing_edge_with_a_gap(self):
+        # no trailing edge behind the leading edge from 400 to 500, or more than 1000mm behind it
+        le = [(0.0, 0.0), (1000.0, 0.0)]
+        te = [(0.0, -250.0), (400.0, -250.0), (400.0, -1200.0), (500.0, -1200.0), (500.0, -250.0), (1000.0, -200.0)]
+        angle = [(0.0, 0.0), (100.0, 2.0)]
+        self.CheckWing(self.MakeWing(le, te, angle))
+
+    def test_angle_graph_going_back_on_itself(self):
+        # several crossings of the angle graph, the lowest is used, measured from the graph's lowest point
+        le = [(0.0, 0.0), (1000.0, -50.0)]
+        te = [(0.0, -250.0), (1000.0, -180.0)]
+        angle = [(0.0, 1.0), (60.0, 4.0), (30.0, 2.0), (80.0, 0.5), (70.0, 5.0), (100.0, 6.0)]
+        self.CheckWing(self.MakeWing(le, te, angle))
+
+if __name__ == '__main__':
+    unittest.main()
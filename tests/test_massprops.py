@@ -0,0 +1,84 @@
+# checks the volume, centroid and inertia massprops works out for solids whose answers are known,
+# and the part of a solid inside the prisms of a pattern's cells
+
+import os
+import sys
+import unittest
+import numpy as np
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import massprops
+
+def MakeBox(size, offset = (0.0, 0.0, 0.0)):
+    # a closed box facing outwards, two triangles on each face
+    corners = np.array([(x, y, z) for z in (0, 1) for y in (0, 1) for x in (0, 1)], dtype = float) * size + offset
+    quads = [(0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4), (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5)]
+    triangles = []
+    for a, b, c, d in quads:
+        triangles.append(corners[[a, b, c]])
+        triangles.append(corners[[a, c, d]])
+    return np.array(triangles)
+
+def MakeTetrahedron():
+    p = np.array([(0, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 1)], dtype = float)
+    return p[[(0, 2, 1), (0, 1, 3), (0, 3, 2), (1, 2, 3)]]
+
+class MassTest(unittest.TestCase):
+    def test_unit_cube(self):
+        m = massprops.GetMassProperties([MakeBox(1.0)])
+        self.assertAlmostEqual(m.volume, 1.0)
+        self.assertAlmostEqual(m.area, 6.0)
+        self.assertAlmostEqual(m.GetMass(), massprops.DENSITY / 1000.0)
+        np.testing.assert_allclose(m.GetCentroid(), [0.5, 0.5, 0.5])
+        # a cube of side 1 has m / 6 about each axis through its centre
+        np.testing.assert_allclose(m.GetInertia(), np.identity(3) * m.GetMass() / 6.0, atol = 1e-12)
+
+    def test_tetrahedron(self):
+        m = massprops.GetMassProperties([MakeTetrahedron()])
+        self.assertAlmostEqual(m.volume, 1.0 / 6.0)
+        np.testing.assert_allclose(m.GetCentroid(), [0.25, 0.25, 0.25])
+        # the integrals of x x and x y over it are 1 / 60 and 1 / 120, less the volume times the centroid's
+        expected = np.full((3, 3), 1.0 / 480.0)
+        np.fill_diagonal(expected, 1.0 / 80.0)
+        np.testing.assert_allclose(m.GetInertia(1000.0), expected, atol = 1e-12)
+
+    def test_far_from_origin_and_inside_out(self):
+        m = massprops.GetMassProperties([MakeBox(2.0, (1e6, -1e6, 5e5))[:, ::-1]])
+        self.assertAlmostEqual(m.volume, 8.0, places = 6)
+        np.testing.assert_allclose(m.GetCentroid(), [1e6 + 1.0, -1e6 + 1.0, 5e5 + 1.0])
+        np.testing.assert_allclose(m.GetInertia(1000.0), np.identity(3) * 8.0 * 8.0 / 12.0, atol = 1e-6)
+
+    def test_report_has_no_negative_zeros(self):
+        report = massprops.GetMassProperties([MakeBox(1.0, (-0.5, -0.5, -0.5))]).GetReport('cube')
+        self.assertNotIn('-0.0', report)
+
+class CellTest(unittest.TestCase):
+    def test_box_less_cells(self):
+        box = MakeBox(10.0)
+        whole = massprops.GetMassProperties([box])
+        # a square, drawn clockwise, and a triangle, both right through the box
+        cells = [np.array([(2, 3), (2, 7), (5, 7), (5, 3)], dtype = float), np.array([(6, 1), (9, 1), (6, 9)], dtype = float)]
+        inside = massprops.GetCellMassProperties([box], cells, whole.origin)
+        self.assertAlmostEqual(inside.volume, 120.0 + 120.0)
+        np.testing.assert_allclose(inside.GetCentroid(), [(3.5 + 7.0) * 0.5, (5.0 + 11.0 / 3.0) * 0.5, 5.0])
+        left = whole.Subtract(inside)
+        self.assertAlmostEqual(left.volume, 1000.0 - 240.0)
+        np.testing.assert_allclose(left.GetCentroid() * left.volume + inside.GetCentroid() * inside.volume, whole.GetCentroid() * 1000.0)
+        self.assertNotIn('surface area', left.GetReport('left'))
+
+    def test_cell_partly_outside(self):
+        # a sloping top, z = x, so the column under each triangle has a sloping top too
+        box = MakeBox(10.0)
+        box[:, :, 2] = np.where(box[:, :, 2] > 0.0, box[:, :, 0], 0.0)
+        whole = massprops.GetMassProperties([box])
+        self.assertAlmostEqual(whole.volume, 500.0)
+        cells = [np.array([(5, -5), (15, -5), (15, 5), (5, 5)], dtype = float)]
+        inside = massprops.GetCellMassProperties([box], cells, whole.origin)
+        # x from 5 to 10, y from 0 to 5, under z = x
+        self.assertAlmostEqual(inside.volume, 5.0 * (100.0 - 25.0) * 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
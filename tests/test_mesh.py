@@ -0,0 +1,80 @@
+# checks the array backed Mesh builds the triangles the wing is made of, facing the right way,
+# with mirrored copies and without degenerate triangles, and that a whole wing's mesh is closed
+
+import os
+import sys
+import unittest
+import numpy as np
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from mesh import Mesh, RemoveDegenerateTriangles, MirrorTriangles
+import watertight
+import benchmark
+
+def GetNormals(triangles):
+    return np.cross(triangles[:,1] - triangles[:,0], triangles[:,2] - triangles[:,0])
+
+class MeshTest(unittest.TestCase):
+    def test_strip(self):
+        # two rows of 4 points along x, one above the other, make 6 triangles facing -y
+        pts0 = np.array([(x, 0.0, 0.0) for x in range(0, 4)], dtype = float)
+        pts1 = pts0 + (0.0, 0.0, 1.0)
+        mesh = Mesh()
+        mesh.AddStrip(pts0, pts1)
+        triangles = mesh.GetTriangles()
+        self.assertEqual(triangles.shape, (6, 3, 3))
+        normals = GetNormals(triangles)
+        np.testing.assert_allclose(normals / np.linalg.norm(normals, axis = 1)[:,None], np.tile((0.0, -1.0, 0.0), (6, 1)))
+        self.assertAlmostEqual(np.linalg.norm(normals, axis = 1).sum() * 0.5, 3.0)
+
+    def test_fan(self):
+        mesh = Mesh()
+        mesh.AddFan([(0, 0), (2, 0), (2, 1), (0, 1)], 5.0)
+        triangles = mesh.GetTriangles()
+        self.assertEqual(len(triangles), 2)
+        self.assertTrue(np.all(triangles[:,:,2] == 5.0))
+        self.assertAlmostEqual(GetNormals(triangles)[:,2].sum() * 0.5, -2.0) # facing down, for the bottom of a solid
+
+    def test_mirror(self):
+        t = np.array([[(1, 0, 0), (2, 0, 0), (1, 1, 0)]], dtype = float)
+        mesh = Mesh()
+        mesh.AddTriangles(t, True)
+        triangles = mesh.GetTriangles()
+        self.assertEqual(len(triangles), 2)
+        np.testing.assert_array_equal(triangles[1], MirrorTriangles(t)[0])
+        self.assertTrue(np.all(triangles[1,:,0] <= 0.0))
+        # mirroring in x turns the normal's x round, the others stay the same, so it still faces out
+        normals = GetNormals(triangles)
+        np.testing.assert_allclose(normals[1], normals[0] * (-1.0, 1.0, 1.0))
+
+    def test_degenerate_removed(self):
+        good = [(0, 0, 0), (1, 0, 0), (0, 1, 0)]
+        triangles = np.array([good, [(0, 0, 0), (0, 0, 0), (1, 1, 1)], [(0, 0, 0), (1, 1, 1), (1, 1, 1)], [(2, 2, 2), (3, 3, 3), (2, 2, 2)]], dtype = float)
+        kept = RemoveDegenerateTriangles(triangles)
+        np.testing.assert_array_equal(kept, [good])
+        # straight, but with three different points, is kept, as it joins up points along a straight edge
+        straight = np.array([[(0, 0, 0), (1, 0, 0), (2, 0, 0)]], dtype = float)
+        self.assertEqual(len(RemoveDegenerateTriangles(straight)), 1)
+
+    def test_chunks_match_triangles(self):
+        mesh = Mesh()
+        mesh.AddStrip([(0, 0, 0), (1, 0, 0), (1, 0, 0)], [(0, 0, 1), (1, 0, 1), (2, 0, 1)])
+        mesh.AddFan([(0, 0), (1, 0), (0, 1)], 0.0, True)
+        other = Mesh()
+        other.AddMesh(mesh)
+        chunks = np.concatenate(list(other.GetChunks()))
+        np.testing.assert_array_equal(chunks, mesh.GetTriangles())
+        self.assertEqual(mesh.NumTriangles(), 3 + 2) # one of the strip's triangles has two points the same
+
+    def test_wing_is_closed(self):
+        for mirror in (False, True):
+            w = benchmark.MakeWing(60, 8)
+            w.mirror = mirror
+            check = watertight.CheckTriangles(w.GetStage('wing_mesh').GetTriangles())
+            self.assertTrue(check.IsWatertight(), check.GetSummary())
+
+if __name__ == '__main__':
+    unittest.main()
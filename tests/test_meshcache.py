@@ -0,0 +1,127 @@
+# checks the keys of the cache on disk stay the same for the same wing, and change with what each stage is made from,
+# and that entries are saved, read back, and the least recently used deleted when the cache is too big
+
+import os
+import sys
+import tempfile
+import unittest
+import numpy as np
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import meshcache
+import wing
+import benchmark
+from backend import cad
+from backend import geom
+from mesh import Mesh
+
+class KeyTest(unittest.TestCase):
+    def test_parts(self):
+        self.assertEqual(meshcache.GetKey(['wing_mesh', b'\x00\x01', 'x']), meshcache.GetKey(['wing_mesh', b'\x00\x01', 'x']))
+        # the lengths are hashed too, so moving the join between parts makes a different key
+        self.assertNotEqual(meshcache.GetKey(['ab', 'c']), meshcache.GetKey(['a', 'bc']))
+        self.assertNotEqual(meshcache.GetKey(['a']), meshcache.GetKey(['a', '']))
+
+    def test_same_wing_same_keys(self):
+        a = benchmark.MakeWing(40, 4)
+        b = benchmark.MakeWing(40, 4)
+        a.CheckCurves()
+        b.CheckCurves()
+        for name in ('wing_mesh', 'export_mesh', 'pattern_area'):
+            self.assertEqual(a.GetStageKey(name), b.GetStageKey(name))
+
+    def test_property_changes_its_stages(self):
+        w = benchmark.MakeWing(40, 4)
+        w.CheckCurves()
+        before = dict([(name, w.GetStageKey(name)) for name in ('wing_mesh', 'export_mesh', 'pattern_area')])
+        w.pattern_wall += 0.5
+        self.assertEqual(w.GetStageKey('wing_mesh'), before['wing_mesh'])
+        self.assertEqual(w.GetStageKey('export_mesh'), before['export_mesh'])
+        self.assertNotEqual(w.GetStageKey('pattern_area'), before['pattern_area'])
+        w.export_stations = 30
+        self.assertEqual(w.GetStageKey('wing_mesh'), before['wing_mesh'])
+        self.assertNotEqual(w.GetStageKey('export_mesh'), before['export_mesh'])
+
+    def test_sketch_changes_every_stage(self):
+        w = benchmark.MakeWing(40, 4)
+        w.CheckCurves()
+        before = w.GetStageKey('wing_mesh')
+        sketch = cad.GetObjectFromId(cad.OBJECT_TYPE_SKETCH, w.sketch_ids[1])
+        area = sketch.GetArea()
+        curve = geom.Curve()
+        for p in wing.GetCurvePoints(area.GetCurves()[0])[0].tolist():
+            curve.Append(geom.Point(p[0], p[1] - 1.0))
+        moved = geom.Area()
+        moved.Append(curve)
+        sketch.SetArea(moved)
+        w.Invalidate('sketch_ids')
+        w.CheckCurves()
+        self.assertNotEqual(w.GetStageKey('wing_mesh'), before)
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.saved = (meshcache.enabled, meshcache.directory, meshcache.max_bytes, meshcache.num_bytes)
+        self.temp = tempfile.TemporaryDirectory()
+        meshcache.enabled = True
+        meshcache.directory = os.path.join(self.temp.name, 'cache')
+        meshcache.num_bytes = None
+
+    def tearDown(self):
+        meshcache.enabled, meshcache.directory, meshcache.max_bytes, meshcache.num_bytes = self.saved
+        self.temp.cleanup()
+
+    def test_save_and_load(self):
+        self.assertEqual(meshcache.Load('missing'), None)
+        arrays = {'a': np.arange(10.0), 'b': np.zeros((2, 3), dtype = int)}
+        meshcache.Save('key', arrays)
+        loaded = meshcache.Load('key')
+        self.assertEqual(sorted(loaded.keys()), ['a', 'b'])
+        np.testing.assert_array_equal(loaded['a'], arrays['a'])
+        self.assertEqual(loaded['b'].dtype, arrays['b'].dtype)
+
+    def test_oldest_deleted(self):
+        meshcache.max_bytes = 10 ** 9
+        for i in range(0, 4):
+            meshcache.Save('key%d' % i, {'a': np.zeros(1000)})
+            os.utime(meshcache.GetPath('key%d' % i), (1000 + i, 1000 + i))
+        meshcache.Load('key0') # now the most recently used
+        size = os.path.getsize(meshcache.GetPath('key0'))
+        self.assertEqual(meshcache.num_bytes, size * 4) # counted as they were saved
+        meshcache.max_bytes = size * 3 + size // 2
+        meshcache.Save('key4', {'a': np.zeros(1000)})
+        kept = sorted([name[:-4] for name in os.listdir(meshcache.directory)])
+        self.assertEqual(kept, ['key0', 'key3', 'key4'])
+        self.assertEqual(meshcache.num_bytes, size * 3)
+
+    def test_directory_only_listed_to_evict(self):
+        listed = []
+        listdir = os.listdir
+        def CountingListDir(path):
+            listed.append(path)
+            return listdir(path)
+        meshcache.max_bytes = 10 ** 9
+        meshcache.os.listdir = CountingListDir
+        try:
+            for i in range(0, 10):
+                meshcache.Save('key%d' % i, {'a': np.zeros(10)})
+        finally:
+            meshcache.os.listdir = listdir
+        self.assertEqual(len(listed), 1) # only to count what was there before the first save
+
+    def test_mesh_and_stations(self):
+        mesh = Mesh()
+        mesh.AddTriangles(np.arange(18.0).reshape(2, 3, 3))
+        mesh.AddTriangles(np.arange(9.0).reshape(1, 3, 3) + 1.0, True)
+        stations = {(0.5, 10): np.ones((10, 3)), (0.0, 10): np.zeros((10, 3))}
+        loaded_stations = {}
+        loaded = meshcache.ArraysToMesh(meshcache.MeshToArrays(mesh, stations), loaded_stations)
+        np.testing.assert_array_equal(loaded.GetTriangles(), mesh.GetTriangles())
+        self.assertEqual(sorted(loaded_stations.keys()), sorted(stations.keys()))
+        for key in stations:
+            np.testing.assert_array_equal(loaded_stations[key], stations[key])
+
+if __name__ == '__main__':
+    unittest.main()
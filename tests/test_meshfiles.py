@@ -0,0 +1,97 @@
+# checks OBJ, PLY and 3MF files read back as the triangles written, with the points of neighbouring triangles welded,
+# and that STL files are chosen for unknown extensions
+
+import os
+import re
+import sys
+import zipfile
+import tempfile
+import unittest
+import numpy as np
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import meshfiles
+
+def ReadObj(path):
+    vertices = []
+    faces = []
+    for line in open(path):
+        parts = line.split()
+        if len(parts) > 0 and parts[0] == 'v':
+            vertices.append([float(v) for v in parts[1:4]])
+        elif len(parts) > 0 and parts[0] == 'f':
+            faces.append([int(i) - 1 for i in parts[1:4]])
+    return np.array(vertices), np.array(faces)
+
+def ReadPly(path):
+    data = open(path, 'rb').read()
+    end = data.index(b'end_header\n') + len(b'end_header\n')
+    header = data[:end].decode('ascii')
+    num_vertices = int(re.search(r'element vertex (\d+)', header).group(1))
+    num_faces = int(re.search(r'element face (\d+)', header).group(1))
+    vertices = np.frombuffer(data, dtype = '<f4', count = num_vertices * 3, offset = end).reshape(-1, 3)
+    records = np.frombuffer(data, dtype = [('count', 'u1'), ('indices', '<u4', 3)], count = num_faces, offset = end + num_vertices * 12)
+    assert np.all(records['count'] == 3)
+    return vertices.astype(float), records['indices'].astype(int)
+
+def Read3mf(path):
+    z = zipfile.ZipFile(path)
+    assert '[Content_Types].xml' in z.namelist() and '_rels/.rels' in z.namelist()
+    model = z.read('3D/3dmodel.model').decode('utf-8')
+    z.close()
+    vertices = [[float(v) for v in m] for m in re.findall(r'<vertex x="([^"]+)" y="([^"]+)" z="([^"]+)"/>', model)]
+    faces = [[int(i) for i in m] for m in re.findall(r'<triangle v1="(\d+)" v2="(\d+)" v3="(\d+)"/>', model)]
+    return np.array(vertices), np.array(faces)
+
+READERS = {'obj': ReadObj, 'ply': ReadPly, '3mf': Read3mf}
+
+def MakeStrip():
+    # two rows of points, made into triangles a block at a time, as the wing's neighbouring stations are
+    pts0 = np.array([(x, 0.0, 0.0) for x in range(0, 5)])
+    pts1 = pts0 + (0.0, 0.5, 1.25)
+    triangles = []
+    for i in range(0, 4):
+        triangles.append((pts1[i + 1], pts0[i], pts0[i + 1]))
+        triangles.append((pts1[i], pts0[i], pts1[i + 1]))
+    triangles = np.array(triangles)
+    return [triangles[:3], triangles[3:]]
+
+class MeshFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trips(self):
+        blocks = MakeStrip()
+        triangles = np.concatenate(blocks)
+        for format, reader in READERS.items():
+            path = os.path.join(self.directory.name, 'strip.' + format)
+            written = meshfiles.WriteTriangles(path, blocks)
+            vertices, faces = reader(path)
+            self.assertEqual(len(vertices), 10, format) # each point once, across the blocks
+            self.assertEqual(written.num_triangles, 8)
+            self.assertEqual(written.num_bytes, os.path.getsize(path))
+            np.testing.assert_allclose(vertices[faces], triangles, atol = 1e-6, err_msg = format)
+
+    def test_weld_blocks(self):
+        blocks = MakeStrip()
+        vertices, faces = meshfiles.WeldBlocks(blocks + [np.zeros((0, 3, 3))])
+        self.assertEqual(len(vertices), 10)
+        np.testing.assert_array_equal(vertices[faces], np.concatenate(blocks))
+        # -0.0 and 0.0 are the same point, as they are on the middle of a mirrored wing
+        vertices, faces = meshfiles.WeldTriangles(np.array([[(0.0, 0, 0), (1, 0, 0), (0, 1, 0)], [(-0.0, 0, 0), (0, 1, 0), (-1, 0, 0)]]))
+        self.assertEqual(len(vertices), 4)
+
+    def test_format(self):
+        self.assertEqual(meshfiles.GetFormat('a/wing.OBJ'), 'obj')
+        self.assertEqual(meshfiles.GetFormat('wing.3mf'), '3mf')
+        self.assertEqual(meshfiles.GetFormat('wing.txt'), 'stl')
+        self.assertEqual(meshfiles.GetFormat('wing'), 'stl')
+
+if __name__ == '__main__':
+    unittest.main()
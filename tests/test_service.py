@@ -0,0 +1,92 @@
+# checks the service refuses to start on the socket of one which is running, takes over a socket left by one which wasn't stopped,
+# and stops quietly while a client is still connected
+
+import os
+import sys
+import socket
+import asyncio
+import logging
+import tempfile
+import threading
+import unittest
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import service
+
+class ErrorCounter(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self, logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+@unittest.skipUnless(service.available, 'needs shared memory and Unix sockets')
+class ServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'service.sock')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def Start(self):
+        errors = []
+        def Run():
+            try:
+                asyncio.run(service.Server(self.path, processes = 1).Serve())
+            except Exception as e:
+                errors.append(e)
+        thread = threading.Thread(target = Run)
+        thread.start()
+        for i in range(0, 500):
+            if service.IsRunning(self.path) or not thread.is_alive():
+                break
+            thread.join(0.01)
+        return thread, errors
+
+    def test_stale_socket_is_replaced(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path) # left behind, nothing listening
+        sock.close()
+        thread, errors = self.Start()
+        try:
+            self.assertEqual(service.SendRequest(('stats',), self.path)['entries'], 0)
+        finally:
+            service.SendRequest(('stop',), self.path)
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_running_service_is_kept(self):
+        thread, errors = self.Start()
+        try:
+            with self.assertRaises(service.AlreadyRunning):
+                asyncio.run(service.Server(self.path, processes = 1).Serve())
+            self.assertEqual(service.SendRequest(('stats',), self.path)['entries'], 0)
+        finally:
+            service.SendRequest(('stop',), self.path)
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_stop_with_client_connected(self):
+        counter = ErrorCounter()
+        logging.getLogger('asyncio').addHandler(counter)
+        thread, errors = self.Start()
+        idle = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            idle.connect(self.path)
+            service.SendRequest(('stop',), self.path)
+            thread.join(30.0)
+        finally:
+            idle.close()
+            thread.join()
+            logging.getLogger('asyncio').removeHandler(counter)
+        self.assertEqual(errors, [])
+        self.assertEqual(counter.count, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# checks the pieces slabs cuts a closed mesh into are closed too, with caps which fill the cuts without zero area triangles
+
+import os
+import sys
+import tempfile
+import unittest
+import numpy as np
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import slabs
+import polygons
+import watertight
+import benchmark
+
+def MakeGridBox(size, num):
+    # a closed box from 0, 0, 0 to size, its faces split into num by num squares, so the cuts go through points in straight lines
+    sx, sy, sz = size
+    faces = [
+        ((0, 0, 0), (0, sy, 0), (sx, 0, 0)), # bottom, each is a corner and two edges, going round the outward normal
+        ((0, 0, sz), (sx, 0, 0), (0, sy, 0)), # top
+        ((0, 0, 0), (sx, 0, 0), (0, 0, sz)), # front
+        ((0, sy, 0), (0, 0, sz), (sx, 0, 0)), # back
+        ((0, 0, 0), (0, 0, sz), (0, sy, 0)), # left
+        ((sx, 0, 0), (0, sy, 0), (0, 0, sz)), # right
+    ]
+    triangles = []
+    for o, u, v in faces:
+        o = np.array(o, dtype = float)
+        u = np.array(u, dtype = float) / num
+        v = np.array(v, dtype = float) / num
+        for i in range(0, num):
+            for j in range(0, num):
+                p00 = o + u * i + v * j
+                triangles.append((p00, p00 + u, p00 + u + v))
+                triangles.append((p00, p00 + u + v, p00 + v))
+    return np.array(triangles)
+
+def CountZeroArea(triangles):
+    normals = np.cross(triangles[:,1] - triangles[:,0], triangles[:,2] - triangles[:,0])
+    return int(np.count_nonzero(~np.any(normals, axis = 1)))
+
+class SlabTest(unittest.TestCase):
+    def CheckPieces(self, triangles, num):
+        minx = triangles[:,:,0].min()
+        maxx = triangles[:,:,0].max()
+        volume = 0.0
+        for x0, x1 in slabs.GetSlabs(minx, maxx, num):
+            piece = slabs.CutSlab(triangles, x0, x1)
+            check = watertight.CheckTriangles(piece)
+            self.assertTrue(check.IsWatertight(), '%g to %g: %s' % (x0, x1, check.GetSummary()))
+            volume += check.volume
+        self.assertAlmostEqual(volume, watertight.GetSignedVolume(triangles), delta = 1e-6 * abs(volume))
+
+    def test_box_through_its_points(self):
+        # each cut goes along lines of points, which used to be joined up with zero area triangles
+        triangles = MakeGridBox((100.0, 40.0, 20.0), 4)
+        self.CheckPieces(triangles, 4)
+        _, cuts = slabs.ClipTriangles(triangles, 50.0, True)
+        caps = slabs.CapCut(cuts)
+        self.assertEqual(CountZeroArea(caps), 0)
+        self.assertAlmostEqual(np.linalg.norm(np.cross(caps[:,1] - caps[:,0], caps[:,2] - caps[:,0]), axis = 1).sum() * 0.5, 40.0 * 20.0)
+
+    def test_box_between_its_points(self):
+        self.CheckPieces(MakeGridBox((100.0, 40.0, 20.0), 4), 3)
+
+    def test_wing(self):
+        # the benchmark wing's closed trailing edge makes points only rounding apart in the cuts
+        w = benchmark.MakeWing(100, 20)
+        self.CheckPieces(w.GetStage('export_mesh').GetTriangles(), 4)
+
+    def test_written_pieces_are_checked(self):
+        triangles = MakeGridBox((100.0, 40.0, 20.0), 4)
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, 'piece%d.stl' % i) for i in range(0, 3)]
+            writers = slabs.WritePieces(triangles, slabs.GetSlabs(0.0, 100.0, 3), paths, 1)
+            for writer in writers:
+                self.assertTrue(writer.check.IsWatertight(), writer.check.GetSummary())
+                self.assertEqual(os.path.getsize(writer.path), writer.num_bytes)
+
+    def test_triangulate_spike_and_straight_edges(self):
+        # a square with a point half way along one edge, and a spike out and back from a corner
+        pts = np.array([(0, 0), (1, 0), (2, 0), (3, -1), (2, 0), (2, 2), (0, 2)], dtype = float)
+        triangles = polygons.Triangulate(pts)
+        self.assertEqual(len(triangles), 3)
+        t = pts[triangles]
+        cross = polygons.Cross(t[:,0].T, t[:,1].T, t[:,2])
+        self.assertTrue(np.all(cross > 0.0))
+        self.assertAlmostEqual(cross.sum() * 0.5, 4.0)
+        self.assertNotIn(3, triangles)
+
+if __name__ == '__main__':
+    unittest.main()
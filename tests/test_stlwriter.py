@@ -0,0 +1,73 @@
+# checks streamed STL files read back as the triangles written, a block at a time,
+# with the number of triangles filled in to the header when the file is closed
+
+import os
+import sys
+import struct
+import tempfile
+import unittest
+import numpy as np
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import stlwriter
+
+def ReadStl(path):
+    # returns the number of triangles in the header and the records
+    data = open(path, 'rb').read()
+    return struct.unpack('<I', data[80:84])[0], np.frombuffer(data[84:], dtype = stlwriter.RECORD_TYPE)
+
+def MakeTriangles(n, seed):
+    return np.random.default_rng(seed).uniform(-100.0, 100.0, (n, 3, 3))
+
+class StlWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'test.stl')
+        self.block_size = stlwriter.BLOCK_SIZE
+
+    def tearDown(self):
+        stlwriter.BLOCK_SIZE = self.block_size
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        triangles = MakeTriangles(10, 1)
+        writer = stlwriter.WriteStl(self.path, triangles)
+        num_triangles, records = ReadStl(self.path)
+        self.assertEqual(num_triangles, 10)
+        self.assertEqual(writer.num_triangles, 10)
+        self.assertEqual(writer.num_bytes, os.path.getsize(self.path))
+        self.assertEqual(writer.num_bytes, 84 + 50 * 10)
+        np.testing.assert_allclose(records['points'], triangles, rtol = 1e-6)
+        normals = np.cross(triangles[:,1] - triangles[:,0], triangles[:,2] - triangles[:,0])
+        np.testing.assert_allclose(records['normal'], normals / np.linalg.norm(normals, axis = 1)[:,None], atol = 1e-6)
+
+    def test_header_filled_in_on_close(self):
+        # several arrays, some bigger than a block, so they're split
+        stlwriter.BLOCK_SIZE = 7
+        blocks = [MakeTriangles(n, n) for n in (3, 0, 20, 7)]
+        with stlwriter.StlWriter(self.path) as writer:
+            for triangles in blocks:
+                writer.AddTriangles(triangles)
+            writer.file.flush()
+            self.assertEqual(ReadStl(self.path)[0], 0) # not filled in until it's closed
+        num_triangles, records = ReadStl(self.path)
+        self.assertEqual(num_triangles, 30)
+        self.assertEqual(len(records), 30)
+        np.testing.assert_allclose(records['points'], np.concatenate(blocks), rtol = 1e-6)
+        self.assertEqual(writer.num_bytes, os.path.getsize(self.path))
+
+    def test_degenerate_normal(self):
+        stlwriter.WriteStl(self.path, [[(0, 0, 0), (1, 1, 1), (2, 2, 2)]])
+        self.assertTrue(np.all(ReadStl(self.path)[1]['normal'] == 0.0))
+
+    def test_empty(self):
+        writer = stlwriter.WriteStl(self.path, np.zeros((0, 3, 3)))
+        self.assertEqual(ReadStl(self.path)[0], 0)
+        self.assertEqual(os.path.getsize(self.path), 84)
+        self.assertEqual(writer.num_bytes, 84)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# checks a sweep groups the variants which can share their wing mesh and outline, and exports every variant
+
+import os
+import sys
+import csv
+import tempfile
+import unittest
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import sweep
+import benchmark
+
+class SweepTest(unittest.TestCase):
+    def setUp(self):
+        self.wing = benchmark.MakeWing(30, 3)
+        self.wing.split_into_pieces = 0
+        self.definition = self.wing.GetDefinition()
+
+    def test_groups(self):
+        # the pattern's wall doesn't change the wing nor its outline, the washout and pattern border do
+        grid = {'pattern_wall': ['1.5', '2.0'], 'washout': [0.0, 2.0]}
+        keys = [sweep.GetSharedKey(sweep.ApplyOverrides(self.definition, v)) for v in sweep.GetVariants(grid)]
+        self.assertEqual(len(keys), 4)
+        self.assertEqual(len(set(keys)), 2)
+        border = sweep.ApplyOverrides(self.definition, {'pattern_border': '8'})
+        self.assertNotIn(sweep.GetSharedKey(border), keys)
+
+    def test_run(self):
+        grid = {'pattern_wall': ['1.5', '2.0'], 'washout': [0.0, 2.0]}
+        with tempfile.TemporaryDirectory() as directory:
+            rows = sweep.RunSweep(self.wing, grid, directory, 1)
+            self.assertEqual(len(rows), 4)
+            for row in rows:
+                self.assertFalse(row.get('error'), row.get('error'))
+                self.assertTrue(os.path.isfile(os.path.join(directory, row['variant'], 'wing.stl')))
+                self.assertGreater(row['triangles'], 0)
+            groups = dict([((row['washout']), row['group']) for row in rows])
+            for row in rows:
+                self.assertEqual(row['group'], groups[row['washout']]) # the same washout, the same group
+            self.assertEqual(len(set(groups.values())), 2)
+            # a thicker wall leaves smaller cells
+            areas = dict([((row['pattern_wall'], row['washout']), row['pattern_area']) for row in rows])
+            self.assertLess(areas[('2.0', 0.0)], areas[('1.5', 0.0)])
+            with open(os.path.join(directory, 'sweep.csv')) as f:
+                self.assertEqual(len(list(csv.DictReader(f))), 4)
+
+    def test_overrides(self):
+        self.assertEqual(sweep.ApplyOverrides(self.definition, {'mirror': 'false'})['properties']['mirror'], False)
+        self.assertEqual(sweep.ApplyOverrides(self.definition, {'mirror': 'Yes'})['properties']['mirror'], True)
+        self.assertEqual(sweep.ApplyOverrides(self.definition, {'pattern_wall': '2'})['properties']['pattern_wall'], 2.0)
+        for overrides in ({'mirror': 'maybe'}, {'no_such_property': '1'}, {'washout': -1.0}):
+            with self.assertRaises(ValueError):
+                sweep.ApplyOverrides(self.definition, overrides)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+# checks the sections to make templates of are read from the property, or refused with a message,
+# and that flattening a strip keeps the lengths of its triangles' edges
+
+import os
+import sys
+import unittest
+import numpy as np
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import templates
+
+class SectionsTest(unittest.TestCase):
+    def test_sections(self):
+        self.assertEqual(templates.ParseSections('', 4), [0, 1, 2, 3])
+        self.assertEqual(templates.ParseSections('1-3, 9', 10), [0, 1, 2, 8])
+        self.assertEqual(templates.ParseSections(' 2, 2,,3 ', 4), [1, 2])
+
+    def test_refused(self):
+        for text in ['abc', '3-1', '0', '5', '1-5', '1-', '2.5']:
+            with self.assertRaises(ValueError, msg = text) as raised:
+                templates.ParseSections(text, 4)
+            self.assertIn('"', str(raised.exception)) # says which part is wrong
+
+class FlattenTest(unittest.TestCase):
+    def test_lengths_kept(self):
+        # a strip round a quarter of a cylinder, twisted, so it isn't flat already
+        angles = np.linspace(0.0, np.pi * 0.5, 9)
+        pts0 = np.stack((np.zeros(9), np.cos(angles) * 50.0, np.sin(angles) * 50.0), axis = 1)
+        pts1 = np.stack((np.full(9, 30.0), np.cos(angles + 0.2) * 40.0, np.sin(angles + 0.2) * 40.0), axis = 1)
+        (a2, b2), = templates.FlattenStrips([(pts0, pts1)])
+        for p, q in ((pts0, a2), (pts1, b2)):
+            np.testing.assert_allclose(np.linalg.norm(np.diff(q, axis = 0), axis = 1), np.linalg.norm(np.diff(p, axis = 0), axis = 1))
+        np.testing.assert_allclose(np.linalg.norm(b2 - a2, axis = 1), np.linalg.norm(pts1 - pts0, axis = 1))
+        np.testing.assert_allclose(np.linalg.norm(b2[1:] - a2[:-1], axis = 1), np.linalg.norm(pts1[1:] - pts0[:-1], axis = 1))
+        self.assertAlmostEqual(np.concatenate((a2, b2)).min(), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
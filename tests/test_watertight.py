@@ -0,0 +1,111 @@
+# checks the problems watertight finds in small meshes made wrong on purpose, and that it repairs those it can
+
+import os
+import sys
+import unittest
+import numpy as np
+
+os.environ.setdefault('WINGS_BACKEND', 'numpy')
+os.environ['WINGS_CACHE'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import meshfiles
+import watertight
+
+def MakeTetrahedron(offset = (0.0, 0.0, 0.0)):
+    # a closed tetrahedron facing outwards, with a volume of 1/6
+    p = np.array([(0, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 1)], dtype = float) + offset
+    return p[[(0, 2, 1), (0, 1, 3), (0, 3, 2), (1, 2, 3)]]
+
+def MakePrism(num, height):
+    # a closed prism of a regular polygon of num sides, of radius 1, facing outwards, with fans on its ends
+    angles = np.arange(num) * 2.0 * np.pi / num
+    bottom = np.stack((np.cos(angles), np.sin(angles), np.zeros(num)), axis = 1)
+    top = bottom + (0.0, 0.0, height)
+    triangles = []
+    for i in range(0, num):
+        j = (i + 1) % num
+        triangles.append((bottom[i], bottom[j], top[j]))
+        triangles.append((bottom[i], top[j], top[i]))
+    for i in range(1, num - 1):
+        triangles.append((bottom[0], bottom[i + 1], bottom[i]))
+    for i in range(1, num - 1):
+        triangles.append((top[0], top[i], top[i + 1])) # the top is last, so it can be left off
+    return np.array(triangles)
+
+class CheckTest(unittest.TestCase):
+    def test_watertight(self):
+        check = watertight.CheckTriangles(MakeTetrahedron())
+        self.assertTrue(check.IsWatertight())
+        self.assertEqual(check.num_triangles, 4)
+        self.assertAlmostEqual(check.volume, 1.0 / 6.0)
+
+    def test_open(self):
+        check = watertight.CheckTriangles(MakeTetrahedron()[1:])
+        self.assertEqual(check.num_open_edges, 3)
+        self.assertEqual(check.num_non_manifold_edges, 0)
+        self.assertEqual(check.num_flipped_edges, 0)
+        self.assertFalse(check.IsWatertight())
+
+    def test_flipped(self):
+        triangles = MakeTetrahedron()
+        triangles[0] = triangles[0, ::-1]
+        check = watertight.CheckTriangles(triangles)
+        self.assertEqual(check.num_flipped_edges, 3)
+        self.assertEqual(check.num_open_edges, 0)
+        self.assertFalse(check.IsWatertight())
+
+    def test_inside_out(self):
+        check = watertight.CheckTriangles(MakeTetrahedron()[:, ::-1])
+        self.assertEqual(check.num_flipped_edges, 0)
+        self.assertTrue(check.IsInsideOut())
+        self.assertFalse(check.IsWatertight())
+        self.assertIn('inside out', check.GetSummary())
+
+    def test_non_manifold(self):
+        # two tetrahedra sharing only the edge from 0, 0, 0 to 0, 0, 1
+        other = MakeTetrahedron()
+        other[:, :, :2] *= -1.0 # turned half way round z, so still facing outwards
+        check = watertight.CheckTriangles(np.concatenate((MakeTetrahedron(), other)))
+        self.assertEqual(check.num_non_manifold_edges, 1)
+        self.assertEqual(check.num_open_edges, 0)
+        self.assertEqual(check.num_flipped_edges, 0)
+
+    def test_add(self):
+        check = watertight.CheckTriangles(MakeTetrahedron())
+        check.Add(watertight.CheckTriangles(MakeTetrahedron((5.0, 0.0, 0.0))[1:]))
+        self.assertEqual(check.num_triangles, 7)
+        self.assertEqual(check.num_open_edges, 3)
+
+class RepairTest(unittest.TestCase):
+    def test_fill_odd_end_face(self):
+        # a heptagonal prism without its top, which has an odd number of sides, so can't be filled with quads
+        prism = MakePrism(7, 2.0)
+        volume = watertight.GetSignedVolume(prism)
+        open_prism = prism[:-5]
+        vertices, faces = meshfiles.WeldTriangles(open_prism)
+        holes = watertight.GetHoles(vertices, faces)
+        self.assertEqual(len(holes), 1)
+        self.assertEqual(len(holes[0]), 7)
+        fill = watertight.FillHoles(vertices, faces)
+        self.assertEqual(len(fill), 5)
+        check = watertight.CheckTriangles(np.concatenate((open_prism, fill)))
+        self.assertTrue(check.IsWatertight(), check.GetSummary())
+        self.assertAlmostEqual(check.volume, volume)
+
+    def test_repair_inside_out(self):
+        # an open pentagonal prism, facing inwards
+        repaired = watertight.Repair(MakePrism(5, 1.0)[:-3][:, ::-1])
+        check = watertight.CheckTriangles(repaired)
+        self.assertTrue(check.IsWatertight(), check.GetSummary())
+
+    def test_repair_chunks(self):
+        broken = MakeTetrahedron((5.0, 0.0, 0.0))[1:]
+        check = watertight.MeshCheck()
+        chunks = list(watertight.RepairChunks([MakeTetrahedron(), broken], check))
+        self.assertEqual(check.num_open_edges, 3)
+        for chunk in chunks:
+            self.assertTrue(watertight.CheckTriangles(chunk).IsWatertight())
+
+if __name__ == '__main__':
+    unittest.main()
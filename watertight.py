@@ -0,0 +1,167 @@
+# checks a triangle mesh is a closed, consistently oriented solid before it's exported, so slicers don't fail on it,
+# and fills the holes it finds
+# the points are welded and each edge made into one integer, so the checks are a few sorts of big arrays
+
+import numpy as np
+import meshfiles
+import polygons
+from mesh import RemoveDegenerateTriangles
+
+class MeshCheck:
+    # the problems found in a mesh
+    def __init__(self):
+        self.num_triangles = 0
+        self.num_open_edges = 0 # edges of only one triangle, round holes
+        self.num_non_manifold_edges = 0 # edges of more than two triangles
+        self.num_flipped_edges = 0 # edges of two triangles which face opposite ways
+        self.num_zero_area = 0 # triangles with no area, these are allowed, as they join up straight edges
+        self.volume = 0.0 # the signed volume, negative if the triangles all face inwards
+
+    def Add(self, other):
+        # adds the problems found in another mesh, which shares no edges with this one
+        self.num_triangles += other.num_triangles
+        self.num_open_edges += other.num_open_edges
+        self.num_non_manifold_edges += other.num_non_manifold_edges
+        self.num_flipped_edges += other.num_flipped_edges
+        self.num_zero_area += other.num_zero_area
+        self.volume += other.volume
+
+    def IsInsideOut(self):
+        # every edge can agree with its neighbours, with the whole mesh facing inwards, such as from a profile drawn the other way round
+        return self.volume < 0.0
+
+    def IsWatertight(self):
+        return self.num_open_edges == 0 and self.num_non_manifold_edges == 0 and self.num_flipped_edges == 0 and not self.IsInsideOut()
+
+    def GetSummary(self):
+        # one line, for the properties and the export log
+        problems = []
+        for number, text in ((self.num_open_edges, 'open edges'), (self.num_non_manifold_edges, 'non-manifold edges'), (self.num_flipped_edges, 'flipped edges')):
+            if number > 0:
+                problems.append('%d %s' % (number, text))
+        if self.IsInsideOut():
+            problems.append('inside out')
+        summary = 'watertight' if len(problems) == 0 else ', '.join(problems)
+        if self.num_zero_area > 0:
+            summary += ', %d zero area triangles' % self.num_zero_area
+        return summary + ', %d triangles' % self.num_triangles
+
+def GetEdges(faces):
+    # the directed edges of the triangles, an array of shape (n * 3, 2), going round each triangle in turn
+    return np.stack((faces, np.roll(faces, -1, axis = 1)), axis = 2).reshape(-1, 2)
+
+def GetSignedVolume(t):
+    # the volume enclosed by triangles of shape (n, 3, 3), positive if they face outwards
+    # measured from their middle, so big coordinates don't lose the precision
+    t = t - t.reshape(-1, 3).mean(axis = 0)
+    return float(np.einsum('ij,ij->i', t[:,0], np.cross(t[:,1], t[:,2])).sum() / 6.0)
+
+def GetEdgeKeys(edges, num_vertices, directed):
+    a = edges[:,0].astype(np.int64)
+    b = edges[:,1].astype(np.int64)
+    if not directed:
+        a, b = np.minimum(a, b), np.maximum(a, b)
+    return a * num_vertices + b
+
+def CheckFaces(vertices, faces):
+    # returns a MeshCheck of triangles of indices into vertices
+    check = MeshCheck()
+    check.num_triangles = len(faces)
+    if len(faces) == 0:
+        return check
+    t = vertices[faces]
+    normals = np.cross(t[:,1] - t[:,0], t[:,2] - t[:,0])
+    check.num_zero_area = int(np.count_nonzero(~np.any(normals, axis = 1)))
+    check.volume = GetSignedVolume(t)
+
+    edges = GetEdges(faces)
+    edges = edges[edges[:,0] != edges[:,1]]
+    undirected, undirected_counts = np.unique(GetEdgeKeys(edges, len(vertices), False), return_counts = True)
+    check.num_open_edges = int(np.count_nonzero(undirected_counts == 1))
+    check.num_non_manifold_edges = int(np.count_nonzero(undirected_counts > 2))
+
+    # an edge of two triangles facing the same way is gone round the opposite way by each of them
+    directed, directed_counts = np.unique(GetEdgeKeys(edges, len(vertices), True), return_counts = True)
+    a = directed // len(vertices)
+    b = directed % len(vertices)
+    pair_counts = undirected_counts[np.searchsorted(undirected, np.minimum(a, b) * len(vertices) + np.maximum(a, b))]
+    check.num_flipped_edges = int(np.count_nonzero((directed_counts == 2) & (pair_counts == 2)))
+    return check
+
+def CheckTriangles(triangles):
+    # returns a MeshCheck of an array of triangles of shape (n, 3, 3)
+    vertices, faces = meshfiles.WeldTriangles(triangles)
+    return CheckFaces(vertices, faces)
+
+def GetHoles(vertices, faces):
+    # returns a list of arrays of vertex indices, one for each hole, going round it the way a triangle filling it would
+    edges = GetEdges(faces)
+    edges = edges[edges[:,0] != edges[:,1]]
+    keys = GetEdgeKeys(edges, len(vertices), False)
+    unique, inverse, counts = np.unique(keys, return_inverse = True, return_counts = True)
+    open_edges = edges[counts[inverse.reshape(-1)] == 1][:, ::-1]
+    next_edge = {}
+    for i, start in enumerate(open_edges[:,0].tolist()):
+        next_edge[start] = i
+    ends = open_edges[:,1].tolist()
+    used = np.zeros(len(open_edges), dtype = bool)
+    holes = []
+    for start in range(0, len(open_edges)):
+        if used[start]:
+            continue
+        loop = []
+        i = start
+        while i != None and not used[i]:
+            used[i] = True
+            loop.append(i)
+            i = next_edge.get(ends[i])
+        if i == start and len(loop) >= 3:
+            holes.append(open_edges[loop, 0])
+    return holes
+
+def TriangulateLoop(pts):
+    # returns triangles of indices into pts, of shape (n, 3), filling the loop of 3D points, going the same way round
+    # the loop is flattened onto the plane which fits it best, then ear clipped
+    pts = np.asarray(pts, dtype = float)
+    keep = np.nonzero(np.any(pts != np.roll(pts, 1, axis = 0), axis = 1))[0]
+    if len(keep) < 3:
+        return np.zeros((0, 3), dtype = int)
+    p = pts[keep]
+    centred = p - p.mean(axis = 0)
+    axes = np.linalg.svd(centred, full_matrices = False)[2]
+    flat = centred @ axes[:2].T
+    if len(polygons.RemoveZeroLengthEdges(flat)) == len(flat):
+        triangles = polygons.Triangulate(flat)
+    else:
+        triangles = np.zeros((0, 3), dtype = int)
+    if len(triangles) != len(flat) - 2:
+        # the flattened loop crosses itself, so fill it with a fan instead
+        i = np.arange(1, len(flat) - 1)
+        triangles = np.stack((np.zeros(len(i), dtype = int), i, i + 1), axis = 1)
+    return keep[triangles]
+
+def FillHoles(vertices, faces):
+    # returns triangles, of shape (n, 3, 3), filling the holes
+    fills = [np.zeros((0, 3, 3))]
+    for hole in GetHoles(vertices, faces):
+        fills.append(vertices[hole][TriangulateLoop(vertices[hole])])
+    return np.concatenate(fills)
+
+def Repair(triangles):
+    # returns the triangles with those with repeated points removed and the holes filled, all turned round if they face inwards
+    triangles = RemoveDegenerateTriangles(np.asarray(triangles, dtype = float).reshape(-1, 3, 3))
+    vertices, faces = meshfiles.WeldTriangles(triangles)
+    triangles = np.concatenate((triangles, FillHoles(vertices, faces)))
+    if len(triangles) > 0 and GetSignedVolume(triangles) < 0.0:
+        triangles = triangles[:, ::-1]
+    return triangles
+
+def RepairChunks(chunks, check):
+    # yields the arrays of triangles, each repaired if it isn't watertight, adding the problems found in them to check
+    # each array must be closed by itself, like the blocks of cells of an extruded pattern
+    for triangles in chunks:
+        chunk_check = CheckTriangles(triangles)
+        check.Add(chunk_check)
+        if not chunk_check.IsWatertight():
+            triangles = Repair(triangles)
+        yield triangles
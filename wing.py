@@ -1,25 +1,77 @@
-import cad
 import math
-import geom
+import numpy as np
 import tempfile
 import os
-from Object import Object
-from Object import PyProperty
+import threading
+import functools
+import traceback
+import hashlib
+import collections
+from backend import cad
+from backend import geom
+from backend import Object
+from backend import PyProperty
+from mesh import Mesh
+import lattice
+import profiling
+import stlwriter
+import meshfiles
+import glbuffer
+import meshcache
+import slabs
+import massprops
+import templates
+import watertight
+import polygons
 
 property_titles = ['leading edge', 'trailing edge', 'root profile', 'tip profile', 'angle graph']
 sketch_xml_names = ['LeadingEdge', 'TrailingEdge', 'RootProfile', 'TipProfile', 'AngleGraph']
 wing_for_tools = None
-DRAWING_MODE_RENDER = 0
+curve_index_names = ['leading_edge', 'trailing_edge', 'root_profile', 'tip_profile', 'angle_graph'] # in the order of the sketches
+property_names = ['mirror', 'centre_straight', 'render_wing', 'render_pattern', 'pattern_border', 'pattern_x_step', 'pattern_y_step', 'pattern_wall', 'split_into_pieces', 'split_wall_width', 'view_stations', 'view_samples', 'export_stations', 'export_samples', 'adaptive_stations', 'view_tolerance', 'adaptive_tolerance', 'template_sections']
 DRAWING_MODE_SKETCHES = 1
 DRAWING_MODE_TRIANGLES = 2
-DRAWING_MODE_STL = 3
-drawing_mode = DRAWING_MODE_RENDER
-stl_to_add_to = None
-section_index = None
+
+# the cached stages of making a wing, and the properties and stages each one is made from
+stage_dependencies = {
+    'curves': ['sketch_ids'],
+    'box': ['curves', 'mirror'],
+    'stations': ['curves', 'centre_straight'],
+    'wing_mesh': ['stations', 'mirror', 'view_stations', 'view_samples', 'adaptive_stations', 'view_tolerance'],
+    'export_mesh': ['stations', 'mirror', 'export_stations', 'export_samples', 'adaptive_stations', 'adaptive_tolerance'],
+    'solid': ['export_mesh'],
+    'shadow': ['solid'],
+    'outline': ['shadow', 'pattern_border'],
+    'pattern_area': ['outline', 'pattern_x_step', 'pattern_y_step', 'pattern_wall', 'split_into_pieces', 'split_wall_width'],
+    'pattern_mesh': ['pattern_area'],
+    'mesh_check': ['export_mesh'],
+    'checked_mesh': ['mesh_check'],
+    'mass': ['checked_mesh'],
+    'infill_mass': ['pattern_area', 'mass'],
+}
+
+ARC_SEGMENT_LENGTH = 0.5 # arcs in sketches are split into lines this long, in mm
+ADAPTIVE_LEVELS = 6 # the most times the adaptive stations are halved
+ADAPTIVE_MAX_STATIONS = 2000 # the adaptive stations stop being added when there are this many
+PREVIEW_STATIONS = 12 # the most stations of the quick preview drawn while a wing is first made in the background
+
+# set by WingsFrame, so edits don't freeze the window, the wing is remade on another thread while the old one is shown
+regenerate_in_background = False
+call_after = None # a function to call a function on the UI thread, such as wx.CallAfter
+results_made = None # called on the UI thread when results for the properties have been made in the background, so they're shown
+message_box = None # shows a message to the user, such as wx.MessageBox, else messages are printed
+background = threading.local() # background.generation is set on the thread remaking a wing, see Wing.CheckCancelled
 
 wings_dir = os.path.dirname(os.path.realpath(__file__))
 list_of_things_to_not_delete = []
 
+# the wing service is only imported when it's asked for, it needs a newer Python than the designer
+service = None
+if os.environ.get('WINGS_SERVICE', '') not in ('', '0'):
+    import service
+    if not service.enabled:
+        service = None # it can't run here
+
 type = 0
 
 class Wing(Object):
@@ -34,14 +86,36 @@ class Wing(Object):
         self.render_pattern = False
         self.pattern_border = 0.0
         self.pattern_x_step = 30.0
+        self.pattern_y_step = 30.0
         self.pattern_wall = 2.0
         self.split_into_pieces = 0
         self.split_wall_width = 0.0
+        self.view_stations = 0 # stations across the span drawn in the view, 0 for one at each vertex of the trailing edge
+        self.view_samples = 0 # points round each station drawn in the view, 0 for one at each vertex of the root profile
+        self.export_stations = 0 # the same for exported files
+        self.export_samples = 0
+        self.adaptive_stations = False # add stations where the wing changes quickly across the span
+        self.view_tolerance = 0.5 # how far, in mm, the wing drawn in the view may be from straight between adaptive stations
+        self.adaptive_tolerance = 0.1 # the same for exported files
+        self.template_sections = '' # the sections to make templates of, like '1-4, 9', empty for all of them
         self.color = cad.Color(128, 128, 128)
         self.draw_list = None
+        self.vertex_buffer = None # used instead of draw_list, if vertex buffers can be used
+        self.generation = 0 # counts the edits, so a mesh made in the background can be checked it's still wanted
+        self.drawn_generation = None # the generation draw_list or vertex_buffer shows, None for a preview or nothing
+        self.regenerating_generation = None # the generation last started in the background
+        self.finished_mesh = None # (generation, mesh) made in the background, waiting to be drawn
+        self.failed_generation = None # the generation whose mesh couldn't be made in the background, so is made on the UI thread
+        self.results_making = set() # the names of the stages being made in the background for the properties
         
         self.box = None  # if box is None, then the curves need reloading
+        self.curves_lock = threading.RLock()
         self.ResetCurves()
+        self.stations = {} # ordered section points, keyed by fraction along the trailing edge and number of samples
+        self.stages = {} # the results of the later stages, keyed by stage name, see stage_dependencies
+        self.stage_locks = {name: threading.Lock() for name in stage_dependencies} # so only one thread makes each stage
+        self.stats = profiling.Stats('Wing') # times and counts of remaking, when profiling is on
+        self.written_files = [] # what the last export wrote, with the checks of each file, for the export report
         
     def GetType(self):
         return type
@@ -62,22 +136,148 @@ class Wing(Object):
         self.curves = []
         for id in self.sketch_ids:
             self.curves.append(None)
+        self.root_profile = None
+        self.tip_profile = None
+        self.leading_edge = None
+        self.trailing_edge = None
+        self.angle_graph = None
             
     def KillGLLists(self):
         if self.draw_list:
             cad.DrawDeleteList(self.draw_list)
         self.draw_list = None
+        if self.vertex_buffer:
+            self.vertex_buffer.Delete()
+        self.vertex_buffer = None
+        self.drawn_generation = None
+        
+    def MeshChanged(self):
+        # the drawing is out of date, but is kept to be shown until the new mesh is ready
+        # any mesh being made in the background for an earlier generation is thrown away
+        self.generation += 1
+        if not regenerate_in_background:
+            self.KillGLLists()
                                             
-    def Recalculate(self):
-        self.KillGLLists()
+    def Invalidate(self, name):
+        # throws away only the stages made from the given property or stage
+        # the sketches are always read again, as one may have been edited since, without a property changing,
+        # an unchanged sketch gives the same curve, see GetCachedCurve, so only the stages of edited sketches are thrown away
+        stages = dict(self.stages)
+        for stage in GetDependentStages(name):
+            if stage == 'stations':
+                self.stations = {}
+            elif stage != 'curves' and stage != 'box':
+                stages.pop(stage, None)
+        self.stages = stages
         self.box = None
-        self.ResetCurves()
+        self.MeshChanged()
+        self.stats.Reset()
+        
+    def GetStage(self, name):
+        # returns the result of the named stage, making it if it isn't cached
+        # a stage made while Invalidate is called goes into the old dictionary, so isn't kept
+        # the curves are checked first, as reloading them throws away the stages
+        # a thread wanting a stage another thread is making waits for it, rather than making it again
+        self.CheckCurves()
+        stages = self.stages
+        if name not in stages:
+            with self.stage_locks[name]:
+                if name not in stages:
+                    with self.stats.Timer(name):
+                        stages[name] = self.MakeStage(name)
+        return stages[name]
+        
+    def MakeStage(self, name):
+        # makes the stage, or loads it from the cache on disk, if it has been made before from the same things,
+        # or gets it from the wing service, if there is one
+        if name in disk_stages and service != None and service.enabled:
+            arrays = service.Request(self.GetDefinition(), name)
+            if arrays != None:
+                return disk_stages[name][1](self, arrays)
+        if name not in disk_stages or not meshcache.enabled:
+            return stage_makers[name](self)
+        to_arrays, from_arrays = disk_stages[name]
+        key = self.GetStageKey(name)
+        arrays = meshcache.Load(key)
+        if arrays != None:
+            return from_arrays(self, arrays)
+        result = stage_makers[name](self)
+        if result != None:
+            meshcache.Save(key, to_arrays(self, result))
+        return result
+        
+    def GetStageKey(self, name):
+        # returns a hash of the sketches' geometry and the properties the stage is made from
+        parts = [name]
+        for dependency in stage_dependencies[name]:
+            if dependency in stage_dependencies:
+                parts.append(self.GetStageKey(dependency))
+            elif dependency == 'sketch_ids':
+                for curve in [self.leading_edge, self.trailing_edge, self.root_profile, self.tip_profile, self.angle_graph]:
+                    parts.append('none' if curve == None else curve.key)
+            else:
+                parts.append(repr(getattr(self, dependency)))
+        return meshcache.GetKey(parts)
+        
+    def CheckCurves(self):
+        # reloads the curves if they need it, only one thread at a time
+        # the sketches are only read on the UI thread, the background thread gives up, as the wing has been edited
+        with self.curves_lock:
+            if self.box == None:
+                if getattr(background, 'generation', None) != None:
+                    raise RegenerateCancelled()
+                with self.stats.Timer('SketchesToCurves'):
+                    self.SketchesToCurves()
+                self.CalculateBox()
         
     def SketchesToCurves(self):
+        old_curves = self.curves
+        self.curves = []
         for i in range(0, len(self.sketch_ids)):
-            self.curves[i] = GetCurveFromSketch(self.sketch_ids[i])
-        self.root_profile_invtm = GetTmFromCurve(self.curves[2])
-        self.tip_profile_invtm = GetTmFromCurve(self.curves[3])
+            self.curves.append(GetCurveFromSketch(self.sketch_ids[i]))
+        if self.curves[2] is not old_curves[2] or self.root_profile == None:
+            self.root_profile = MakeProfile(self.curves[2])
+        if self.curves[3] is not old_curves[3] or self.tip_profile == None:
+            self.tip_profile = MakeProfile(self.curves[3])
+        if self.curves[0] is not old_curves[0] or self.leading_edge == None:
+            self.leading_edge = MakeCurveIndex(self.curves[0])
+        if self.curves[1] is not old_curves[1] or self.trailing_edge == None:
+            self.trailing_edge = MakeCurveIndex(self.curves[1])
+        if self.curves[4] is not old_curves[4] or self.angle_graph == None:
+            self.angle_graph = MakeCurveIndex(self.curves[4])
+        for i in range(0, len(self.curves)):
+            if self.curves[i] is not old_curves[i]:
+                # a sketch has changed, so everything made from the curves needs remaking
+                self.stations = {}
+                self.stages = {}
+                self.MeshChanged()
+                break
+        
+    def GetDefinition(self):
+        # returns the wing's curves, already turned into arrays, and its properties, all of which can be pickled,
+        # so copies of the wing can be made in other processes with SetDefinition, without the sketches
+        self.CheckCurves()
+        properties = {}
+        for name in property_names:
+            properties[name] = getattr(self, name)
+        indices = []
+        for name in curve_index_names:
+            indices.append(getattr(self, name))
+        return {'indices': indices, 'properties': properties}
+        
+    def SetDefinition(self, definition):
+        # makes this wing from a definition from GetDefinition, its sketches aren't used
+        with self.curves_lock:
+            self.curves = []
+            for name, index in zip(curve_index_names, definition['indices']):
+                setattr(self, name, index)
+                self.curves.append(None if index == None else CurveFromPoints(index.pts))
+            for name, value in definition['properties'].items():
+                setattr(self, name, value)
+            self.stations = {}
+            self.stages = {}
+            self.MeshChanged()
+            self.CalculateBox()
         
     def CalculateBox(self):
         self.box = geom.Box3D()
@@ -89,155 +289,160 @@ class Wing(Object):
         if self.mirror:
             self.box.InsertPoint(-500.0, self.box.MaxY(), 0.0)
 
-    def GetUnitizedSectionPoints(self, tip_fraction):
-        # the start point will be geom.Point(0,0) and the last point will be geom.Point(1,0)
-        pts = []
-            
-        if self.curves[2] and self.curves[3]:
-            perim = self.curves[2].Perim()
-            cur_perim = 0.0
-            prev_v = None
-            
-            for v in self.curves[2].GetVertices():
-                if prev_v != None:
-                    span = geom.Span(prev_v.p, v, False)
-                    cur_perim += span.Length()
-                fraction = cur_perim / perim
-                root_point = GetUnitizedPoint(self.curves[2], fraction, self.root_profile_invtm, self.centre_straight and (tip_fraction < 0.01))
-                if root_point == None: return
-                tip_point = GetUnitizedPoint(self.curves[3], fraction, self.tip_profile_invtm, self.centre_straight and (tip_fraction < 0.01))
-                if tip_point == None: return
-                vec = tip_point - root_point
-                p = root_point + vec * tip_fraction
-                pts.append(p)
-                prev_v = v
-        return pts
-
-    def GetLeadingEdgePoint(self, fraction):
-        perim = self.curves[0].Perim()
-        return self.curves[0].PerimToPoint(perim * fraction)
-        
-    def GetTrailingEdgePoint(self, leading_edge_point):
-        backward_curve = geom.Curve()
-        backward_curve.Append(leading_edge_point)
-        backward_curve.Append(leading_edge_point + geom.Point(0, -1000.0))
-        pts = backward_curve.Intersections(self.curves[1])
-        if len(pts) == 0:
-            return None
-        return pts[0]
-        
-    def GetAngle(self, fraction):
-        if self.curves[4] == None:
-            return 0.0
-        box = self.curves[4].GetBox()
-        x = box.MinX() + box.Width() * fraction
-        curve = geom.Curve()
-        curve.Append(geom.Point(x, box.MinY() - 1.0))
-        curve.Append(geom.Point(x, box.MaxY() + 1.0))
-        pts = curve.Intersections(self.curves[4])
-        if len(pts) == 0: return 0.0
-        angle = pts[0].y - box.MinY()
-        return angle
-        
-    def GetOrderedSectionPoints(self, fraction):
-        leading_edge_p = self.GetLeadingEdgePoint(fraction)
-        if leading_edge_p == None: return
-        trailing_edge_p = self.GetTrailingEdgePoint(leading_edge_p)
-        if trailing_edge_p == None:
-            v = geom.Point(0,0)
-            length = 0.0
+    def GetUnitizedSectionPoints(self, tip_fraction, num_samples = 0):
+        # returns an array of points, the first point will be (0,0) and the last point will be (1,0)
+        # at the vertices of the root profile, or at num_samples points evenly spaced round it
+        if self.root_profile == None or self.tip_profile == None:
+            return np.zeros((0, 2))
+        
+        if num_samples > 1:
+            fractions = np.linspace(0.0, 1.0, num_samples)
         else:
-            v = trailing_edge_p - leading_edge_p
-            length = leading_edge_p.Dist(trailing_edge_p)
-        pts = self.GetUnitizedSectionPoints(fraction)
-        if pts == None: return
-        pts2 = []
-        a = self.GetAngle(fraction) * 0.01745329251994
-        for pt in pts:
-            pt.Rotate(a)
-            hpoint = leading_edge_p + v * pt.x
-            pts2.append(geom.Point3D(hpoint.x, hpoint.y, pt.y * length))
-        return pts2
-
-    def DrawSection(self, span):
-        if drawing_mode == DRAWING_MODE_SKETCHES:
-            global stl_to_add_to
-            stl_to_add_to = geom.Stl()
-            
-        perim = self.curves[1].Perim()
-        if perim < 0.001: return
-        fraction0 = self.curves[1].PointToPerim(span.p)/perim
-        fraction1 = self.curves[1].PointToPerim(span.v.p)/perim
-        pts0 = self.GetOrderedSectionPoints(fraction0)
-        if pts0 == None: return
-        pts1 = self.GetOrderedSectionPoints(fraction1)
-        if pts1 == None: return
-        
-        prev_p0 = None
-        prev_p1 = None
-        
-        if drawing_mode == DRAWING_MODE_SKETCHES:
-            mirror = False
+            fractions = self.root_profile.vertex_fractions
+        centre_straight = self.centre_straight and (tip_fraction < 0.01)
+        root_pts = self.root_profile.GetUnitizedPoints(fractions, centre_straight)
+        tip_pts = self.tip_profile.GetUnitizedPoints(fractions, centre_straight)
+        return root_pts + (tip_pts - root_pts) * tip_fraction
+
+    def GetLeadingEdgePoints(self, fractions):
+        # returns an array of points at the given fractions along the leading edge
+        return self.leading_edge.PerimToPoints(fractions)
+        
+    def GetTrailingEdgePoints(self, leading_edge_points):
+        # returns an array of the points on the trailing edge straight behind the leading edge points,
+        # the first ones found going back to 1000mm behind, or nan where there are none
+        leading_edge_points = np.asarray(leading_edge_points, dtype = float).reshape(-1, 2)
+        x = leading_edge_points[:,0]
+        y = leading_edge_points[:,1]
+        te_y = self.trailing_edge.GetYAtX(x, y - 1000.0, y, True)
+        return np.stack((x, te_y), axis = 1)
+        
+    def GetAngles(self, fractions):
+        # returns an array of the angles, in degrees, from the lowest point of the angle graph at each fraction across it
+        fractions = np.asarray(fractions, dtype = float)
+        if self.angle_graph == None:
+            return np.zeros(len(fractions))
+        graph = self.angle_graph
+        x = graph.minxy[0] + (graph.maxxy[0] - graph.minxy[0]) * fractions
+        y = graph.GetYAtX(x, np.full(len(x), graph.minxy[1] - 1.0), np.full(len(x), graph.maxxy[1] + 1.0), False)
+        return np.where(np.isnan(y), 0.0, y - graph.minxy[1])
+        
+    def GetOrderedSectionPoints(self, fraction, num_samples = 0):
+        return self.GetOrderedSectionPointsList([fraction], num_samples)[0]
+        
+    def GetOrderedSectionPointsList(self, fractions, num_samples = 0):
+        # returns a list of arrays of x, y, z points, one for each fraction
+        leading_edge_pts = self.GetLeadingEdgePoints(fractions)
+        trailing_edge_pts = self.GetTrailingEdgePoints(leading_edge_pts)
+        angles = self.GetAngles(fractions) * 0.01745329251994
+        
+        sections = []
+        for fraction, leading_edge_p, trailing_edge_p, a in zip(fractions, leading_edge_pts, trailing_edge_pts, angles):
+            if np.isnan(trailing_edge_p[1]):
+                v = np.zeros(2)
+                length = 0.0
+            else:
+                v = trailing_edge_p - leading_edge_p
+                length = np.hypot(v[0], v[1])
+            pts = self.GetUnitizedSectionPoints(fraction, num_samples)
+            cos_a = math.cos(a)
+            sin_a = math.sin(a)
+            x = pts[:,0] * cos_a - pts[:,1] * sin_a
+            z = (pts[:,0] * sin_a + pts[:,1] * cos_a) * length
+            pts2 = np.empty((len(pts), 3))
+            pts2[:,0] = leading_edge_p[0] + v[0] * x
+            pts2[:,1] = leading_edge_p[1] + v[1] * x
+            pts2[:,2] = z
+            sections.append(pts2)
+        return sections
+
+    def GetStation(self, fraction, num_samples = 0):
+        # the ordered section points are only calculated once for each fraction, until Invalidate throws them away
+        stations = self.stations
+        key = (fraction, num_samples)
+        if key not in stations:
+            stations[key] = self.GetOrderedSectionPoints(fraction, num_samples)
+        return stations[key]
+        
+    def CalculateStations(self, fractions, num_samples = 0):
+        # calculates all the stations which aren't cached yet, in one go
+        stations = self.stations
+        missing = []
+        for fraction in fractions:
+            if (fraction, num_samples) not in stations:
+                missing.append(fraction)
+        if len(missing) > 0:
+            for fraction, pts in zip(missing, self.GetOrderedSectionPointsList(missing, num_samples)):
+                stations[(fraction, num_samples)] = pts
+        
+    def GetStationFractions(self, num_stations = 0, num_samples = 0, tolerance = None):
+        # use the vertices of trailing edge to define the sections, or num_stations evenly spaced along it
+        if self.trailing_edge.perim < 0.001: return []
+        if num_stations > 1:
+            fractions = np.linspace(0.0, 1.0, num_stations).tolist()
         else:
-            mirror = self.mirror
-    
-        for p0, p1 in zip(pts0, pts1):
-            self.DrawTrianglesBetweenPoints(prev_p0, prev_p1, p0, p1, mirror)
-            prev_p0 = p0
-            prev_p1 = p1
-            
-        if drawing_mode == DRAWING_MODE_SKETCHES:
-            if section_index != 7:
-                return
-            surface = stl_to_add_to.GetFlattenedSurface()
-            outline = surface.Shadow(geom.Matrix(), True)
-            outline.Offset(-2.0)
-            curves = surface.GetTrianglesAsCurveList()
-            area_fp = tempfile.gettempdir() + '/area.dxf'
-            for curve in curves:
-                outline.Append(curve)
-            outline.WriteDxf(area_fp)
-            cad.Import(area_fp)
-
-    def DrawEndFaceTriangle(self, pts, i0, i1, i2):
-        self.DrawTriangle(pts[i0].x, pts[i0].y, pts[i0].z, pts[i1].x, pts[i1].y, pts[i1].z, pts[i2].x, pts[i2].y, pts[i2].z, True)
-        
-    def DrawEndFace(self):
-        pts = self.GetOrderedSectionPoints(1.0) # get end profile
-        
-        num = len(pts)
-        odd = ((num % 2) != 0)
-        halfway = num/2
-        end_point = num - 1
-        
-        # render even number of points, todo render odd number of points
-        for i in range(0, int(halfway)):
-            # make two triangles
-            self.DrawEndFaceTriangle(pts, end_point,i,i + 1)
-            self.DrawEndFaceTriangle(pts, end_point-1,end_point,i+1)
-            end_point -= 1
-
-    def DrawTriangle(self, x0, y0, z0, x1, y1, z1, x2, y2, z2, mirror):
-        if drawing_mode == DRAWING_MODE_SKETCHES:
-            AddTriangleToSketch(x0, y0, z0, x1, y1, z1, x2, y2, z2)
-        elif drawing_mode == DRAWING_MODE_TRIANGLES:
-            self.AddTriangle(x0, y0, z0, x1, y1, z1, x2, y2, z2)
-            if mirror:
-                self.AddTriangle(-x1, y1, z1, -x0, y0, z0, -x2, y2, z2)
-        elif drawing_mode == DRAWING_MODE_STL:
-            AddTriangleToSketch(x0, y0, z0, x1, y1, z1, x2, y2, z2)
-            if mirror:
-                AddTriangleToSketch(-x1, y1, z1, -x0, y0, z0, -x2, y2, z2)
+            fractions = self.trailing_edge.vertex_fractions.tolist()
+        if tolerance != None:
+            fractions = self.AddAdaptiveStations(fractions, num_samples, tolerance)
+        return fractions
+        
+    def AddAdaptiveStations(self, fractions, num_samples, tolerance):
+        # adds stations halfway between neighbouring stations, wherever the wing there is further than tolerance
+        # from halfway between them, so curved edges, twist and the blend from root to tip get more stations
+        # the halfway stations which aren't needed are thrown away again, so they aren't kept in self.stations
+        for level in range(0, ADAPTIVE_LEVELS):
+            middles = []
+            for f0, f1 in zip(fractions[:-1], fractions[1:]):
+                middles.append((f0 + f1) * 0.5)
+            self.CalculateStations(fractions + middles, num_samples)
+            added = []
+            for f0, f1, middle in zip(fractions[:-1], fractions[1:], middles):
+                pts0 = self.GetStation(f0, num_samples)
+                pts1 = self.GetStation(f1, num_samples)
+                pts = self.GetStation(middle, num_samples)
+                if len(pts) == 0 or len(pts) != len(pts0) or len(pts) != len(pts1):
+                    continue
+                if np.abs(pts - (pts0 + pts1) * 0.5).max() > tolerance:
+                    added.append(middle)
+            if len(fractions) + len(added) > ADAPTIVE_MAX_STATIONS:
+                added = []
+            kept = set(fractions + added)
+            for middle in middles:
+                if middle not in kept:
+                    self.stations.pop((middle, num_samples), None)
+            if len(added) == 0:
+                break
+            fractions = sorted(fractions + added)
+        return fractions
+
+    def DrawSection(self, fraction0, fraction1, context):
+        pts0 = self.GetStation(fraction0, context.num_samples)
+        if pts0 is None: return
+        pts1 = self.GetStation(fraction1, context.num_samples)
+        if pts1 is None: return
+        
+        if context.mode == DRAWING_MODE_SKETCHES:
+            # flattened later, all together, see MakeSketches
+            context.strips.append((pts0, pts1))
         else:
-            cad.DrawTriangle(x0, y0, z0, x1, y1, z1, x2, y2, z2)
-            if mirror:
-                cad.DrawTriangle(-x1, y1, z1, -x0, y0, z0, -x2, y2, z2)
+            context.mesh.AddStrip(pts0, pts1, self.mirror)
+            n = min(len(pts0), len(pts1))
+            if n > 2 and (np.any(pts0[0] != pts0[n - 1]) or np.any(pts1[0] != pts1[n - 1])):
+                # the trailing edge of a profile which isn't closed, going round it the same way as the strip
+                gap = np.array(((pts0[0], pts1[0], pts1[n - 1]), (pts0[0], pts1[n - 1], pts0[n - 1])))
+                context.mesh.AddTriangles(gap, self.mirror)
 
-    def DrawTrianglesBetweenPoints(self, prev_p0, prev_p1, p0, p1, mirror):
-        if prev_p0 == None:
-            return
-        self.DrawTriangle(p1.x, p1.y, p1.z, prev_p0.x, prev_p0.y, prev_p0.z, p0.x, p0.y, p0.z, mirror)
-        self.DrawTriangle(prev_p1.x, prev_p1.y, prev_p1.z, prev_p0.x, prev_p0.y, prev_p0.z, p1.x, p1.y, p1.z, mirror)
+    def DrawEndFace(self, context):
+        # the tip, and the root too if the wing isn't mirrored, filled by ear clipping, for any number of points
+        # the tip goes round the same way as its profile, the root the opposite way, to join up with the strips
+        pts = self.GetStation(1.0, context.num_samples) # get end profile
+        if pts is None: return
+        context.mesh.AddIndexedTriangles(pts, watertight.TriangulateLoop(pts), self.mirror)
+        
+        if not self.mirror:
+            pts = self.GetStation(0.0, context.num_samples)
+            if pts is None: return
+            context.mesh.AddIndexedTriangles(pts, watertight.TriangulateLoop(pts)[:, ::-1])
 
     def MakePatternedArea(self, outline, wing_box):
         box = geom.Box(geom.Point(wing_box.MinX(), wing_box.MinY()), geom.Point(wing_box.MaxX(), wing_box.MaxY()))
@@ -253,151 +458,297 @@ class Wing(Object):
         if ty < 0.0:
             return
         
-        a = geom.Area()
-        
-        x = box.MinX()
-        while x < box.MaxX():
-            y = box.MinY()
-            while y < box.MaxY():
-                c = geom.Curve()
-                c.Append(geom.Point(x - tx*0.5, y))
-                c.Append(geom.Point(x + tx*0.5, y))
-                c.Append(geom.Point(x, y + ty))
-                c.Append(geom.Point(x - tx*0.5, y))
-                a.Append(c)
-                
-                c = geom.Curve()
-                c.Append(geom.Point(x + self.pattern_x_step * 0.5, y))
-                c.Append(geom.Point(x + self.pattern_x_step * 0.5 + tx*0.5, y + ty))
-                c.Append(geom.Point(x + self.pattern_x_step * 0.5 - tx*0.5, y + ty))
-                c.Append(geom.Point(x + self.pattern_x_step * 0.5, y))
-                a.Append(c)
-                
-                c = geom.Curve()
-                c.Append(geom.Point(x + self.pattern_x_step * 0.5 - tx*0.5, y + self.pattern_y_step * 0.5))
-                c.Append(geom.Point(x + self.pattern_x_step * 0.5 + tx*0.5, y + self.pattern_y_step * 0.5))
-                c.Append(geom.Point(x + self.pattern_x_step * 0.5, y + self.pattern_y_step * 0.5 + ty))
-                c.Append(geom.Point(x + self.pattern_x_step * 0.5 - tx*0.5, y + self.pattern_y_step * 0.5))
-                a.Append(c)
-                
-                c = geom.Curve()
-                c.Append(geom.Point(x, y + self.pattern_y_step * 0.5))
-                c.Append(geom.Point(x + tx*0.5, y + self.pattern_y_step * 0.5 + ty))
-                c.Append(geom.Point(x - tx*0.5, y + self.pattern_y_step * 0.5 + ty))
-                c.Append(geom.Point(x, y + self.pattern_y_step * 0.5))
-                a.Append(c)
-                y += self.pattern_y_step
-            x += self.pattern_x_step
+        triangles = lattice.MakeTriangles(box.MinX(), box.MinY(), box.MaxX(), box.MaxY(), self.pattern_x_step, self.pattern_y_step, tx, ty)
 
+        bands = []
         if self.split_into_pieces > 1:
             wall_a = geom.Area()
             for i in range(0, self.split_into_pieces):
                 x = wing_box.MinX() + (wing_box.MaxX() - wing_box.MinX()) * float(i + 1) / self.split_into_pieces
+                # right across the pattern, so no cell is cut round the end of a wall into pieces touching each other
                 c = geom.Curve()
-                c.Append(geom.Point(x - self.split_wall_width * 0.5, wing_box.MinX() - 10.0))
-                c.Append(geom.Point(x + self.split_wall_width * 0.5, wing_box.MinX() - 10.0))
-                c.Append(geom.Point(x + self.split_wall_width * 0.5, wing_box.MaxX() + 10.0))
-                c.Append(geom.Point(x - self.split_wall_width * 0.5, wing_box.MaxX() + 10.0))
-                c.Append(geom.Point(x - self.split_wall_width * 0.5, wing_box.MinX() - 10.0))
+                c.Append(geom.Point(x - self.split_wall_width * 0.5, box.MinY() - 10.0))
+                c.Append(geom.Point(x + self.split_wall_width * 0.5, box.MinY() - 10.0))
+                c.Append(geom.Point(x + self.split_wall_width * 0.5, box.MaxY() + 10.0))
+                c.Append(geom.Point(x - self.split_wall_width * 0.5, box.MaxY() + 10.0))
+                c.Append(geom.Point(x - self.split_wall_width * 0.5, box.MinY() - 10.0))
                 wall_a.Append(c)
-            a.Subtract(wall_a)
-            
-        outline.Intersect(a)
+                bands.append((x - self.split_wall_width * 0.5, x + self.split_wall_width * 0.5))
+                
+        # only the triangles near the outline or a wall need the booleans
+        rings = []
+        for curve in outline.GetCurves():
+            rings.append(GetCurvePoints(curve)[0])
+        inside, boundary = lattice.ClassifyTriangles(triangles, rings, bands, min(self.pattern_x_step, self.pattern_y_step) * 0.25)
+        self.stats.Count('pattern triangles', len(triangles))
+        self.stats.Count('clipped pattern triangles', int(boundary.sum()))
         
-        return outline
+        a = geom.Area()
+        for t in triangles[inside].tolist():
+            a.Append(MakeTriangleCurve(t))
+        self.CheckCancelled()
         
-    def DrawPointTriangle(self, pts, i0, i1, i2):
-        self.DrawTriangle(pts[i0].x, pts[i0].y, 0.0, pts[i1].x, pts[i1].y, 0.0, pts[i2].x, pts[i2].y, 0.0, False)
+        clipped = geom.Area()
+        for t in triangles[boundary].tolist():
+            clipped.Append(MakeTriangleCurve(t))
+        if len(bands) > 0:
+            self.CheckCancelled()
+            clipped.Subtract(wall_a)
+            
+        # leave the outline as it was, it is cached
+        self.CheckCancelled()
+        clipped.Intersect(outline)
+        for curve in clipped.GetCurves():
+            a.Append(curve)
+        self.stats.Count('pattern cells', a.NumCurves())
         
-    def DrawPatternTriangles(self):
-        stl = self.MakeStlSolid()
+        return a
         
-        outline = stl.Shadow(geom.Matrix(), True)
+    def MakeWingMesh(self):
+        return self.Tessellate(DRAWING_MODE_TRIANGLES, True, False).mesh
+    
+    def MakeExportMesh(self):
+        if self.export_stations == self.view_stations and self.export_samples == self.view_samples and (self.view_tolerance == self.adaptive_tolerance or not self.adaptive_stations):
+            return self.GetStage('wing_mesh') # the same resolution, so the same mesh
+        return self.Tessellate(DRAWING_MODE_TRIANGLES, True, False, True).mesh
+    
+    def MakeSolid(self):
+        return self.GetStage('export_mesh').ToStl()
+    
+    def MakeShadow(self):
+        return self.GetStage('solid').Shadow(geom.Matrix(), True)
+    
+    def MakeOutline(self):
+        outline = CopyArea(self.GetStage('shadow'))
         outline.Offset(self.pattern_border)
+        return outline
+    
+    def MakePatternArea(self):
+        # the box of the mesh is the box of the solid, without needing the solid
+        return self.MakePatternedArea(self.GetStage('outline'), self.GetStage('export_mesh').GetBox())
+    
+    def MakePatternMesh(self):
+        return self.Tessellate(DRAWING_MODE_TRIANGLES, False, True).mesh
+    
+    def GetMesh(self, render_wing, render_pattern, export = False):
+        # returns a mesh made from the cached wing and pattern meshes, at the view's or the export's resolution
+        mesh = Mesh()
+        if render_wing:
+            mesh.AddMesh(self.GetStage('checked_mesh' if export else 'wing_mesh'))
+        if render_pattern:
+            mesh.AddMesh(self.GetStage('pattern_mesh'))
+        return mesh
         
-        pattern = self.MakePatternedArea(outline, stl.GetBox())
+    def DrawPatternTriangles(self, context):
+        pattern = self.GetStage('pattern_area')
+        if pattern == None:
+            return
 
         for curve in pattern.GetCurves():
-            spans = curve.GetSpans()
             pts = []
-            for span in spans:
-                pts.append(span.p)
-            for i in range(2, len(pts)):
-                self.DrawPointTriangle(pts, 0,i,i -1)
+            for span in curve.GetSpans():
+                pts.append((span.p.x, span.p.y))
+            context.mesh.AddFan(pts, 0.0)
 
-    def OnRenderTriangles(self):
-        if self.box == None:
-            self.SketchesToCurves()
-            self.CalculateBox()
+    def OnRenderTriangles(self, context):
+        self.CheckCurves()
             
-        if self.render_wing:
+        if context.render_wing:
             if self.curves[0] != None and self.curves[1] != None: # can't draw anything without a leading edge nor a trailing edge
-                global section_index
-                section_index = 0
-                
-                # use the spans of trailing edge to define the sections
-                for span in self.curves[1].GetSpans():
-                    self.DrawSection(span)
-                    section_index += 1
+                # each station is calculated once and shared by the sections either side of it
+                fractions = self.GetStationFractions(context.num_stations, context.num_samples, context.tolerance)
+                if context.max_stations != None and len(fractions) > context.max_stations:
+                    indices = np.linspace(0, len(fractions) - 1, context.max_stations).round().astype(int)
+                    fractions = [fractions[i] for i in indices]
+                self.stats.Count('stations', len(fractions))
+                with self.stats.Timer('stations'):
+                    self.CalculateStations(fractions, context.num_samples)
+                with self.stats.Timer('sections'):
+                    for i in range(1, len(fractions)):
+                        self.CheckCancelled()
+                        self.DrawSection(fractions[i - 1], fractions[i], context)
                     
-                self.DrawEndFace()
+                with self.stats.Timer('DrawEndFace'):
+                    self.DrawEndFace(context)
                 
-        if self.render_pattern:
-            self.DrawPatternTriangles()
+        if context.render_pattern:
+            with self.stats.Timer('DrawPatternTriangles'):
+                self.DrawPatternTriangles(context)
+            
+    def Tessellate(self, mode, render_wing, render_pattern, export = False):
+        # returns a new TessellationContext, with its mesh filled in, at the view's or the export's resolution
+        context = TessellationContext(mode, render_wing, render_pattern)
+        if export:
+            context.num_stations = self.export_stations
+            context.num_samples = self.export_samples
+            tolerance = self.adaptive_tolerance
+        else:
+            context.num_stations = self.view_stations
+            context.num_samples = self.view_samples
+            tolerance = self.view_tolerance
+        if self.adaptive_stations:
+            context.tolerance = tolerance
+        self.OnRenderTriangles(context)
+        return context
         
     def OnGlCommands(self, select, marked, no_color):
         if not no_color:
             cad.DrawEnableLighting()
             cad.Material(self.color).glMaterial(1.0)
             
-        if self.draw_list:
+        mesh = None
+        if self.drawn_generation != self.generation:
+            generation, mesh = self.GetMeshToDraw()
+        if mesh is not None:
+            self.KillGLLists()
+            self.MakeGLLists(mesh)
+            self.drawn_generation = generation
+            if generation != None:
+                self.stats.Count('triangles', mesh.NumTriangles())
+                profiling.Finished(self.stats)
+        elif self.vertex_buffer:
+            self.vertex_buffer.Draw()
+        elif self.draw_list:
             cad.DrawCallList(self.draw_list)
-        else:
-            self.draw_list = cad.DrawNewList()
-            self.OnRenderTriangles()
-                    
-            cad.EndLinesOrTriangles()
-            cad.DrawEndList()
             
         if not no_color:
             cad.DrawDisableLighting()
                 
+    def MakeGLLists(self, mesh):
+        # makes and draws the vertex buffer, or the display list, of the mesh
+        with self.stats.Timer('GL buffer'):
+            # one upload of the whole mesh, if the GL has vertex buffers
+            self.vertex_buffer = glbuffer.MakeVertexBuffer(mesh.GetTriangles())
+        if self.vertex_buffer:
+            self.vertex_buffer.Draw()
+        else:
+            with self.stats.Timer('GL list'):
+                self.draw_list = cad.DrawNewList()
+                for t in mesh.GetTriangles().reshape(-1, 9).tolist():
+                    cad.DrawTriangle(*t)
+                        
+                cad.EndLinesOrTriangles()
+                cad.DrawEndList()
+                
+    def GetMeshToDraw(self):
+        # returns (generation, mesh) for OnGlCommands to draw, generation is None for a preview,
+        # mesh is None to keep drawing what was drawn before
+        generation = self.generation
+        render_wing = self.render_wing
+        render_pattern = self.render_pattern
+        if not regenerate_in_background or self.failed_generation == generation or self.HasMeshStages(render_wing, render_pattern):
+            return generation, self.GetMesh(render_wing, render_pattern)
+        
+        finished = self.finished_mesh
+        if finished != None and finished[0] == generation:
+            self.finished_mesh = None
+            return finished
+        
+        if self.regenerating_generation != generation:
+            self.regenerating_generation = generation
+            self.CheckCurves() # here, as the sketches can only be read on the UI thread
+            thread = threading.Thread(target = self.Regenerate, args = (generation, render_wing, render_pattern))
+            thread.daemon = True
+            thread.start()
+            
+        if self.draw_list or self.vertex_buffer:
+            return None, None # keep showing the old wing, or the preview
+        if not render_wing:
+            return None, None
+        return None, self.MakePreviewMesh()
+        
+    def HasMeshStages(self, render_wing, render_pattern):
+        # whether the meshes to draw are all cached, so can be drawn without waiting
+        stages = self.stages
+        if self.box == None:
+            return False
+        if render_wing and 'wing_mesh' not in stages:
+            return False
+        if render_pattern and 'pattern_mesh' not in stages:
+            return False
+        return True
+        
+    def Regenerate(self, generation, render_wing, render_pattern):
+        # makes the mesh on a background thread, giving up if there's been another edit
+        names = []
+        if render_wing:
+            names.append('wing_mesh')
+        if render_pattern:
+            names += ['pattern_area', 'pattern_mesh']
+        background.generation = generation
+        try:
+            for name in names:
+                self.CheckCancelled()
+                self.GetStage(name)
+            mesh = self.GetMesh(render_wing, render_pattern)
+        except RegenerateCancelled:
+            return
+        except Exception:
+            # made again on the UI thread, which shows the error, as it would without the background thread
+            traceback.print_exc()
+            self.failed_generation = generation
+            RequestRepaint()
+            return
+        finally:
+            background.generation = None
+        if self.generation != generation:
+            return
+        self.finished_mesh = (generation, mesh)
+        RequestRepaint()
+        
+    def MakeResultInBackground(self, name):
+        # makes a stage shown in the properties on another thread, as the checks and mass properties take a while
+        if name in self.results_making:
+            return
+        self.CheckCurves() # here, as the sketches can only be read on the UI thread
+        self.results_making.add(name)
+        thread = threading.Thread(target = self.MakeResult, args = (self.generation, name))
+        thread.daemon = True
+        thread.start()
+        
+    def MakeResult(self, generation, name):
+        background.generation = generation
+        try:
+            self.GetStage(name)
+        except RegenerateCancelled:
+            return # the properties are shown again after the edit, which starts it again
+        except Exception:
+            traceback.print_exc()
+            return
+        finally:
+            background.generation = None
+            self.results_making.discard(name)
+        if results_made != None and call_after != None:
+            call_after(results_made)
+        
+    def CheckCancelled(self):
+        # called through the long stages, stops the thread remaking the wing as soon as an edit has made its mesh out of date
+        generation = getattr(background, 'generation', None)
+        if generation != None and generation != self.generation:
+            raise RegenerateCancelled()
+        
+    def MakePreviewMesh(self):
+        # a quick, coarse mesh of the wing, from only a few stations, without the pattern
+        context = TessellationContext(DRAWING_MODE_TRIANGLES, True, False)
+        context.max_stations = PREVIEW_STATIONS
+        self.OnRenderTriangles(context)
+        return context.mesh
+        
     def GetProperties(self):
         properties = []
         for i in range(0, 5):
             p = PropertySketch(self, i)
             list_of_things_to_not_delete.append(p) # to not let it be deleted
             properties.append(p)
-        p = PyProperty('mirror', 'mirror', self, self.Recalculate)
-        list_of_things_to_not_delete.append(p)
-        properties.append(p)
-        p = PyProperty('centre_straight', 'centre_straight', self, self.Recalculate)
-        list_of_things_to_not_delete.append(p)  
-        properties.append(p)
-        p = PyProperty('render_wing', 'render_wing', self, self.Recalculate)
-        list_of_things_to_not_delete.append(p)  
-        properties.append(p)
-        p = PyProperty('render_pattern', 'render_pattern', self, self.Recalculate)
-        list_of_things_to_not_delete.append(p)  
-        properties.append(p)
-        p = PyProperty('pattern_border', 'pattern_border', self, self.Recalculate)
-        list_of_things_to_not_delete.append(p)  
-        properties.append(p)
-        p = PyProperty('pattern_x_step', 'pattern_x_step', self, self.Recalculate)
-        list_of_things_to_not_delete.append(p)  
-        properties.append(p)
-        p = PyProperty('pattern_y_step', 'pattern_y_step', self, self.Recalculate)
-        list_of_things_to_not_delete.append(p)  
-        properties.append(p)
-        p = PyProperty('pattern_wall', 'pattern_wall', self, self.Recalculate)
-        list_of_things_to_not_delete.append(p) 
-        properties.append(p)
-        p = PyProperty('split_into_pieces', 'split_into_pieces', self, self.Recalculate)
-        list_of_things_to_not_delete.append(p)         
-        properties.append(p)
-        p = PyProperty('split_wall_width', 'split_wall_width', self, self.Recalculate)
-        list_of_things_to_not_delete.append(p)         
-        properties.append(p)
+        for name in property_names:
+            # only the stages made from this property are remade when it changes
+            p = PyProperty(name, name, self, functools.partial(self.Invalidate, name))
+            list_of_things_to_not_delete.append(p)
+            properties.append(p)
+        for title, stage, function in result_properties:
+            p = PropertyResult(self, title, stage, function)
+            list_of_things_to_not_delete.append(p)
+            properties.append(p)
 
         return properties
         
@@ -408,9 +759,7 @@ class Wing(Object):
         self.color = col
         
     def GetBox(self, box):
-        if self.box == None:
-            self.SketchesToCurves()
-            self.CalculateBox()
+        self.CheckCurves()
 
         box.InsertBox(self.box)
         
@@ -428,6 +777,14 @@ class Wing(Object):
         cad.SetXmlValue('pattern_wall', self.pattern_wall)
         cad.SetXmlValue('split_into_pieces', self.split_into_pieces)
         cad.SetXmlValue('split_wall_width', self.split_wall_width)
+        cad.SetXmlValue('view_stations', self.view_stations)
+        cad.SetXmlValue('view_samples', self.view_samples)
+        cad.SetXmlValue('export_stations', self.export_stations)
+        cad.SetXmlValue('export_samples', self.export_samples)
+        cad.SetXmlValue('adaptive_stations', self.adaptive_stations)
+        cad.SetXmlValue('view_tolerance', self.view_tolerance)
+        cad.SetXmlValue('adaptive_tolerance', self.adaptive_tolerance)
+        cad.SetXmlValue('template_sections', self.template_sections)
         
     def ReadXml(self):
         self.color = cad.Color(cad.GetXmlInt('col', self.color.ref()))
@@ -443,110 +800,217 @@ class Wing(Object):
         self.pattern_wall = cad.GetXmlFloat('pattern_wall', 2.0)
         self.split_into_pieces = cad.GetXmlInt('split_into_pieces', 6)
         self.split_wall_width = cad.GetXmlFloat('split_wall_width', 4.0)
+        self.view_stations = cad.GetXmlInt('view_stations', 0)
+        self.view_samples = cad.GetXmlInt('view_samples', 0)
+        self.export_stations = cad.GetXmlInt('export_stations', 0)
+        self.export_samples = cad.GetXmlInt('export_samples', 0)
+        self.adaptive_stations = cad.GetXmlBool('adaptive_stations', False)
+        self.view_tolerance = cad.GetXmlFloat('view_tolerance', 0.5)
+        self.adaptive_tolerance = cad.GetXmlFloat('adaptive_tolerance', 0.1)
+        self.template_sections = cad.GetXmlValue('template_sections')
         
         Object.ReadXml(self)
         
     def GetTools(self):
         global wing_for_tools
         wing_for_tools = self
-        self.AddTool('Make Sketches', MakeSketches)
+        self.AddTool('Make Templates', MakeSketches)
         
     def MakeSketches(self):
-        global drawing_mode
-        save_mode = drawing_mode
-        drawing_mode = DRAWING_MODE_SKETCHES
-        self.OnRenderTriangles()
-        drawing_sketches = save_mode
+        # makes a sketch of a flat template of each of the template_sections, at the export resolution
+        strips = self.Tessellate(DRAWING_MODE_SKETCHES, True, False, True).strips
+        try:
+            selected = [strips[i] for i in templates.ParseSections(self.template_sections, len(strips))]
+        except ValueError as e:
+            ShowMessage('No templates were made, as the template sections can\'t be used: ' + str(e), 'Make Templates')
+            return
+        with self.stats.Timer('templates'):
+            AddSketchesFromAreas(templates.MakeTemplates(selected))
         
     def GetTriangles(self):
-        global drawing_mode
-        save_mode = drawing_mode
-        drawing_mode = DRAWING_MODE_TRIANGLES
-        self.OnRenderTriangles()
-        drawing_mode = save_mode
-        
-    def MakeCuboidSection(self, index, num, box, margin):
-        section_width = (box.MaxX() - box.MinX())/num
-        minx = box.MinX() + section_width * index
-        miny = box.MinY() - margin
-        minz = box.MinZ() - margin
-        maxx = box.MinX() + section_width * (index + 1)
-        maxy = box.MaxY() + margin
-        maxz = box.MaxZ() + margin
-        if index == 0:
-            minx -= margin
-        if index == num - 1:
-            maxx += margin
-            
-        stl = geom.Stl()
-        stl.Add(geom.Point3D(minx, miny, minz), geom.Point3D(maxx, miny, minz), geom.Point3D(maxx, miny, maxz))
-        stl.Add(geom.Point3D(minx, miny, minz), geom.Point3D(maxx, miny, maxz), geom.Point3D(minx, miny, maxz))
-        stl.Add(geom.Point3D(maxx, miny, minz), geom.Point3D(maxx, maxy, minz), geom.Point3D(maxx, maxy, maxz))
-        stl.Add(geom.Point3D(maxx, miny, minz), geom.Point3D(maxx, maxy, maxz), geom.Point3D(maxx, miny, maxz))
-        stl.Add(geom.Point3D(maxx, maxy, minz), geom.Point3D(minx, maxy, minz), geom.Point3D(minx, maxy, maxz))
-        stl.Add(geom.Point3D(maxx, maxy, minz), geom.Point3D(minx, maxy, maxz), geom.Point3D(maxx, maxy, maxz))
-        stl.Add(geom.Point3D(minx, maxy, minz), geom.Point3D(minx, miny, minz), geom.Point3D(minx, miny, maxz))
-        stl.Add(geom.Point3D(minx, maxy, minz), geom.Point3D(minx, miny, maxz), geom.Point3D(minx, maxy, maxz))
-        stl.Add(geom.Point3D(minx, miny, maxz), geom.Point3D(maxx, miny, maxz), geom.Point3D(maxx, maxy, maxz))
-        stl.Add(geom.Point3D(minx, miny, maxz), geom.Point3D(maxx, maxy, maxz), geom.Point3D(minx, maxy, maxz))
-        stl.Add(geom.Point3D(maxx, miny, minz), geom.Point3D(minx, miny, minz), geom.Point3D(maxx, maxy, minz))
-        stl.Add(geom.Point3D(maxx, maxy, minz), geom.Point3D(minx, miny, minz), geom.Point3D(minx, maxy, minz))
-        
-        return stl
-        
+        mesh = self.GetMesh(self.render_wing, self.render_pattern, True)
+        for t in mesh.GetTriangles().reshape(-1, 9).tolist():
+            self.AddTriangle(*t)
         
     def ExportFiles(self, path):
-        wing = self.MakeStlSolid()
-        wing.WriteStl(path)
+        with self.stats.Timer('ExportFiles'):
+            writers = self.WriteFiles(path)
+        num_bytes = 0
+        seconds = 0.0
+        for writer in writers:
+            num_bytes += writer.num_bytes
+            seconds += writer.seconds
+        self.stats.Count('triangles', self.GetStage('checked_mesh').NumTriangles())
+        self.stats.Count('exported bytes', num_bytes)
+        if seconds > 0.0:
+            self.stats.Count('exported bytes per second', num_bytes / seconds)
+        profiling.Finished(self.stats)
+        return writers
         
-        outline = wing.Shadow(geom.Matrix(), True)
-        outline.Offset(self.pattern_border)
+    def WriteFiles(self, path):
+        # writes the triangles to files of the format of the path's extension, see meshfiles.FORMATS
+        # STL files are streamed, without making geom.Stl objects of them
+        # returns the StlWriters or meshfiles.WrittenFiles, which have the number of bytes written and the time taken
+        # each has the check of what was written, before it was repaired, for the export report
+        root, extension = os.path.splitext(path)
+        writers = []
+        wing_mesh = self.GetStage('checked_mesh') # repaired first, if it isn't watertight
+        writers.append(meshfiles.WriteTriangles(path, wing_mesh.GetChunks()))
+        writers[-1].check = self.GetStage('mesh_check')
+        box = wing_mesh.GetBox()
         
-        pattern = self.MakePatternedArea(outline, wing.GetBox())
-        pattern_stl = self.MakeExtrudedAreaSolid(pattern, wing.GetBox().MinZ() - 10, wing.GetBox().MaxZ() + 10)
-        pattern_path = path[:-4] + ' pattern.stl'
-        pattern_stl.WriteStl(pattern_path)
-        
-        outer_box = wing.GetBox()
-        outer_box.InsertPoint(outer_box.MinX() - 1.0, outer_box.MinY() - 1.0, outer_box.MinZ() - 1.0)
-        outer_box.InsertPoint(outer_box.MaxX() + 1.0, outer_box.MaxY() + 1.0, outer_box.MaxZ() + 1.0)
-        for i in range(0, self.split_into_pieces):
-            stl = self.MakeCuboidSection(i, self.split_into_pieces, wing.GetBox(), 1.0)
-            indexstr = str(i)
-            if len(indexstr) < 2:
-                indexstr = '0' + indexstr
-            stl.WriteStl(path[:-4] + ' section' + indexstr + '.stl')
-
-    def MakeExtrudedAreaSolid(self, pattern, minz, maxz):
-        stl = geom.Stl()
-        for curve in pattern.GetCurves():
-            if math.fabs(curve.GetArea()) > 1.0:
-                spans = curve.GetSpans()
-                pts = []
-                for span in spans:
-                    stl.Add(geom.Point3D(span.p.x, span.p.y, minz), geom.Point3D(span.v.p.x, span.v.p.y, minz), geom.Point3D(span.v.p.x, span.v.p.y, maxz))
-                    stl.Add(geom.Point3D(span.p.x, span.p.y, minz), geom.Point3D(span.v.p.x, span.v.p.y, maxz), geom.Point3D(span.p.x, span.p.y, maxz))
-                    pts.append(span.p)
-                for i in range(2, len(pts)):
-                    stl.Add(geom.Point3D(pts[i].x, pts[i].y, maxz), geom.Point3D(pts[0].x, pts[0].y, maxz), geom.Point3D(pts[i-1].x, pts[i-1].y, maxz))
-                    stl.Add(geom.Point3D(pts[0].x, pts[0].y, minz), geom.Point3D(pts[i].x, pts[i].y, minz), geom.Point3D(pts[i-1].x, pts[i-1].y, minz))
-        return stl
-
-    def MakeStlSolid(self):
-        global drawing_mode
-        global stl_to_add_to
-        save_mode = drawing_mode
-        save_render_pattern = self.render_pattern
-        save_render_wing = self.render_wing
-        stl_to_add_to = geom.Stl()
-        drawing_mode = DRAWING_MODE_STL
-        self.render_pattern = False
-        self.render_wing = True
-        self.OnRenderTriangles()
-        drawing_mode = save_mode
-        self.render_wing = save_render_wing
-        self.save_render_pattern = save_render_pattern
-        return stl_to_add_to
+        pattern = self.GetStage('pattern_area')
+        if pattern != None:
+            # each cell is a closed solid, so each block of them is checked and repaired as it's written
+            check = watertight.MeshCheck()
+            blocks = GetExtrudedAreaTriangles(pattern, box.MinZ() - 10, box.MaxZ() + 10)
+            writers.append(meshfiles.WriteTriangles(root + ' pattern' + extension, watertight.RepairChunks(blocks, check)))
+            writers[-1].check = check
+        
+        if self.split_into_pieces > 0:
+            # the wing and the pattern cut into closed pieces, ready to print, by a pool of processes
+            pieces = slabs.GetSlabs(box.MinX(), box.MaxX(), self.split_into_pieces)
+            piece_paths = []
+            pattern_piece_paths = []
+            for i in range(0, self.split_into_pieces):
+                indexstr = str(i)
+                if len(indexstr) < 2:
+                    indexstr = '0' + indexstr
+                piece_paths.append(root + ' piece' + indexstr + extension)
+                pattern_piece_paths.append(root + ' pattern piece' + indexstr + extension)
+            with self.stats.Timer('pieces'):
+                writers += slabs.WritePieces(wing_mesh.GetTriangles(), pieces, piece_paths)
+                if pattern != None:
+                    jobs = GetPatternPieceJobs(pattern, pieces, pattern_piece_paths, box.MinZ() - 10, box.MaxZ() + 10)
+                    writers += slabs.WritePieceJobs(jobs, len(pieces))
+        self.written_files = writers
+        return writers
+
+    def MakeMeshCheck(self):
+        with self.stats.Timer('check'):
+            check = watertight.CheckTriangles(self.GetStage('export_mesh').GetTriangles())
+        self.stats.Count('open edges', check.num_open_edges)
+        self.stats.Count('non-manifold edges', check.num_non_manifold_edges)
+        self.stats.Count('flipped edges', check.num_flipped_edges)
+        self.stats.Count('inside out', int(check.IsInsideOut()))
+        return check
+        
+    def MakeCheckedMesh(self):
+        # the export mesh, with its holes filled and turned the right way out if it isn't watertight, this is what is exported
+        mesh = self.GetStage('export_mesh')
+        if self.GetStage('mesh_check').IsWatertight():
+            return mesh
+        repaired = Mesh()
+        repaired.AddTriangles(watertight.Repair(mesh.GetTriangles()))
+        return repaired
+        
+    def MakeMass(self):
+        # the mass properties of the exported wing, worked out from its triangles, without making the solid
+        return massprops.GetMassProperties(self.GetStage('checked_mesh').GetChunks())
+        
+    def MakeInfillMass(self):
+        # the mass properties of the wing less the extruded pattern, the material left when it's printed
+        pattern = self.GetStage('pattern_area')
+        if pattern == None:
+            return None
+        mass = self.GetStage('mass')
+        inside = massprops.GetCellMassProperties(self.GetStage('checked_mesh').GetChunks(), GetAreaCells(pattern), mass.origin)
+        return mass.Subtract(inside)
+        
+    def GetExportReport(self):
+        # several lines, for the export log
+        check = self.GetStage('mesh_check')
+        lines = ['mesh: ' + check.GetSummary()]
+        if not check.IsWatertight():
+            lines.append('repaired: ' + watertight.CheckTriangles(self.GetStage('checked_mesh').GetTriangles()).GetSummary())
+        lines.append(self.GetStage('mass').GetReport('wing'))
+        infill_mass = self.GetStage('infill_mass')
+        if infill_mass != None:
+            lines.append(infill_mass.GetReport('wing less pattern'))
+        # the pattern and the pieces written by the last export, the wing's check is already above
+        for writer in self.written_files[1:]:
+            name = os.path.splitext(os.path.basename(writer.path))[0]
+            if writer.check.IsWatertight():
+                lines.append(name + ': watertight')
+            else:
+                lines.append(name + ': ' + writer.check.GetSummary() + ', repaired')
+        return '\n'.join(lines)
+
+stage_makers = {
+    'wing_mesh': Wing.MakeWingMesh,
+    'export_mesh': Wing.MakeExportMesh,
+    'solid': Wing.MakeSolid,
+    'shadow': Wing.MakeShadow,
+    'outline': Wing.MakeOutline,
+    'pattern_area': Wing.MakePatternArea,
+    'pattern_mesh': Wing.MakePatternMesh,
+    'mesh_check': Wing.MakeMeshCheck,
+    'checked_mesh': Wing.MakeCheckedMesh,
+    'mass': Wing.MakeMass,
+    'infill_mass': Wing.MakeInfillMass,
+}
+
+def SaveMesh(wing, mesh):
+    return meshcache.MeshToArrays(mesh, dict(wing.stations))
+
+def LoadMesh(wing, arrays):
+    return meshcache.ArraysToMesh(arrays, wing.stations)
+
+def SaveArea(wing, area):
+    return meshcache.AreaToArrays(area, lambda curve: GetCurvePoints(curve)[0])
+
+def LoadArea(wing, arrays):
+    return meshcache.ArraysToArea(arrays)
+
+# the stages kept in the cache on disk, with functions to turn them into arrays and back
+disk_stages = {
+    'wing_mesh': (SaveMesh, LoadMesh),
+    'export_mesh': (SaveMesh, LoadMesh),
+    'pattern_area': (SaveArea, LoadArea),
+}
+
+def GetDependentStages(name):
+    # returns the names of all the stages made from the given property or stage, directly or not
+    dependents = set()
+    names = [name]
+    while len(names) > 0:
+        n = names.pop()
+        for stage, dependencies in stage_dependencies.items():
+            if n in dependencies and stage not in dependents:
+                dependents.add(stage)
+                names.append(stage)
+    return dependents
+
+class TessellationContext:
+    # the settings for one tessellation of a wing and the mesh it makes,
+    # so several tessellations, of one wing or many, can run at the same time
+    def __init__(self, mode, render_wing, render_pattern):
+        self.mode = mode
+        self.render_wing = render_wing
+        self.render_pattern = render_pattern
+        self.mesh = Mesh()
+        self.max_stations = None # if set, only this many of the stations are used, for a preview
+        self.num_stations = 0 # see Wing.view_stations
+        self.num_samples = 0 # see Wing.view_samples
+        self.tolerance = None # see Wing.view_tolerance, None for no adaptive stations
+        self.strips = [] # the points of the stations either side of each section, in DRAWING_MODE_SKETCHES
+
+class RegenerateCancelled(Exception):
+    # raised on the thread remaking a wing, when the wing has been edited since
+    pass
+
+def ShowMessage(text, title):
+    if message_box != None:
+        message_box(text, title)
+    else:
+        print(title + ': ' + text)
+
+def RequestRepaint():
+    # called from the thread remaking a wing, the window is repainted on the UI thread
+    if call_after != None:
+        call_after(cad.Repaint)
+    else:
+        cad.Repaint()
 
 def XMLRead():
     new_object = Wing()
@@ -560,22 +1024,88 @@ def XMLRead():
     
     return new_object
 
+def AddSketchesFromAreas(areas):
+    if hasattr(cad, 'NewSketchFromArea'):
+        # straight from the areas, in memory
+        for area in areas:
+            cad.AddUndoably(cad.NewSketchFromArea(area))
+        return
+    
+    # otherwise all together, with one dxf file
+    if len(areas) == 0:
+        return
+    all_areas = geom.Area()
+    for area in areas:
+        for curve in area.GetCurves():
+            all_areas.Append(curve)
+    fd, area_file_path = tempfile.mkstemp(suffix = '.dxf')
+    os.close(fd)
+    try:
+        all_areas.WriteDxf(area_file_path)
+        cad.Import(area_file_path)
+    finally:
+        os.remove(area_file_path)
+        
+def GetAreaStamp(area):
+    # a hash of all the vertices of an area, to tell if a sketch has changed
+    values = []
+    for curve in area.GetCurves():
+        for v in curve.GetVertices():
+            values.append((v.type, v.p.x, v.p.y, v.c.x, v.c.y))
+        values.append(None)
+    return hash(tuple(values))
+
+MAX_CACHED_CURVES = 64 # the curves of the most recently read sketches kept, the rest are thrown away
+curve_cache = collections.OrderedDict() # sketch id: (stamp, curve), the most recently used last
+
+def GetCachedCurve(sketch_id, stamp, get_area):
+    # returns the curve cached for the sketch, if it has the same stamp, else makes it from get_area() and caches it
+    cached = curve_cache.get(sketch_id)
+    if cached != None and cached[0] == stamp:
+        curve_cache.move_to_end(sketch_id)
+        return cached[1]
+    curve = MakeCurveFromArea(get_area())
+    curve_cache[sketch_id] = (stamp, curve)
+    curve_cache.move_to_end(sketch_id)
+    while len(curve_cache) > MAX_CACHED_CURVES:
+        curve_cache.popitem(last = False)
+    return curve
+
 def GetCurveFromSketch(sketch_id):
-    sketch_file_path = tempfile.gettempdir() + '/sketch.dxf'
     sketch = cad.GetObjectFromId(cad.OBJECT_TYPE_SKETCH, sketch_id)
     if sketch == None:
         return
-    else:
+    
+    if hasattr(sketch, 'GetStamp'):
+        # the sketch says when it has changed, so an unchanged one isn't read at all
+        return GetCachedCurve(sketch_id, sketch.GetStamp(), sketch.GetArea)
+    if hasattr(sketch, 'GetArea'):
+        # straight from the sketch's lines and arcs, in memory
+        area = sketch.GetArea()
+        return GetCachedCurve(sketch_id, GetAreaStamp(area), lambda: area)
+    
+    # otherwise via a dxf file of our own, so other threads or processes can't collide with it
+    # the file's bytes are the stamp, so an unchanged sketch is only written, not read back into an area
+    fd, sketch_file_path = tempfile.mkstemp(suffix = '.dxf')
+    os.close(fd)
+    try:
         sketch.WriteDxf(sketch_file_path)
-        area = geom.AreaFromDxf(sketch_file_path)
-        curves = area.GetCurves()
-        if len(curves)>0:
+        with open(sketch_file_path, 'rb') as f:
+            stamp = hashlib.sha1(f.read()).hexdigest()
+        return GetCachedCurve(sketch_id, stamp, lambda: geom.AreaFromDxf(sketch_file_path))
+    finally:
+        os.remove(sketch_file_path)
+
+def MakeCurveFromArea(area):
+    # the first curve of the area, going from left to right, or None
+    curve = None
+    curves = area.GetCurves()
+    if len(curves)>0:
+        if curves[0].NumVertices() > 1:
             curve = curves[0]
-            if curve.NumVertices() > 1:
-                if curve.FirstVertex().p.x > curve.LastVertex().p.x:
-                    curve.Reverse()
-                return curve
-    return None
+            if curve.FirstVertex().p.x > curve.LastVertex().p.x:
+                curve.Reverse()
+    return curve
 
 class PropertySketch(cad.Property):
     def __init__(self, wing, index):
@@ -597,7 +1127,7 @@ class PropertySketch(cad.Property):
     
     def SetInt(self, value):
         self.wing.sketch_ids[self.index] = value
-        self.wing.Recalculate()
+        self.wing.Invalidate('sketch_ids')
         
     def GetInt(self):
         return self.wing.sketch_ids[self.index]
@@ -607,64 +1137,279 @@ class PropertySketch(cad.Property):
         list_of_things_to_not_delete.append(p)
         return p
         
-def AddTriangleToSketch(x0, y0, z0, x1, y1, z1, x2, y2, z2):
-    p0 = geom.Point3D(x0,y0,z0)
-    p1 = geom.Point3D(x1,y1,z1)
-    p2 = geom.Point3D(x2,y2,z2)
-    if p0 == p1:
-        return
-    if p1 == p2:
-        return
-    if p2 == p0:
-        return
-    stl_to_add_to.Add(p0, p1, p2)
-
-def GetMinXPoint(curve):
-    minxp = None
-    for v in curve.GetVertices():
-        if minxp == None or v.p.x < minxp.x:
-            minxp = v.p
-    return minxp
-
-def GetMaxXPoint(curve):
-    maxxp = None
-    for v in curve.GetVertices():
-        if maxxp == None or v.p.x > maxxp.x:
-            maxxp = v.p
-    return maxxp
-
-def GetTmFromCurve(curve):
+class PropertyResult(cad.Property):
+    # a read only property, worked out from a stage, only once the stage it needs has been made, so selecting a wing stays quick
+    def __init__(self, wing, title, stage, function):
+        cad.Property.__init__(self, cad.PROPERTY_TYPE_STRING, title, wing)
+        self.wing = wing
+        self.title = title
+        self.stage = stage
+        self.function = function
+        
+    def GetType(self):
+        return cad.PROPERTY_TYPE_STRING
+    
+    def GetTitle(self):
+        return self.title
+        
+    def editable(self):
+        return False
+        
+    def GetString(self):
+        # with the wing remade in the background, the stage is made in the background too, and shown once it's ready
+        stages = self.wing.stages
+        if self.stage not in stages:
+            needed = 'pattern_area' if self.stage == 'infill_mass' else 'export_mesh'
+            if needed not in stages:
+                return 'not made yet'
+            if regenerate_in_background:
+                self.wing.MakeResultInBackground(self.stage)
+                return 'calculating...'
+        result = self.wing.GetStage(self.stage)
+        if result == None:
+            return 'none'
+        return self.function(result)
+    
+    def MakeACopy(self, o):
+        p = PropertyResult(self.wing, self.title, self.stage, self.function)
+        list_of_things_to_not_delete.append(p)
+        return p
+        
+result_properties = [
+    ('mesh check', 'mesh_check', lambda c: c.GetSummary()),
+    ('volume', 'mass', lambda m: '%.1f cubic mm' % m.volume),
+    ('surface area', 'mass', lambda m: '%.1f square mm' % m.area),
+    ('mass', 'mass', lambda m: '%.2fg at %.2fg/cc' % (m.GetMass(), massprops.DENSITY)),
+    ('centroid', 'mass', lambda m: '%.2f, %.2f, %.2f' % tuple(m.GetCentroid())),
+    ('inertia', 'mass', lambda m: '%.0f, %.0f, %.0f g mm^2' % tuple(np.diag(m.GetInertia()))),
+    ('volume less pattern', 'infill_mass', lambda m: '%.1f cubic mm' % m.volume),
+    ('mass less pattern', 'infill_mass', lambda m: '%.2fg at %.2fg/cc' % (m.GetMass(), massprops.DENSITY)),
+]
+
+def GetExtrudedAreaTriangles(area, minz, maxz):
+    # yields arrays of the triangles of the area's curves extruded from minz to maxz,
+    # a block at a time, so the whole solid is never in memory at once
+    blocks = []
+    num_triangles = 0
+    for a in GetAreaCells(area):
+        b = np.roll(a, -1, axis = 0)
+        n = len(a)
+        triangles = np.empty((n * 2 + (n - 2) * 2, 3, 3))
+        walls = triangles[:n * 2].reshape(n, 2, 3, 3)
+        walls[:,0,0,:2] = a
+        walls[:,0,1,:2] = b
+        walls[:,0,2,:2] = b
+        walls[:,1,0,:2] = a
+        walls[:,1,1,:2] = b
+        walls[:,1,2,:2] = a
+        walls[:,:,:,2] = maxz
+        walls[:,0,0:2,2] = minz
+        walls[:,1,0,2] = minz
+        
+        # a fan on each end
+        i = np.arange(2, n)
+        caps = triangles[n * 2:].reshape(n - 2, 2, 3, 3)
+        caps[:,0,0,:2] = a[i]
+        caps[:,0,1,:2] = a[0]
+        caps[:,0,2,:2] = a[i - 1]
+        caps[:,0,:,2] = maxz
+        caps[:,1,0,:2] = a[0]
+        caps[:,1,1,:2] = a[i]
+        caps[:,1,2,:2] = a[i - 1]
+        caps[:,1,:,2] = minz
+        
+        blocks.append(triangles)
+        num_triangles += len(triangles)
+        if num_triangles >= stlwriter.BLOCK_SIZE:
+            yield np.concatenate(blocks)
+            blocks = []
+            num_triangles = 0
+    if len(blocks) > 0:
+        yield np.concatenate(blocks)
+
+def GetAreaCells(area):
+    # yields an array of the x, y points of each of the area's curves bigger than 1 square mm, not repeating the first,
+    # without repeated points, which would make walls with no area, sharing their edges with the walls either side
+    for curve in area.GetCurves():
+        if math.fabs(curve.GetArea()) <= 1.0:
+            continue
+        pts = polygons.RemoveZeroLengthEdges(GetCurvePoints(curve)[0][:-1])
+        if len(pts) >= 3:
+            yield pts
+
+def GetPatternPieceJobs(pattern, pieces, paths, minz, maxz):
+    # yields a job for slabs.WritePieceJobs for each piece, with only the pattern's cells which reach into it extruded,
+    # so the whole extruded pattern is never in memory at once
+    curves = pattern.GetCurves()
+    boxes = [curve.GetBox() for curve in curves]
+    for (x0, x1), path in zip(pieces, paths):
+        area = geom.Area()
+        for curve, box in zip(curves, boxes):
+            if box.MaxX() >= x0 and box.MinX() <= x1:
+                area.Append(curve)
+        triangles = np.concatenate(list(GetExtrudedAreaTriangles(area, minz, maxz)) + [np.zeros((0, 3, 3))])
+        yield (triangles, x0, x1, path)
+
+def MakeTriangleCurve(t):
+    # makes a closed curve from a list of three x, y pairs
+    c = geom.Curve()
+    for p in t:
+        c.Append(geom.Point(p[0], p[1]))
+    c.Append(geom.Point(t[0][0], t[0][1]))
+    return c
+
+def CurveFromPoints(pts):
+    c = geom.Curve()
+    for p in np.asarray(pts, dtype = float).tolist():
+        c.Append(geom.Point(p[0], p[1]))
+    return c
+
+def CopyArea(area):
+    copy = geom.Area()
+    for curve in area.GetCurves():
+        copy.Append(curve)
+    return copy
+
+def GetCurvePoints(curve):
+    # returns an array of the curve's points, with arcs split into short lines,
+    # and the indices in that array of the curve's own vertices
+    pts = []
+    vertex_indices = []
+    prev_p = None
+    for span in curve.GetSpans():
+        if prev_p == None:
+            vertex_indices.append(0)
+            pts.append((span.p.x, span.p.y))
+        if span.v.type != 0:
+            length = span.Length()
+            segments = max(1, int(math.ceil(length / ARC_SEGMENT_LENGTH)))
+            for i in range(1, segments):
+                p = span.MidPerim(length * i / segments)
+                pts.append((p.x, p.y))
+        vertex_indices.append(len(pts))
+        pts.append((span.v.p.x, span.v.p.y))
+        prev_p = span.v.p
+    return np.array(pts, dtype = float).reshape(-1, 2), np.array(vertex_indices, dtype = int)
+
+class CurveIndex:
+    # a curve turned once into arrays, for finding points by perimeter or by x
+    def __init__(self, curve):
+        self.pts, self.vertex_indices = GetCurvePoints(curve)
+        self.key = meshcache.GetKey([self.pts.tobytes(), self.vertex_indices.tobytes()]) # for the cache on disk
+        
+        # cumulative arc-length table
+        self.span_lengths = np.hypot(*np.diff(self.pts, axis = 0).T)
+        self.cum_perim = np.concatenate(([0.0], np.cumsum(self.span_lengths)))
+        self.perim = self.cum_perim[-1]
+        if self.perim > 0.0:
+            self.vertex_fractions = self.cum_perim[self.vertex_indices] / self.perim
+        else:
+            self.vertex_fractions = np.zeros(len(self.vertex_indices))
+            
+        # the spans' extents in x, for finding the spans at an x
+        self.minxy = self.pts.min(axis = 0)
+        self.maxxy = self.pts.max(axis = 0)
+        self.span_minx = np.minimum(self.pts[:-1,0], self.pts[1:,0])
+        self.span_maxx = np.maximum(self.pts[:-1,0], self.pts[1:,0])
+        self.x_increasing = len(self.pts) > 1 and bool(np.all(np.diff(self.pts[:,0]) > 0.0))
+            
+    def PerimToPoints(self, fractions):
+        d = np.asarray(fractions, dtype = float) * self.perim
+        if len(self.span_lengths) == 0:
+            return np.repeat(self.pts[:1], len(d), axis = 0)
+        i = np.clip(np.searchsorted(self.cum_perim, d, side = 'right') - 1, 0, len(self.span_lengths) - 1)
+        lengths = self.span_lengths[i]
+        t = np.divide(d - self.cum_perim[i], lengths, out = np.zeros_like(d), where = lengths > 0.0)
+        t = np.clip(t, 0.0, 1.0)[:,None]
+        return self.pts[i] + (self.pts[i + 1] - self.pts[i]) * t
+    
+    def GetYsAtX(self, x):
+        # returns an array of the y values where a vertical line at x crosses the curve
+        spans = np.nonzero((self.span_minx <= x) & (self.span_maxx >= x))[0]
+        a = self.pts[spans]
+        b = self.pts[spans + 1]
+        dx = b[:,0] - a[:,0]
+        vertical = dx == 0.0
+        t = np.divide(x - a[:,0], dx, out = np.zeros_like(dx), where = ~vertical)
+        ys = a[:,1] + (b[:,1] - a[:,1]) * t
+        return np.concatenate((ys, b[vertical,1]))
+        
+    def GetYAtX(self, xs, min_ys, max_ys, highest):
+        # returns an array of, for each x, the highest, or lowest, y between min_y and max_y
+        # where a vertical line at x crosses the curve, or nan if it doesn't
+        xs = np.asarray(xs, dtype = float)
+        result = np.full(len(xs), np.nan)
+        if len(self.span_lengths) == 0:
+            return result
+        if self.x_increasing:
+            # a vertical line can only cross the curve once, so binary search for the span
+            i = np.clip(np.searchsorted(self.pts[:,0], xs, side = 'right') - 1, 0, len(self.span_lengths) - 1)
+            a = self.pts[i]
+            b = self.pts[i + 1]
+            t = (xs - a[:,0]) / (b[:,0] - a[:,0])
+            ys = a[:,1] + (b[:,1] - a[:,1]) * t
+            ok = (xs >= self.pts[0,0]) & (xs <= self.pts[-1,0]) & (ys >= min_ys) & (ys <= max_ys)
+            result[ok] = ys[ok]
+        else:
+            for i in range(0, len(xs)):
+                ys = self.GetYsAtX(xs[i])
+                ys = ys[(ys >= min_ys[i]) & (ys <= max_ys[i])]
+                if len(ys) > 0:
+                    result[i] = ys.max() if highest else ys.min()
+        return result
+
+class Profile(CurveIndex):
+    # a root or tip profile, turned once into arrays for fast resampling
+    def __init__(self, curve):
+        CurveIndex.__init__(self, curve)
+        
+        # chord end points, the first vertices with the lowest and the highest x
+        vertices = self.pts[self.vertex_indices]
+        self.ps = vertices[np.argmin(vertices[:,0])]
+        self.pe = vertices[np.argmax(vertices[:,0])]
+        
+        # inverse transform, from the chord's axes to unit x and y
+        xdist = np.hypot(*(self.pe - self.ps))
+        if xdist < 0.00001:
+            self.scale = None
+        else:
+            self.scale = 1.0 / xdist
+            self.vx = (self.pe - self.ps) * self.scale
+            self.vy = np.array((-self.vx[1], self.vx[0]))
+
+    def GetUnitizedPoints(self, fractions, centre_straight):
+        # returns an array of points on the profile at the given perimeter fractions,
+        # with the chord going from (0,0) to (1,0)
+        if self.scale == None:
+            return np.zeros((len(fractions), 2))
+        d = self.PerimToPoints(fractions) - self.ps
+        pu = np.empty((len(d), 2))
+        pu[:,0] = (d @ self.vx) * self.scale
+        if centre_straight:
+            pu[:,1] = 0.0
+        else:
+            pu[:,1] = (d @ self.vy) * self.scale
+        return pu
+    
+def MakeProfile(curve):
     if curve == None:
-        return
-    ps = GetMinXPoint(curve)
-    pe = GetMaxXPoint(curve)
-    vx = pe - ps
-    vx.Normalize()
-    vy = ~vx
-    o = geom.Point3D(ps.x, ps.y, 0.0)
-    vvx = geom.Point3D(vx.x, vx.y, 0.0)
-    vvy = geom.Point3D(vy.x, vy.y, 0.0)
-    tm = geom.Matrix(o, vvx, vvy)
-    return tm.Inverse()
-
-def GetUnitizedPoint(curve, fraction, invtm, centre_straight):
-    if curve == None: return
- 
-    ps = GetMinXPoint(curve)
-    pe = GetMaxXPoint(curve)
-     
-    xdist = ps.Dist(pe)
-        
-    if xdist < 0.00001:
-        return geom.Point(0,0)
-    scale = 1.0/xdist
-    p = curve.PerimToPoint(curve.Perim() * fraction)
-    p.Transform(invtm)
-    pu = geom.Point(p.x * scale, p.y * scale)
-    if centre_straight:
-        pu.y = 0
-    return pu
+        return None
+    return Profile(curve)
+
+def MakeCurveIndex(curve):
+    if curve == None:
+        return None
+    return CurveIndex(curve)
  
+def NewWingFromPoints(leading_edge, trailing_edge, root_profile, tip_profile, angle_graph = None):
+    # makes a wing from arrays of x, y points, with a new sketch for each one
+    # only the NumPy backend can make sketches like this
+    wing = Wing()
+    for i, pts in enumerate([leading_edge, trailing_edge, root_profile, tip_profile, angle_graph]):
+        if pts is not None:
+            wing.sketch_ids[i] = cad.NewSketch(np.asarray(pts, dtype = float).tolist())
+    return wing
+
 def MakeSketches():
     global wing_for_tools
     wing_for_tools.MakeSketches()
\ No newline at end of file